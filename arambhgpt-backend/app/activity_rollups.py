@@ -0,0 +1,170 @@
+from typing import Dict, Optional
+from .database import get_db_connection
+
+WEEKDAYS = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+
+
+def init_activity_tables():
+    """Initialize per-user daily activity rollups, kept current by triggers"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'user_activity_daily'")
+    is_new = cursor.fetchone() is None
+
+    # Days are UTC calendar days, matching CURRENT_TIMESTAMP on messages
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_activity_daily (
+            user_id INTEGER NOT NULL,
+            day DATE NOT NULL,
+            message_count INTEGER DEFAULT 0,
+            conversations_started INTEGER DEFAULT 0,
+            PRIMARY KEY (user_id, day)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS messages_insert_activity
+        AFTER INSERT ON messages
+        BEGIN
+            INSERT INTO user_activity_daily (user_id, day, message_count)
+            SELECT user_id, date(NEW.created_at), 1 FROM conversations WHERE id = NEW.conversation_id
+            ON CONFLICT(user_id, day) DO UPDATE SET message_count = message_count + 1;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS messages_delete_activity
+        AFTER DELETE ON messages
+        BEGIN
+            UPDATE user_activity_daily SET message_count = message_count - 1
+            WHERE day = date(OLD.created_at)
+              AND user_id = (SELECT user_id FROM conversations WHERE id = OLD.conversation_id);
+            DELETE FROM user_activity_daily
+            WHERE day = date(OLD.created_at) AND message_count <= 0 AND conversations_started <= 0
+              AND user_id = (SELECT user_id FROM conversations WHERE id = OLD.conversation_id);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS conversations_insert_activity
+        AFTER INSERT ON conversations
+        BEGIN
+            INSERT INTO user_activity_daily (user_id, day, conversations_started)
+            VALUES (NEW.user_id, date(NEW.created_at), 1)
+            ON CONFLICT(user_id, day) DO UPDATE SET conversations_started = conversations_started + 1;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS conversations_delete_activity
+        AFTER DELETE ON conversations
+        BEGIN
+            UPDATE user_activity_daily SET conversations_started = conversations_started - 1
+            WHERE user_id = OLD.user_id AND day = date(OLD.created_at);
+            DELETE FROM user_activity_daily
+            WHERE user_id = OLD.user_id AND day = date(OLD.created_at)
+              AND message_count <= 0 AND conversations_started <= 0;
+        END
+    ''')
+
+    conn.commit()
+    conn.close()
+
+    # Existing history predates the triggers
+    if is_new:
+        backfill_activity_rollups()
+
+
+def backfill_activity_rollups(user_id: Optional[int] = None) -> Dict[str, int]:
+    """Rebuild the rollups from conversations and messages. Safe to re-run"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    user_filter = " WHERE c.user_id = ?" if user_id else ""
+    params = (user_id,) if user_id else ()
+
+    cursor.execute(
+        "DELETE FROM user_activity_daily" + (" WHERE user_id = ?" if user_id else ""),
+        params
+    )
+    cursor.execute(f'''
+        INSERT INTO user_activity_daily (user_id, day, message_count)
+        SELECT c.user_id, date(m.created_at), COUNT(*)
+        FROM messages m JOIN conversations c ON c.id = m.conversation_id{user_filter}
+        GROUP BY c.user_id, date(m.created_at)
+    ''', params)
+    # WHERE true keeps the upsert unambiguous after a SELECT
+    cursor.execute(f'''
+        INSERT INTO user_activity_daily (user_id, day, conversations_started)
+        SELECT c.user_id, date(c.created_at), COUNT(*)
+        FROM conversations c{user_filter or " WHERE true"}
+        GROUP BY c.user_id, date(c.created_at)
+        ON CONFLICT(user_id, day) DO UPDATE SET conversations_started = excluded.conversations_started
+    ''', params)
+
+    cursor.execute(
+        "SELECT COUNT(DISTINCT user_id), COUNT(*) FROM user_activity_daily" + (" WHERE user_id = ?" if user_id else ""),
+        params
+    )
+    users, days = cursor.fetchone()
+
+    conn.commit()
+    conn.close()
+    return {'users': users, 'days': days}
+
+
+def get_activity_stats(user_id: int) -> Dict:
+    """History stats summed from a user's daily rows; cost depends on active days, not messages"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        SELECT COUNT(CASE WHEN message_count > 0 THEN 1 END) AS active_days,
+               COALESCE(SUM(message_count), 0) AS total_messages,
+               COALESCE(SUM(conversations_started), 0) AS total_conversations,
+               MIN(day) AS first_active_day,
+               MAX(day) AS last_active_day,
+               COALESCE(SUM(CASE WHEN day = date('now') THEN conversations_started END), 0) AS today,
+               COALESCE(SUM(CASE WHEN day > date('now', '-7 days') THEN conversations_started END), 0) AS last_7_days,
+               COALESCE(SUM(CASE WHEN day > date('now', '-30 days') THEN conversations_started END), 0) AS last_30_days
+        FROM user_activity_daily
+        WHERE user_id = ?
+    ''', (user_id,))
+    totals = cursor.fetchone()
+
+    cursor.execute('''
+        SELECT CAST(strftime('%w', day) AS INTEGER) AS weekday, SUM(message_count) AS messages
+        FROM user_activity_daily
+        WHERE user_id = ?
+        GROUP BY weekday
+    ''', (user_id,))
+    weekday_messages = {row['weekday']: row['messages'] for row in cursor.fetchall()}
+
+    conn.close()
+
+    weekday_histogram = {name: weekday_messages.get(index, 0) for index, name in enumerate(WEEKDAYS)}
+    busiest = max(weekday_histogram, key=weekday_histogram.get)
+
+    total_conversations = totals['total_conversations']
+    total_messages = totals['total_messages']
+    active_days = totals['active_days']
+
+    return {
+        "total_conversations": total_conversations,
+        "total_messages": total_messages,
+        "active_days": active_days,
+        "average_messages_per_conversation": round(total_messages / total_conversations, 2) if total_conversations else 0,
+        "average_messages_per_active_day": round(total_messages / active_days, 2) if active_days else 0,
+        "most_active_day": busiest if weekday_histogram[busiest] else None,
+        "weekday_histogram": weekday_histogram,
+        "conversation_frequency": {
+            "today": totals['today'],
+            "last_7_days": totals['last_7_days'],
+            "last_30_days": totals['last_30_days'],
+            "all_time": total_conversations
+        },
+        "first_active_day": totals['first_active_day'],
+        "last_active_day": totals['last_active_day']
+    }
+
+
+# Initialize tables on import
+init_activity_tables()
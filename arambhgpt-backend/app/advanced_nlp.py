@@ -4,6 +4,7 @@ from datetime import datetime, timedelta
 import json
 from .sensitive_topics_analyzer import SensitiveTopicsAnalyzer
 from .sexual_health_educator import SexualHealthEducator
+from .pipeline_profiler import profiler
 
 class AdvancedNLPProcessor:
     """Advanced NLP for Indian languages and cultural context"""
@@ -90,28 +91,36 @@ class AdvancedNLPProcessor:
         message_lower = message.lower()
         
         # Basic emotion detection
-        emotions = self._detect_emotions_with_intensity(message_lower)
+        with profiler.stage('nlp.emotions'):
+            emotions = self._detect_emotions_with_intensity(message_lower)
         
         # Cultural context detection
-        cultural_context = self._detect_cultural_context(message_lower)
+        with profiler.stage('nlp.cultural_context'):
+            cultural_context = self._detect_cultural_context(message_lower)
         
         # Regional language detection
-        regional_info = self._detect_regional_language(message_lower)
+        with profiler.stage('nlp.regional_language'):
+            regional_info = self._detect_regional_language(message_lower)
         
         # Coping mechanism analysis
-        coping_analysis = self._analyze_coping_mechanisms(message_lower)
+        with profiler.stage('nlp.coping_mechanisms'):
+            coping_analysis = self._analyze_coping_mechanisms(message_lower)
         
         # Temporal analysis (time-based patterns)
-        temporal_context = self._analyze_temporal_context(message, user_history)
+        with profiler.stage('nlp.temporal_context'):
+            temporal_context = self._analyze_temporal_context(message, user_history)
         
         # Severity assessment
-        severity = self._assess_severity(emotions, cultural_context, message_lower)
+        with profiler.stage('nlp.severity'):
+            severity = self._assess_severity(emotions, cultural_context, message_lower)
         
         # Sensitive content analysis
-        sensitive_analysis = self.sensitive_analyzer.analyze_sensitive_content(message)
+        with profiler.stage('nlp.sensitive_content'):
+            sensitive_analysis = self.sensitive_analyzer.analyze_sensitive_content(message)
         
         # Sexual health education analysis
-        health_analysis = self.health_educator.analyze_sexual_health_query(message)
+        with profiler.stage('nlp.sexual_health'):
+            health_analysis = self.health_educator.analyze_sexual_health_query(message)
         
         # Response strategy
         strategy = self._determine_response_strategy(
@@ -3,12 +3,14 @@ from typing import Dict, Optional
 from .auth import verify_token, get_user_by_email
 from .database import get_db_connection
 from .ai_memory import ConversationMemory
+from .insight_rollups import get_window_patterns
 
 router = APIRouter(prefix="/ai-learning", tags=["ai-learning"])
 memory = ConversationMemory()
 
+# Plain def: update_user_personality takes a per-user threading lock, so this runs in the threadpool
 @router.post("/feedback")
-async def provide_feedback(
+def provide_feedback(
     feedback_data: Dict,
     email: str = Depends(verify_token)
 ):
@@ -50,39 +52,16 @@ async def provide_feedback(
         return {"status": "error", "message": str(e)}
 
 @router.get("/user-insights")
-async def get_user_insights(email: str = Depends(verify_token)):
+async def get_user_insights(days: int = 30, email: str = Depends(verify_token)):
     """Get AI insights about user's emotional patterns"""
     try:
         user = get_user_by_email(email)
         user_id = str(user['id'])
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Get emotional patterns
-        cursor.execute('''
-            SELECT emotion_detected, COUNT(*) as frequency
-            FROM conversation_context 
-            WHERE user_id = ? AND timestamp > datetime('now', '-30 days')
-            GROUP BY emotion_detected
-            ORDER BY frequency DESC
-        ''', (user_id,))
-        
-        emotion_patterns = [{"emotion": row[0], "frequency": row[1]} for row in cursor.fetchall()]
-        
-        # Get topic patterns
-        cursor.execute('''
-            SELECT topics_discussed, COUNT(*) as frequency
-            FROM conversation_context 
-            WHERE user_id = ? AND timestamp > datetime('now', '-30 days')
-            GROUP BY topics_discussed
-            ORDER BY frequency DESC
-            LIMIT 5
-        ''', (user_id,))
-        
-        topic_patterns = [{"topics": row[0], "frequency": row[1]} for row in cursor.fetchall()]
-        
-        conn.close()
+        # Summed from per-day rollups, so cost is bounded by the window length
+        patterns = get_window_patterns(user_id, days)
+        emotion_patterns = patterns["emotion_patterns"]
+        topic_patterns = patterns["topic_patterns"]
         
         return {
             "emotion_patterns": emotion_patterns,
@@ -1,7 +1,336 @@
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
+from collections import OrderedDict
 import json
+import os
+import threading
+import time
 from .database import get_db_connection
+from .semantic_memory import semantic_memory, DEFAULT_TOP_K
+from .insight_rollups import record_interaction
+from .tagging import normalize_tags
+
+# Per-user context cache bounds
+USER_CONTEXT_CACHE_SIZE = 5000
+USER_CONTEXT_IDLE_TTL = 30 * 60  # seconds
+RECENT_CONTEXT_LIMIT = 5
+
+# Memory digest compaction
+MEMORY_RETENTION_DAYS = int(os.getenv("MEMORY_RETENTION_DAYS", "90"))
+DIGEST_HALF_LIFE_DAYS = 30.0
+DIGEST_MIN_WEIGHT = 0.01
+DIGEST_MAX_TOPICS = 50
+DIGEST_SUMMARY_ITEMS = 3
+
+# Column defaults of user_personality, used when a row is created by an upsert
+PERSONALITY_DEFAULTS = {
+    'communication_style': 'casual',
+    'preferred_language': 'hinglish',
+    'emotional_patterns': None,
+    'topics_of_interest': None,
+    'stress_triggers': None,
+    'coping_preferences': None,
+    'personality_traits': None,
+    'updated_at': None
+}
+
+class UserContextCache:
+    """Write-through LRU cache of per-user personality and recent context"""
+    
+    def __init__(self, max_users: int = USER_CONTEXT_CACHE_SIZE, idle_ttl: float = USER_CONTEXT_IDLE_TTL):
+        self.max_users = max_users
+        self.idle_ttl = idle_ttl
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Striped per-user locks serialize concurrent turns of the same user
+        self._user_locks = [threading.Lock() for _ in range(64)]
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def lock_for(self, user_id: str) -> threading.Lock:
+        return self._user_locks[hash(user_id) % len(self._user_locks)]
+    
+    def get(self, user_id: str) -> Optional[Dict]:
+        """Return the live entry for a user, or None if missing or idle too long"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and now - entry['last_used'] > self.idle_ttl:
+                del self._entries[user_id]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            entry['last_used'] = now
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry
+    
+    def peek(self, user_id: str) -> Optional[Dict]:
+        """Return the entry without touching LRU order or stats"""
+        with self._lock:
+            return self._entries.get(user_id)
+    
+    def put(self, user_id: str, personality: Dict, recent_context: List[Dict],
+            digest: Optional[Dict] = None) -> Dict:
+        entry = {
+            'personality': personality,
+            'recent_context': recent_context[:RECENT_CONTEXT_LIMIT],
+            'digest': digest,
+            'last_used': time.monotonic()
+        }
+        with self._lock:
+            self._entries[user_id] = entry
+            self._entries.move_to_end(user_id)
+            self._evict_locked()
+        return entry
+    
+    def push_interaction(self, user_id: str, row: Dict):
+        """Prepend a freshly saved interaction to a cached user's recent context"""
+        entry = self.peek(user_id)
+        if entry is not None:
+            entry['recent_context'] = [row] + entry['recent_context'][:RECENT_CONTEXT_LIMIT - 1]
+    
+    def merge_personality(self, user_id: str, updates: Dict):
+        """Apply a personality write to a cached user"""
+        entry = self.peek(user_id)
+        if entry is not None:
+            personality = dict(entry['personality']) or {'user_id': user_id, **PERSONALITY_DEFAULTS}
+            personality.update(updates)
+            entry['personality'] = personality
+    
+    def set_digest(self, user_id: str, digest: Optional[Dict]):
+        """Swap in a freshly compacted digest for a cached user"""
+        entry = self.peek(user_id)
+        if entry is not None:
+            entry['digest'] = digest
+    
+    def evict(self, user_id: str):
+        with self._lock:
+            self._entries.pop(user_id, None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def get_stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "users": len(self._entries),
+            "max_users": self.max_users,
+            "idle_ttl_s": self.idle_ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+    
+    def _evict_locked(self):
+        now = time.monotonic()
+        # Idle entries sit at the LRU end, so expire from there first
+        while self._entries:
+            user_id, entry = next(iter(self._entries.items()))
+            if now - entry['last_used'] <= self.idle_ttl:
+                break
+            del self._entries[user_id]
+            self.expirations += 1
+        while len(self._entries) > self.max_users:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+# Shared by every ConversationMemory instance so all writers stay coherent
+user_context_cache = UserContextCache()
+
+def _parse_digest(row) -> Optional[Dict]:
+    """Turn a user_memory_digest row into the dict kept in context"""
+    if not row:
+        return None
+    return {
+        'emotions': json.loads(row['emotion_weights'] or '{}'),
+        'topics': json.loads(row['topic_weights'] or '{}'),
+        'last_advice': row['last_advice'],
+        'interactions': row['total_interactions']
+    }
+
+def _decay(weights: Dict[str, float], days: float) -> Dict[str, float]:
+    factor = 0.5 ** (max(days, 0.0) / DIGEST_HALF_LIFE_DAYS)
+    return {key: value * factor for key, value in weights.items()}
+
+def _parse_timestamp(value: str) -> datetime:
+    return datetime.fromisoformat(value) if value else datetime.utcnow()
+
+def load_user_context(user_id: str) -> Dict:
+    """Read a user's personality, memory digest and recent context into the cache"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    # Get personality
+    cursor.execute(
+        "SELECT * FROM user_personality WHERE user_id = ?", 
+        (user_id,)
+    )
+    personality = cursor.fetchone()
+    
+    # Get long-term digest
+    cursor.execute(
+        "SELECT * FROM user_memory_digest WHERE user_id = ?",
+        (user_id,)
+    )
+    digest = cursor.fetchone()
+    
+    # Get recent conversation context (last 5 interactions)
+    cursor.execute('''
+        SELECT message_summary, emotion_detected, topics_discussed, advice_given
+        FROM conversation_context 
+        WHERE user_id = ? 
+        ORDER BY id DESC 
+        LIMIT ?
+    ''', (user_id, RECENT_CONTEXT_LIMIT))
+    recent_context = cursor.fetchall()
+    
+    conn.close()
+    
+    return user_context_cache.put(
+        user_id,
+        dict(personality) if personality else {},
+        [dict(row) for row in recent_context],
+        _parse_digest(digest)
+    )
+
+def compact_user_memory(user_id: str, retention_days: int = MEMORY_RETENTION_DAYS,
+                        now: Optional[datetime] = None) -> Dict:
+    """Fold a user's older context rows into their digest and prune expired rows"""
+    user_id = str(user_id)
+    now = now or datetime.utcnow()
+    
+    with user_context_cache.lock_for(user_id):
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            "SELECT * FROM user_memory_digest WHERE user_id = ?",
+            (user_id,)
+        )
+        row = cursor.fetchone()
+        compacted_through = row['compacted_through_id'] if row else 0
+        
+        # The newest rows stay raw as the recent tail; everything older is folded
+        cursor.execute('''
+            SELECT id FROM conversation_context
+            WHERE user_id = ?
+            ORDER BY id DESC
+            LIMIT 1 OFFSET ?
+        ''', (user_id, RECENT_CONTEXT_LIMIT - 1))
+        tail_start = cursor.fetchone()
+        
+        folded = 0
+        if tail_start and tail_start['id'] > compacted_through + 1:
+            digest = _parse_digest(row) or {'emotions': {}, 'topics': {}, 'last_advice': None, 'interactions': 0}
+            decayed_at = _parse_timestamp(row['decayed_at']) if row else now
+            days_since = (now - decayed_at).total_seconds() / 86400
+            emotions = _decay(digest['emotions'], days_since)
+            topics = _decay(digest['topics'], days_since)
+            last_advice = digest['last_advice']
+            
+            cursor.execute('''
+                SELECT id, emotion_detected, topics_discussed, advice_given, timestamp
+                FROM conversation_context
+                WHERE user_id = ? AND id > ? AND id < ?
+                ORDER BY id
+            ''', (user_id, compacted_through, tail_start['id']))
+            
+            for ctx in cursor:
+                age_days = (now - _parse_timestamp(ctx['timestamp'])).total_seconds() / 86400
+                weight = 0.5 ** (max(age_days, 0.0) / DIGEST_HALF_LIFE_DAYS)
+                if ctx['emotion_detected']:
+                    emotions[ctx['emotion_detected']] = emotions.get(ctx['emotion_detected'], 0.0) + weight
+                if ctx['topics_discussed']:
+                    for topic in json.loads(ctx['topics_discussed']):
+                        topics[topic] = topics.get(topic, 0.0) + weight
+                if ctx['advice_given']:
+                    last_advice = ctx['advice_given']
+                compacted_through = ctx['id']
+                folded += 1
+            
+            emotions = {key: round(value, 4) for key, value in emotions.items() if value >= DIGEST_MIN_WEIGHT}
+            topics = dict(sorted(
+                ((key, round(value, 4)) for key, value in topics.items() if value >= DIGEST_MIN_WEIGHT),
+                key=lambda item: item[1], reverse=True
+            )[:DIGEST_MAX_TOPICS])
+            
+            cursor.execute('''
+                INSERT INTO user_memory_digest
+                (user_id, emotion_weights, topic_weights, last_advice, total_interactions,
+                 compacted_through_id, decayed_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(user_id) DO UPDATE SET
+                    emotion_weights = excluded.emotion_weights,
+                    topic_weights = excluded.topic_weights,
+                    last_advice = excluded.last_advice,
+                    total_interactions = excluded.total_interactions,
+                    compacted_through_id = excluded.compacted_through_id,
+                    decayed_at = excluded.decayed_at,
+                    updated_at = CURRENT_TIMESTAMP
+            ''', (
+                user_id,
+                json.dumps(emotions),
+                json.dumps(topics),
+                last_advice,
+                digest['interactions'] + folded,
+                compacted_through,
+                now.strftime('%Y-%m-%d %H:%M:%S')
+            ))
+            
+            user_context_cache.set_digest(user_id, {
+                'emotions': emotions,
+                'topics': topics,
+                'last_advice': last_advice,
+                'interactions': digest['interactions'] + folded
+            })
+        
+        # Only rows already folded into the digest are ever pruned
+        cutoff = (now - timedelta(days=retention_days)).strftime('%Y-%m-%d %H:%M:%S')
+        cursor.execute('''
+            DELETE FROM conversation_context
+            WHERE user_id = ? AND id <= ? AND timestamp < ?
+        ''', (user_id, compacted_through, cutoff))
+        pruned = cursor.rowcount
+        
+        conn.commit()
+        conn.close()
+    
+    semantic_memory.prune(user_id)
+    
+    return {'user_id': user_id, 'folded': folded, 'pruned': pruned}
+
+def compact_all_user_memory(retention_days: int = MEMORY_RETENTION_DAYS) -> Dict:
+    """Run compaction for every user with stored context"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT DISTINCT user_id FROM conversation_context")
+    user_ids = [row['user_id'] for row in cursor.fetchall()]
+    conn.close()
+    
+    totals = {'users': 0, 'folded': 0, 'pruned': 0}
+    for user_id in user_ids:
+        result = compact_user_memory(user_id, retention_days)
+        totals['users'] += 1
+        totals['folded'] += result['folded']
+        totals['pruned'] += result['pruned']
+    return totals
+
+def warm_user_context(user_id: str):
+    """Compact and preload a user's context (called after login)"""
+    user_id = str(user_id)
+    compact_user_memory(user_id)
+    with user_context_cache.lock_for(user_id):
+        if user_context_cache.peek(user_id) is None:
+            load_user_context(user_id)
 
 class ConversationMemory:
     """AI memory system for better context awareness"""
@@ -44,6 +373,46 @@ class ConversationMemory:
             )
         ''')
         
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_conversation_context_user
+            ON conversation_context (user_id, id)
+        ''')
+        
+        # Normalized topics per context row (topics_discussed keeps the raw JSON)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS conversation_topics (
+                context_id INTEGER NOT NULL,
+                user_id TEXT NOT NULL,
+                topic TEXT NOT NULL,
+                PRIMARY KEY (context_id, topic)
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_conversation_topics_user_topic
+            ON conversation_topics (user_id, topic)
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS conversation_context_delete_topics
+            AFTER DELETE ON conversation_context
+            BEGIN
+                DELETE FROM conversation_topics WHERE context_id = OLD.id;
+            END
+        ''')
+        
+        # Long-term digest of compacted conversation context
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS user_memory_digest (
+                user_id TEXT PRIMARY KEY,
+                emotion_weights TEXT,
+                topic_weights TEXT,
+                last_advice TEXT,
+                total_interactions INTEGER DEFAULT 0,
+                compacted_through_id INTEGER DEFAULT 0,
+                decayed_at TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
         # AI learning from interactions
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS ai_learning (
@@ -62,82 +431,100 @@ class ConversationMemory:
     
     def get_user_context(self, user_id: str) -> Dict:
         """Get user's conversation context and personality"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Get personality
-        cursor.execute(
-            "SELECT * FROM user_personality WHERE user_id = ?", 
-            (user_id,)
-        )
-        personality = cursor.fetchone()
-        
-        # Get recent conversation context (last 5 interactions)
-        cursor.execute('''
-            SELECT message_summary, emotion_detected, topics_discussed, advice_given
-            FROM conversation_context 
-            WHERE user_id = ? 
-            ORDER BY timestamp DESC 
-            LIMIT 5
-        ''', (user_id,))
-        recent_context = cursor.fetchall()
-        
-        conn.close()
+        user_id = str(user_id)
+        with user_context_cache.lock_for(user_id):
+            entry = user_context_cache.get(user_id)
+            if entry is None:
+                entry = load_user_context(user_id)
+            
+            # Copies, so callers cannot mutate the cached entry
+            personality = dict(entry['personality'])
+            recent_context = [dict(row) for row in entry['recent_context']]
+            digest = entry['digest']
+            if digest is not None:
+                digest = {**digest, 'emotions': dict(digest['emotions']), 'topics': dict(digest['topics'])}
         
         return {
-            'personality': dict(personality) if personality else {},
-            'recent_context': [dict(row) for row in recent_context],
-            'context_summary': self._generate_context_summary(recent_context)
+            'personality': personality,
+            'recent_context': recent_context,
+            'memory_digest': digest,
+            'context_summary': self._generate_context_summary(recent_context, digest)
         }
     
+    def recall(self, user_id: str, message: str, k: int = DEFAULT_TOP_K) -> List[Dict]:
+        """Past messages most similar to this one, beyond the recent tail"""
+        return semantic_memory.search(str(user_id), message, k, skip_recent=RECENT_CONTEXT_LIMIT)
+    
     def save_interaction(self, user_id: str, message: str, emotion: str, 
                         topics: List[str], ai_response: str):
         """Save interaction for future context"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO conversation_context 
-            (user_id, message_summary, emotion_detected, topics_discussed, advice_given)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (
-            user_id,
-            message[:200],  # Summary of message
-            emotion,
-            json.dumps(topics),
-            ai_response[:300]  # Summary of advice
-        ))
+        user_id = str(user_id)
+        row = {
+            'message_summary': message[:200],  # Summary of message
+            'emotion_detected': emotion,
+            'topics_discussed': json.dumps(topics),
+            'advice_given': ai_response[:300]  # Summary of advice
+        }
         
-        conn.commit()
-        conn.close()
+        with user_context_cache.lock_for(user_id):
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                INSERT INTO conversation_context 
+                (user_id, message_summary, emotion_detected, topics_discussed, advice_given)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (
+                user_id,
+                row['message_summary'],
+                row['emotion_detected'],
+                row['topics_discussed'],
+                row['advice_given']
+            ))
+            context_id = cursor.lastrowid
+            cursor.executemany(
+                "INSERT OR IGNORE INTO conversation_topics (context_id, user_id, topic) VALUES (?, ?, ?)",
+                [(context_id, user_id, topic) for topic in normalize_tags(topics)]
+            )
+            memory_entry = semantic_memory.add(cursor, user_id, context_id, message)
+            record_interaction(cursor, user_id, emotion, topics)
+            
+            conn.commit()
+            conn.close()
+            semantic_memory.index_added(user_id, memory_entry)
+            
+            user_context_cache.push_interaction(user_id, row)
     
     def update_user_personality(self, user_id: str, updates: Dict):
         """Update user personality based on interactions"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        if not updates:
+            return
+        user_id = str(user_id)
         
-        # Check if personality exists
-        cursor.execute("SELECT user_id FROM user_personality WHERE user_id = ?", (user_id,))
-        exists = cursor.fetchone()
-        
-        if exists:
-            # Update existing
-            set_clause = ", ".join([f"{key} = ?" for key in updates.keys()])
-            values = list(updates.values()) + [user_id]
-            cursor.execute(f"UPDATE user_personality SET {set_clause} WHERE user_id = ?", values)
-        else:
-            # Insert new
-            columns = ", ".join(["user_id"] + list(updates.keys()))
-            placeholders = ", ".join(["?"] * (len(updates) + 1))
-            values = [user_id] + list(updates.values())
-            cursor.execute(f"INSERT INTO user_personality ({columns}) VALUES ({placeholders})", values)
+        # Single upsert instead of an existence check plus insert/update
+        columns = list(updates.keys())
+        placeholders = ", ".join(["?"] * (len(columns) + 1))
+        set_clause = ", ".join([f"{key} = excluded.{key}" for key in columns])
+        values = [user_id] + list(updates.values())
         
-        conn.commit()
-        conn.close()
+        with user_context_cache.lock_for(user_id):
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            
+            cursor.execute(
+                f"INSERT INTO user_personality (user_id, {', '.join(columns)}) VALUES ({placeholders}) "
+                f"ON CONFLICT(user_id) DO UPDATE SET {set_clause}",
+                values
+            )
+            
+            conn.commit()
+            conn.close()
+            
+            user_context_cache.merge_personality(user_id, updates)
     
-    def _generate_context_summary(self, recent_context: List) -> str:
-        """Generate summary of recent conversations"""
-        if not recent_context:
+    def _generate_context_summary(self, recent_context: List, digest: Optional[Dict] = None) -> str:
+        """Generate summary of recent conversations and the long-term digest"""
+        if not recent_context and not digest:
             return "New user, no previous context"
         
         emotions = [ctx['emotion_detected'] for ctx in recent_context if ctx['emotion_detected']]
@@ -146,4 +533,11 @@ class ConversationMemory:
             if ctx['topics_discussed']:
                 topics.extend(json.loads(ctx['topics_discussed']))
         
-        return f"Recent emotions: {', '.join(set(emotions))}. Topics: {', '.join(set(topics))}"
\ No newline at end of file
+        summary = f"Recent emotions: {', '.join(set(emotions))}. Topics: {', '.join(set(topics))}"
+        
+        if digest:
+            top_emotions = sorted(digest['emotions'], key=digest['emotions'].get, reverse=True)[:DIGEST_SUMMARY_ITEMS]
+            top_topics = sorted(digest['topics'], key=digest['topics'].get, reverse=True)[:DIGEST_SUMMARY_ITEMS]
+            summary += f". Long-term emotions: {', '.join(top_emotions)}. Long-term topics: {', '.join(top_topics)}"
+        
+        return summary
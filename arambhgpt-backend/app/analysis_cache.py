@@ -0,0 +1,135 @@
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Callable, Dict, Iterable, Mapping, Tuple
+import hashlib
+import json
+import threading
+import time
+
+# Maximum number of distinct normalized messages kept
+ANALYSIS_CACHE_SIZE = 10000
+
+# How often (seconds) the lexicon fingerprint is recomputed
+LEXICON_CHECK_INTERVAL = 60.0
+
+
+def normalize_message(message: str) -> str:
+    """Lowercase and collapse whitespace so trivial variants share an entry"""
+    return " ".join(message.lower().split())
+
+
+def freeze(value):
+    """Recursively convert an analysis result into read-only structures"""
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(freeze(item) for item in value)
+    return value
+
+
+def lexicon_fingerprint(analyzers: Iterable[object]) -> str:
+    """Hash every keyword dict/list held by the given analyzers"""
+    digest = hashlib.blake2b(digest_size=8)
+
+    def visit(obj, seen):
+        if id(obj) in seen:
+            return
+        seen.add(id(obj))
+        for name, attribute in sorted(vars(obj).items()):
+            if isinstance(attribute, (dict, list, tuple)):
+                digest.update(name.encode())
+                digest.update(json.dumps(attribute, sort_keys=True, ensure_ascii=False, default=str).encode())
+            elif hasattr(attribute, '__dict__') and not callable(attribute):
+                visit(attribute, seen)
+
+    seen = set()
+    for analyzer in analyzers:
+        visit(analyzer, seen)
+    return digest.hexdigest()
+
+
+class AnalysisCache:
+    """Bounded LRU cache of user-independent message analysis results"""
+
+    def __init__(self, analyzers: Iterable[object], max_size: int = ANALYSIS_CACHE_SIZE,
+                 check_interval: float = LEXICON_CHECK_INTERVAL):
+        self.analyzers = tuple(analyzers)
+        self.max_size = max_size
+        self.check_interval = check_interval
+        self._entries: "OrderedDict[Tuple[str, bytes], Mapping]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.lexicon_version = lexicon_fingerprint(self.analyzers)
+        self._last_check = time.monotonic()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get_or_compute(self, message: str, compute: Callable[[str], Dict]) -> Mapping:
+        """Return the cached analysis for a message, computing it on a miss.
+
+        compute receives the normalized message so the cached value depends
+        only on the key.
+        """
+        self._check_lexicon()
+
+        normalized = normalize_message(message)
+        key = (self.lexicon_version, hashlib.blake2b(normalized.encode(), digest_size=16).digest())
+
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        result = freeze(compute(normalized))
+
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+        return result
+
+    def invalidate(self):
+        """Drop every cached analysis"""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def refresh_lexicon_version(self) -> bool:
+        """Recompute the lexicon fingerprint, clearing the cache if it changed"""
+        version = lexicon_fingerprint(self.analyzers)
+        self._last_check = time.monotonic()
+        if version == self.lexicon_version:
+            return False
+        self.lexicon_version = version
+        self.invalidate()
+        print(f"🔄 Analysis cache invalidated, lexicon version {version}")
+        return True
+
+    def get_stats(self) -> Dict:
+        """Hit-rate metrics for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "lexicon_version": self.lexicon_version
+        }
+
+    def _check_lexicon(self):
+        if time.monotonic() - self._last_check >= self.check_interval:
+            self.refresh_lexicon_version()
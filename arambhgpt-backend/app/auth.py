@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, status, BackgroundTasks
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from passlib.context import CryptContext
 from jose import JWTError, jwt
@@ -7,6 +7,7 @@ import os
 from typing import Optional
 from .database import get_db_connection
 from .models import UserCreate, UserLogin, Token, User
+from .ai_memory import warm_user_context
 
 router = APIRouter()
 security = HTTPBearer()
@@ -19,6 +20,9 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 1440  # 24 hours
 
+# Comma-separated emails allowed to call admin endpoints
+ADMIN_EMAILS = {email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()}
+
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
@@ -88,6 +92,11 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+def verify_admin(email: str = Depends(verify_token)):
+    if email.lower() not in ADMIN_EMAILS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return email
+
 @router.post("/register", response_model=Token)
 async def signup(user: UserCreate):
     # Check if user already exists
@@ -123,7 +132,7 @@ async def signup(user: UserCreate):
     }
 
 @router.post("/login", response_model=Token)
-async def login(user: UserLogin):
+async def login(user: UserLogin, background_tasks: BackgroundTasks):
     # Check if user exists
     db_user = get_user_by_email(user.email)
     if not db_user:
@@ -145,6 +154,9 @@ async def login(user: UserLogin):
         data={"sub": user.email}, expires_delta=access_token_expires
     )
     
+    # Warm the chat context cache so the first turn skips the context reads
+    background_tasks.add_task(warm_user_context, str(db_user['id']))
+    
     return {
         "access_token": access_token,
         "token_type": "bearer",
@@ -1,13 +1,20 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
+from starlette.concurrency import run_in_threadpool
 import os
 from .models import ChatMessage, ChatResponse
 from .response_personalizer import ResponsePersonalizer
-from .auth import verify_token, get_user_by_email
+from .language_detector import language_identifier
+from .crisis_detector import CrisisDetector
+from .pipeline_profiler import profiler
+from .ai_memory import user_context_cache
+from .semantic_memory import semantic_memory
+from .auth import verify_token, verify_admin, get_user_by_email
 
 router = APIRouter()
 
 # Initialize advanced AI components
 personalizer = ResponsePersonalizer()
+crisis_detector = CrisisDetector(personalizer.smart_templates.crisis_templates)
 
 # Initialize Gemini AI
 try:
@@ -39,50 +46,8 @@ except Exception as e:
     print(f"❌ Gemini initialization error: {e}")
 
 def detect_language(message: str) -> str:
-    """Improved language detection with better accuracy"""
-    message_lower = message.lower()
-    
-    # Check for Devanagari script (Hindi)
-    has_hindi_script = any('\u0900' <= char <= '\u097F' for char in message)
-    if has_hindi_script:
-        return 'hindi'
-    
-    # Strong Hinglish indicators
-    strong_hinglish = ['yaar', 'bhai', 'kya', 'hai', 'hun', 'hoon', 'kar', 'karo', 'main', 'mein', 'tum', 'tumhe', 
-                       'achha', 'accha', 'theek', 'thik', 'sahi', 'galat', 'bahut', 'bohot', 'kuch', 'koi', 
-                       'batao', 'samajh', 'dekho', 'suno', 'arre', 'matlab', 'bilkul', 'ekdum', 'jyda', 'zyada',
-                       'likhte', 'kyu', 'kyun', 'itna', 'msg', 'baat']
-    
-    # Strong English indicators  
-    strong_english = ['there', 'nice', 'meet', 'doing', 'today', 'anything', 'would', 'like', 'talk', 'about',
-                      'here', 'listen', 'without', 'judgment', 'offer', 'support', 'understand', 'feeling',
-                      'overwhelmed', 'amount', 'messaging', 'sounds', 'prefer', 'shorter', 'concise', 'responses']
-    
-    # Count strong indicators
-    hinglish_count = sum(1 for word in strong_hinglish if word in message_lower)
-    english_count = sum(1 for word in strong_english if word in message_lower)
-    
-    # Check for specific patterns
-    if any(phrase in message_lower for phrase in ['tum itna', 'kyu likhte', 'msg kyu', 'jyda msg']):
-        return 'hinglish'
-    
-    if any(phrase in message_lower for phrase in ['nice to meet', 'how are you doing', 'anything you\'d like']):
-        return 'english'
-    
-    # Determine based on counts
-    if hinglish_count > 0:
-        return 'hinglish'
-    elif english_count > 0:
-        return 'english'
-    else:
-        # Default logic for edge cases
-        words = message_lower.split()
-        if len(words) <= 3 and any(word in ['kya', 'hai', 'tum', 'main'] for word in words):
-            return 'hinglish'
-        elif len(words) <= 3 and any(word in ['how', 'are', 'you', 'what'] for word in words):
-            return 'english'
-        else:
-            return 'hinglish'  # Default for Indian users
+    """Detect message language with the shared n-gram identifier"""
+    return language_identifier.detect(message)
 
 def get_language_specific_prompt(language: str) -> str:
     """Get language-specific system prompts - focused only on language matching"""
@@ -337,34 +302,79 @@ def get_smart_fallback_response(message: str) -> str:
     
     return responses.get(language, responses['hinglish'])
 
+def run_deferred_analysis(message: str, email: str):
+    """Full analysis + memory update for turns answered by the crisis fast path"""
+    try:
+        with profiler.request('chat.deferred_analysis'):
+            with profiler.stage('chat.user_lookup'):
+                user = get_user_by_email(email)
+            user_id = str(user['id']) if user else None
+            with profiler.stage('chat.personalizer'):
+                personalizer.generate_personalized_response(message, user_id)
+    except Exception as e:
+        print(f"Deferred analysis error: {e}")
+
 @router.post("/chat", response_model=ChatResponse)
-async def chat_with_ai(chat_message: ChatMessage, email: str = Depends(verify_token)):
+async def chat_with_ai(
+    chat_message: ChatMessage,
+    background_tasks: BackgroundTasks,
+    email: str = Depends(verify_token)
+):
+    with profiler.request('chat'):
+        return await _chat_turn(chat_message, background_tasks, email)
+
+async def _chat_turn(chat_message: ChatMessage, background_tasks: BackgroundTasks, email: str):
+    # Crisis fast path: answer before any DB or LLM work
+    with profiler.stage('chat.crisis_check'):
+        crisis = crisis_detector.check(chat_message.message)
+    if crisis:
+        background_tasks.add_task(run_deferred_analysis, chat_message.message, email)
+        return ChatResponse(
+            response=crisis['response'],
+            status="success",
+            ai_provider="honey_crisis"
+        )
+    
     try:
         # Get user ID
-        user = get_user_by_email(email)
+        with profiler.stage('chat.user_lookup'):
+            user = get_user_by_email(email)
         user_id = str(user['id']) if user else None
         
         # Detect language from user message
-        detected_language = detect_language(chat_message.message)
+        with profiler.stage('chat.language_detection'):
+            detected_language = detect_language(chat_message.message)
         
         # Use advanced personalized response
         try:
-            # Get personalized response with full AI power
-            personalized_result = personalizer.generate_personalized_response(
-                chat_message.message, user_id
-            )
+            # Get personalized response with full AI power. It waits on per-user
+            # threading locks and the DB, so it runs in the threadpool, off the event loop
+            with profiler.stage('chat.personalizer'):
+                personalized_result = await run_in_threadpool(
+                    personalizer.generate_personalized_response, chat_message.message, user_id
+                )
             
             if GEMINI_AVAILABLE and gemini_model:
                 try:
                     # Get language-specific system prompt
                     language_prompt = get_language_specific_prompt(detected_language)
                     
+                    # Relevant past messages instead of a long raw history
+                    related = personalized_result['analysis']['user_context'].get('related_memories') or []
+                    memory_note = ""
+                    if related:
+                        memory_note = "User ne pehle ye bataya tha:\n" + "\n".join(
+                            f"- {memory['snippet']}" for memory in related
+                        )
+                    
                     # Create strict language-matching prompt
                     advanced_prompt = f"""
                     {language_prompt}
                     
                     STRICT LANGUAGE RULE: User ne "{detected_language}" language mein message bheja hai. Aap bhi sirf "{detected_language}" mein reply kariye. Koi mixing nahi karni.
                     
+                    {memory_note}
+                    
                     User Message: "{chat_message.message}"
                     
                     Reply in {detected_language} only. Keep it short (2-3 sentences max).
@@ -373,17 +383,18 @@ async def chat_with_ai(chat_message: ChatMessage, email: str = Depends(verify_to
                     """
                     
                     # Advanced generation config for fine-tuning
-                    response = gemini_model.generate_content(
-                        advanced_prompt,
-                        generation_config={
-                            "temperature": 0.9,  # Higher creativity for natural responses
-                            "top_p": 0.95,      # More diverse vocabulary
-                            "top_k": 50,        # Balanced word selection
-                            "max_output_tokens": 800,  # Longer responses
-                            "candidate_count": 1,
-                            "stop_sequences": ["User:", "Human:"]  # Stop at conversation breaks
-                        }
-                    )
+                    with profiler.stage('chat.gemini'):
+                        response = gemini_model.generate_content(
+                            advanced_prompt,
+                            generation_config={
+                                "temperature": 0.9,  # Higher creativity for natural responses
+                                "top_p": 0.95,      # More diverse vocabulary
+                                "top_k": 50,        # Balanced word selection
+                                "max_output_tokens": 800,  # Longer responses
+                                "candidate_count": 1,
+                                "stop_sequences": ["User:", "Human:"]  # Stop at conversation breaks
+                            }
+                        )
                     
                     if response and response.text:
                         ai_response = response.text.strip()
@@ -417,4 +428,24 @@ async def chat_with_ai(chat_message: ChatMessage, email: str = Depends(verify_to
 
 @router.options("/chat")
 async def chat_options():
-    return {"message": "OK"}
\ No newline at end of file
+    return {"message": "OK"}
+
+@router.get("/debug/analysis-cache")
+async def analysis_cache_stats(email: str = Depends(verify_admin)):
+    """Hit-rate metrics for the shared message analysis cache"""
+    return personalizer.analysis_cache.get_stats()
+
+@router.get("/debug/pipeline-stats")
+async def pipeline_stats(include_traces: bool = True, email: str = Depends(verify_admin)):
+    """p50/p95/p99 per chat pipeline stage plus sampled traces"""
+    stats = profiler.get_stats(include_traces)
+    stats["analysis_cache"] = personalizer.analysis_cache.get_stats()
+    stats["crisis_fast_path"] = crisis_detector.get_stats()
+    stats["user_context_cache"] = user_context_cache.get_stats()
+    stats["semantic_memory"] = semantic_memory.get_stats()
+    return stats
+
+@router.get("/debug/crisis-stats")
+async def crisis_stats(email: str = Depends(verify_admin)):
+    """Fire count and latency histogram of the crisis fast path"""
+    return crisis_detector.get_stats()
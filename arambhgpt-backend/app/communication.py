@@ -6,6 +6,7 @@ import uuid
 from .database import get_db_connection
 from .auth import verify_token, get_user_by_email
 from .models import User
+from .pagination import KeysetPage
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -96,6 +97,10 @@ def init_communication_db():
             FOREIGN KEY (session_id) REFERENCES chat_sessions (id)
         )
     ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_chat_messages_session_timestamp
+        ON chat_messages (session_id, timestamp, id)
+    ''')
     
     # Session participants table
     cursor.execute('''
@@ -222,34 +227,36 @@ async def get_session_messages(
     session_id: str,
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[str] = None,
     email: str = Depends(verify_token)
 ):
     """Get messages for a specific session"""
     try:
         user = get_user_by_email(email)
         user_id = str(user['id'])
+        keyset = KeysetPage(f"session_messages:{session_id}", "timestamp", "id", limit, cursor)
         
         conn = get_db_connection()
-        cursor = conn.cursor()
+        db_cursor = conn.cursor()
         
         # Verify user is participant in session
-        cursor.execute('''
+        db_cursor.execute('''
             SELECT COUNT(*) FROM session_participants 
             WHERE session_id = ? AND user_id = ?
         ''', (session_id, user_id))
         
-        if cursor.fetchone()[0] == 0:
+        if db_cursor.fetchone()[0] == 0:
             raise HTTPException(status_code=403, detail="Access denied to this session")
         
-        # Get messages
-        cursor.execute('''
-            SELECT * FROM chat_messages 
-            WHERE session_id = ? 
-            ORDER BY timestamp DESC 
-            LIMIT ? OFFSET ?
-        ''', (session_id, limit, offset))
+        # Get messages; offset is only honoured for clients not sending a cursor
+        query = f"SELECT * FROM chat_messages WHERE session_id = ?{keyset.where_sql()}{keyset.order_limit_sql()}"
+        params = [session_id] + keyset.params + [keyset.fetch_size]
+        if offset and not cursor:
+            query += " OFFSET ?"
+            params.append(offset)
+        db_cursor.execute(query, params)
         
-        messages = cursor.fetchall()
+        messages, next_cursor = keyset.finish(db_cursor.fetchall())
         conn.close()
         
         return {
@@ -266,9 +273,12 @@ async def get_session_messages(
                 }
                 for msg in messages
             ],
-            "total_count": len(messages)
+            "total_count": len(messages),
+            "next_cursor": next_cursor
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get messages: {str(e)}")
 
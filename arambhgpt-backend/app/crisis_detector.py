@@ -0,0 +1,88 @@
+from typing import Dict, List, Optional
+import re
+import time
+from .language_detector import language_identifier
+from .latency_stats import LatencyHistogram
+
+# Explicit self-harm / suicidal intent phrases gathered from the emotion,
+# NLP, sensitive-topic and template lexicons. Ambiguous words such as
+# 'give up', 'hopeless' or 'cutting' are left to the full pipeline.
+CRISIS_PHRASES = [
+    'suicide', 'suicidal', 'kill myself', 'killing myself', 'end it all',
+    'end my life', 'ending my life', 'no point living', 'no point in living',
+    'want to die', 'wanna die', "can't go on", 'self harm', 'self-harm',
+    'hurting myself', 'hurt myself', 'burning myself', 'self injury',
+    'khudkushi', 'suicide kar', 'marna chahta', 'marna chahti', 'mar jana chahta',
+    'mar jana chahti', 'jeene ka mann nahi', 'jeene ka man nahi', 'khud ko hurt',
+    'khud ko khatam', 'zindagi khatam',
+    'आत्महत्या', 'खुदकुशी', 'मरना चाहता', 'मरना चाहती', 'जीने का मन नहीं',
+    'खुद को नुकसान', 'अपने आप को काटना', 'जिंदगी खत्म'
+]
+
+HELPLINES = [
+    {'name': 'National Suicide Prevention Helpline', 'number': '9152987821', 'available': '24/7'},
+    {'name': 'Vandrevala Foundation', 'number': '9999666555', 'available': '24/7'},
+    {'name': 'NIMHANS Helpline', 'number': '080-46110007', 'available': 'Mon-Sat 9AM-5PM'}
+]
+
+HELPLINE_HEADERS = {
+    'hindi': "🆘 तुरंत मदद के लिए:",
+    'hinglish': "🆘 Abhi help ke liye:",
+    'english': "🆘 Reach out right now:"
+}
+
+
+def _compile_phrases(phrases: List[str]):
+    """One alternation regex; the shared word-boundary group keeps it fast"""
+    latin, devanagari = [], []
+    for phrase in sorted(phrases, key=len, reverse=True):
+        if phrase[0].isascii():
+            latin.append(re.escape(phrase).replace("'", "'?"))
+        else:
+            devanagari.append(re.escape(phrase))
+    return re.compile(rf"\b(?:{'|'.join(latin)})\b|{'|'.join(devanagari)}")
+
+
+class CrisisDetector:
+    """First-stage crisis detector that runs before any DB or LLM work"""
+
+    def __init__(self, crisis_templates: Dict[str, List[str]]):
+        self.crisis_templates = crisis_templates
+        self.pattern = _compile_phrases(CRISIS_PHRASES)
+        self.latency = LatencyHistogram()
+        self.checks = 0
+        self.fired = 0
+
+    def check(self, message: str) -> Optional[Dict]:
+        """Return a crisis response if the message shows crisis intent, else None"""
+        start = time.perf_counter()
+        match = self.pattern.search(message.lower().replace('’', "'"))
+        result = self._build_response(message, match.group(0)) if match else None
+        self.latency.record(time.perf_counter() - start)
+
+        self.checks += 1
+        if result:
+            self.fired += 1
+        return result
+
+    def _build_response(self, message: str, matched: str) -> Dict:
+        language = language_identifier.detect(message)
+        templates = self.crisis_templates.get(language, self.crisis_templates['english'])
+        helplines = "\n".join(
+            f"• {helpline['name']}: {helpline['number']} ({helpline['available']})"
+            for helpline in HELPLINES
+        )
+        return {
+            'response': f"{templates[0]}\n\n{HELPLINE_HEADERS[language]}\n{helplines}",
+            'language': language,
+            'matched': matched,
+            'helplines': HELPLINES
+        }
+
+    def get_stats(self) -> Dict:
+        """Fire rate and latency histogram summary"""
+        return {
+            "checks": self.checks,
+            "fired": self.fired,
+            "latency": self.latency.summary()
+        }
@@ -3,12 +3,16 @@ import os
 from datetime import datetime
 from pathlib import Path
 
-# SQLite database path
-DATABASE_PATH = Path(__file__).parent.parent / "arambhgpt.db"
+# SQLite database path (DATABASE_PATH env var lets tools use a scratch DB)
+DATABASE_PATH = Path(os.getenv("DATABASE_PATH", Path(__file__).parent.parent / "arambhgpt.db"))
 
-def get_db_connection():
-    """Get SQLite database connection with optimizations"""
-    conn = sqlite3.connect(str(DATABASE_PATH), timeout=5.0)
+def get_db_connection(check_same_thread: bool = True):
+    """Get SQLite database connection with optimizations.
+
+    Pass check_same_thread=False when one connection is used from several
+    threads in turn, e.g. a streaming response stepped through the threadpool.
+    """
+    conn = sqlite3.connect(str(DATABASE_PATH), timeout=5.0, check_same_thread=check_same_thread)
     conn.row_factory = sqlite3.Row  # Enable dict-like access to rows
     
     # Performance optimizations
@@ -50,6 +54,9 @@ def init_database():
                 is_archived BOOLEAN DEFAULT FALSE,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                message_count INTEGER DEFAULT 0,
+                last_message_preview TEXT,
+                last_message_at TIMESTAMP,
                 FOREIGN KEY (user_id) REFERENCES users (id)
             )
         ''')
@@ -63,10 +70,14 @@ def init_database():
                 sender TEXT NOT NULL,
                 ai_provider TEXT,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                client_message_id TEXT,
                 FOREIGN KEY (conversation_id) REFERENCES conversations (id)
             )
         ''')
         
+        init_conversation_counters(cursor)
+        init_message_idempotency(cursor)
+        
         conn.commit()
         conn.close()
         print("✅ SQLite database initialized successfully!")
@@ -74,5 +85,97 @@ def init_database():
     except Exception as e:
         print(f"❌ Database initialization error: {e}")
 
+def init_conversation_counters(cursor):
+    """Keep message_count / last_message_* on conversations current via triggers"""
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(conversations)")}
+    missing = [
+        (name, definition) for name, definition in (
+            ("message_count", "INTEGER DEFAULT 0"),
+            ("last_message_preview", "TEXT"),
+            ("last_message_at", "TIMESTAMP")
+        ) if name not in columns
+    ]
+    for name, definition in missing:
+        cursor.execute(f"ALTER TABLE conversations ADD COLUMN {name} {definition}")
+    
+    # (user_id, updated_at, id) also serves keyset pagination
+    cursor.execute("DROP INDEX IF EXISTS idx_conversations_user_updated")
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_conversations_user_updated_id
+        ON conversations (user_id, updated_at, id)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_messages_conversation_created
+        ON messages (conversation_id, created_at, id)
+    ''')
+    # Rowid order within a conversation, for "since message id" sync
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_messages_conversation_id
+        ON messages (conversation_id, id)
+    ''')
+    
+    # A backdated insert (offline sync) must not replace a newer latest message;
+    # ties go to the new row, matching the delete trigger's (created_at, id) order.
+    # Recreated so databases with the earlier definition pick this one up.
+    cursor.execute("DROP TRIGGER IF EXISTS messages_insert_counters")
+    cursor.execute('''
+        CREATE TRIGGER messages_insert_counters
+        AFTER INSERT ON messages
+        BEGIN
+            UPDATE conversations SET
+                message_count = message_count + 1,
+                last_message_preview = CASE
+                    WHEN last_message_at IS NULL OR NEW.created_at >= last_message_at
+                    THEN substr(NEW.content, 1, 200) ELSE last_message_preview END,
+                last_message_at = CASE
+                    WHEN last_message_at IS NULL OR NEW.created_at >= last_message_at
+                    THEN NEW.created_at ELSE last_message_at END,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = NEW.conversation_id;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS messages_delete_counters
+        AFTER DELETE ON messages
+        BEGIN
+            UPDATE conversations SET
+                message_count = message_count - 1,
+                last_message_preview = (
+                    SELECT substr(content, 1, 200) FROM messages
+                    WHERE conversation_id = OLD.conversation_id
+                    ORDER BY created_at DESC, id DESC LIMIT 1
+                ),
+                last_message_at = (
+                    SELECT MAX(created_at) FROM messages
+                    WHERE conversation_id = OLD.conversation_id
+                )
+            WHERE id = OLD.conversation_id;
+        END
+    ''')
+    
+    # One-time backfill when the columns were just added
+    if missing:
+        cursor.execute('''
+            UPDATE conversations SET
+                message_count = (SELECT COUNT(*) FROM messages WHERE conversation_id = conversations.id),
+                last_message_preview = (
+                    SELECT substr(content, 1, 200) FROM messages
+                    WHERE conversation_id = conversations.id
+                    ORDER BY created_at DESC, id DESC LIMIT 1
+                ),
+                last_message_at = (SELECT MAX(created_at) FROM messages WHERE conversation_id = conversations.id)
+        ''')
+
+def init_message_idempotency(cursor):
+    """Client-supplied message ids make retried uploads safe to replay"""
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(messages)")}
+    if "client_message_id" not in columns:
+        cursor.execute("ALTER TABLE messages ADD COLUMN client_message_id TEXT")
+    cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_messages_client_id
+        ON messages (conversation_id, client_message_id)
+        WHERE client_message_id IS NOT NULL
+    ''')
+
 # Initialize database on import
 init_database()
\ No newline at end of file
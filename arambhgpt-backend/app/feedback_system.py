@@ -77,8 +77,9 @@ class FeedbackAnalyzer:
         
         return patterns
 
+# Plain def: update_user_personality takes a per-user threading lock, so this runs in the threadpool
 @router.post("/submit")
-async def submit_feedback(
+def submit_feedback(
     feedback_data: Dict,
     email: str = Depends(verify_token)
 ):
@@ -7,6 +7,7 @@ import shutil
 from pathlib import Path
 from .auth import verify_token, get_user_by_email
 from .database import get_db_connection
+from .pagination import KeysetPage
 
 router = APIRouter()
 
@@ -92,6 +93,10 @@ async def upload_chat_file(
                 FOREIGN KEY (user_id) REFERENCES users (id)
             )
         ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_chat_files_user_upload
+            ON chat_files (user_id, upload_time, id)
+        ''')
         
         cursor.execute(
             """INSERT INTO chat_files 
@@ -206,15 +211,17 @@ async def get_user_files(
     session_id: Optional[str] = None,
     file_type: Optional[str] = None,
     limit: int = 50,
+    cursor: Optional[str] = None,
     email: str = Depends(verify_token)
 ):
     """Get user's uploaded files"""
     
     user = get_user_by_email(email)
     user_id = user['id']
+    keyset = KeysetPage(f"user_files:{user_id}", "upload_time", "id", limit, cursor)
     
     conn = get_db_connection()
-    cursor = conn.cursor()
+    db_cursor = conn.cursor()
     
     # Build query
     query = "SELECT * FROM chat_files WHERE user_id = ?"
@@ -228,11 +235,11 @@ async def get_user_files(
         query += " AND file_type = ?"
         params.append(file_type)
     
-    query += " ORDER BY upload_time DESC LIMIT ?"
-    params.append(limit)
+    query += keyset.where_sql() + keyset.order_limit_sql()
+    params.extend(keyset.params + [keyset.fetch_size])
     
-    cursor.execute(query, params)
-    files = cursor.fetchall()
+    db_cursor.execute(query, params)
+    files, next_cursor = keyset.finish(db_cursor.fetchall())
     conn.close()
     
     result = []
@@ -250,7 +257,8 @@ async def get_user_files(
     
     return {
         "files": result,
-        "total_count": len(result)
+        "total_count": len(result),
+        "next_cursor": next_cursor
     }
 
 @router.delete("/files/{file_id}")
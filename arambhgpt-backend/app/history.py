@@ -1,23 +1,60 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Request, Response
+from fastapi.responses import StreamingResponse, FileResponse
 from typing import Optional, List
-from datetime import datetime
+from datetime import datetime, timezone
 from .database import get_db_connection
 from .auth import verify_token, get_user_by_email
+from .pagination import KeysetPage, encode_cursor, MAX_PAGE_SIZE
+from .search_index import rank_conversations, highlight_conversations
+from .activity_rollups import get_activity_stats
+from .resource_versions import conditional_get
+from .history_export import (
+    EXPORT_FORMATS, normalize_format, parse_conversation_ids, export_filename,
+    generate_export, create_export_job, run_export_job, get_export_job,
+    export_file_path, create_download_token, verify_download_token
+)
 from .models import (
     ConversationCreate, ConversationDetail, ConversationSummary, 
     ConversationListResponse, ConversationUpdateRequest,
-    MessageCreate, MessageDetail, SearchRequest, SearchResponse,
+    MessageCreate, MessageDetail, BulkMessageRequest, SearchRequest, SearchResponse,
     SearchResult, ConversationStats, ExportRequest
 )
 
 router = APIRouter()
 
+# Also keeps IN (...) lists far below SQLite's bound-parameter limit
+MAX_BULK_MESSAGES = 1000
+
 def get_user_id_from_email(email: str) -> int:
     user = get_user_by_email(email)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user['id']
 
+def _conversation_summary(conv) -> dict:
+    """Conversation list item from a conversations row"""
+    created_at = conv['created_at'] or datetime.now().isoformat()
+    updated_at = conv['updated_at'] or datetime.now().isoformat()
+    return {
+        "id": str(conv['id']),
+        "title": conv['title'] or "New Conversation",
+        "created_at": created_at,
+        "updated_at": updated_at,
+        "message_count": conv['message_count'] or 0,
+        "last_message_preview": conv['last_message_preview'] or "",
+        "last_message_timestamp": conv['last_message_at'] or created_at,
+        "is_archived": bool(conv['is_archived'])
+    }
+
+def _message_detail(msg) -> dict:
+    return {
+        "id": str(msg['id']),
+        "content": msg['content'],
+        "sender": msg['sender'],
+        "ai_provider": msg['ai_provider'] or "honey",
+        "created_at": msg['created_at']
+    }
+
 @router.post("/api/history/conversations")
 async def create_conversation(
     conversation: ConversationCreate,
@@ -49,90 +86,77 @@ async def create_conversation(
 
 @router.get("/api/history/conversations")
 async def get_conversations(
+    request: Request,
+    response: Response,
     page: int = 1,
     limit: int = 20,
     archived: Optional[bool] = None,
     search: Optional[str] = None,
+    cursor: Optional[str] = None,
+    updated_since: Optional[str] = None,
     email: str = Depends(verify_token)
 ):
+    """Conversations by most recent activity (updated_at, then id, descending).
+
+    Pages follow activity, so they are not a frozen snapshot. A conversation
+    that gets a message while a client walks the cursor moves above the
+    cursor: it is not repeated on later pages, but it is missing from this
+    walk. Clients keep the first page's newest updated_at and re-request
+    with updated_since to pick up what moved. page/offset paging can also
+    repeat rows under writes.
+    """
     try:
         user_id = get_user_id_from_email(email)
+        not_modified = conditional_get(request, response, user_id, "history")
+        if not_modified:
+            return not_modified
         
         conn = get_db_connection()
-        cursor = conn.cursor()
+        db_cursor = conn.cursor()
         
-        # Build query
-        query = """
-            SELECT c.id, c.title, c.created_at, c.updated_at, c.is_archived
-            FROM conversations c
-            WHERE c.user_id = ?
-        """
-        params = [user_id]
+        # Build filter
+        where = "user_id = ?"
+        filter_params = [user_id]
         
         if archived is not None:
-            query += " AND c.is_archived = ?"
-            params.append(archived)
+            where += " AND is_archived = ?"
+            filter_params.append(archived)
         
         if search:
-            query += " AND c.title LIKE ?"
-            params.append(f"%{search}%")
-        
-        query += " ORDER BY c.updated_at DESC"
+            where += " AND title LIKE ?"
+            filter_params.append(f"%{search}%")
         
-        # Add pagination
-        offset = (page - 1) * limit
-        query += " LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
+        if updated_since:
+            where += " AND updated_at > ?"
+            filter_params.append(updated_since)
         
-        cursor.execute(query, params)
-        conversations = cursor.fetchall()
-        
-        # Get message counts and build response
-        conversation_list = []
-        for conv in conversations:
-            # Get message count for this conversation
-            cursor.execute(
-                "SELECT COUNT(*) FROM messages WHERE conversation_id = ?",
-                (conv['id'],)
-            )
-            message_count = cursor.fetchone()[0]
-            
-            # Get last message
-            cursor.execute(
-                "SELECT content, created_at FROM messages WHERE conversation_id = ? ORDER BY created_at DESC LIMIT 1",
-                (conv['id'],)
-            )
-            last_message = cursor.fetchone()
-            
-            # Handle timestamps
-            created_at = conv['created_at'] or datetime.now().isoformat()
-            updated_at = conv['updated_at'] or datetime.now().isoformat()
-            last_timestamp = last_message['created_at'] if last_message else created_at
-            
-            conversation_list.append({
-                "id": str(conv['id']),
-                "title": conv['title'] or "New Conversation",
-                "created_at": created_at,
-                "updated_at": updated_at,
-                "message_count": message_count or 0,
-                "last_message_preview": last_message['content'] if last_message else "",
-                "last_message_timestamp": last_timestamp,
-                "is_archived": bool(conv['is_archived'])
-            })
+        # One indexed query: counters and the last message live on the conversation
+        # row, and the uncorrelated total subquery is evaluated once. A cursor
+        # continues after the last row seen; page/offset is kept for old clients.
+        keyset = KeysetPage(f"conversations:{user_id}", "updated_at", "id", limit, cursor)
+        query = f"""
+            SELECT id, title, created_at, updated_at, is_archived,
+                   message_count, last_message_preview, last_message_at,
+                   (SELECT COUNT(*) FROM conversations WHERE {where}) AS total_count
+            FROM conversations
+            WHERE {where}{keyset.where_sql()}{keyset.order_limit_sql()}
+        """
+        params = filter_params + filter_params + keyset.params + [keyset.fetch_size]
+        if not cursor and page > 1:
+            query += " OFFSET ?"
+            params.append((page - 1) * keyset.limit)
         
-        # Get total count
-        count_query = "SELECT COUNT(*) FROM conversations WHERE user_id = ?"
-        count_params = [user_id]
+        db_cursor.execute(query, params)
+        conversations, next_cursor = keyset.finish(db_cursor.fetchall())
         
-        if archived is not None:
-            count_query += " AND is_archived = ?"
-            count_params.append(archived)
-        if search:
-            count_query += " AND title LIKE ?"
-            count_params.append(f"%{search}%")
+        conversation_list = [_conversation_summary(conv) for conv in conversations]
         
-        cursor.execute(count_query, count_params)
-        total_count = cursor.fetchone()[0]
+        if conversations:
+            total_count = conversations[0]['total_count']
+        else:
+            # Past the last page there is no row to carry the total
+            db_cursor.execute(f"SELECT COUNT(*) FROM conversations WHERE {where}", filter_params)
+            total_count = db_cursor.fetchone()[0]
         
         conn.close()
         
@@ -140,21 +164,39 @@ async def get_conversations(
             "conversations": conversation_list,
             "total_count": total_count,
             "page": page,
-            "limit": limit,
-            "has_more": (page * limit) < total_count
+            "limit": keyset.limit,
+            "has_more": next_cursor is not None,
+            "next_cursor": next_cursor
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in get_conversations: {e}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 @router.get("/api/history/conversations/{conversation_id}")
 async def get_conversation_detail(
+    request: Request,
+    response: Response,
     conversation_id: str,
+    limit: int = 50,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
     email: str = Depends(verify_token)
 ):
+    """Conversation metadata plus one window of messages, newest window by default"""
     try:
         user_id = get_user_id_from_email(email)
+        if before and after:
+            raise HTTPException(status_code=400, detail="Use either before or after, not both")
+        not_modified = conditional_get(request, response, user_id, "history")
+        if not_modified:
+            return not_modified
+        
+        scope = f"messages:{conversation_id}"
+        # Newest/before windows walk backwards from the cursor, after windows forwards
+        keyset = KeysetPage(scope, "created_at", "id", limit, after or before, descending=not after)
         
         conn = get_db_connection()
         cursor = conn.cursor()
@@ -170,33 +212,32 @@ async def get_conversation_detail(
             conn.close()
             raise HTTPException(status_code=404, detail="Conversation not found")
         
-        # Get messages
         cursor.execute(
-            "SELECT * FROM messages WHERE conversation_id = ? ORDER BY created_at ASC",
-            (int(conversation_id),)
+            f"SELECT * FROM messages WHERE conversation_id = ?{keyset.where_sql()}{keyset.order_limit_sql()}",
+            [int(conversation_id)] + keyset.params + [keyset.fetch_size]
         )
-        messages = cursor.fetchall()
+        messages, more_cursor = keyset.finish(cursor.fetchall())
         
         conn.close()
         
-        message_list = []
-        for msg in messages:
-            message_list.append({
-                "id": str(msg['id']),
-                "content": msg['content'],
-                "sender": msg['sender'],
-                "ai_provider": msg['ai_provider'] or "honey",
-                "created_at": msg['created_at']
-            })
+        # Messages are always returned oldest first
+        if not after:
+            messages = list(reversed(messages))
+        has_older = bool(more_cursor) if not after else bool(messages)
+        has_newer = bool(more_cursor) if after else bool(before and messages)
         
         return {
             "id": str(conversation['id']),
             "title": conversation['title'],
             "created_at": conversation['created_at'],
             "updated_at": conversation['updated_at'],
-            "messages": message_list,
+            "messages": [_message_detail(msg) for msg in messages],
             "is_archived": bool(conversation['is_archived']),
-            "message_count": len(message_list)
+            "message_count": conversation['message_count'] or 0,
+            "has_older": has_older,
+            "has_newer": has_newer,
+            "before_cursor": encode_cursor(scope, messages[0]['created_at'], messages[0]['id']) if has_older else None,
+            "after_cursor": encode_cursor(scope, messages[-1]['created_at'], messages[-1]['id']) if has_newer else None
         }
         
     except HTTPException:
@@ -205,6 +246,57 @@ async def get_conversation_detail(
         print(f"Error in get_conversation_detail: {e}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+@router.get("/api/history/conversations/{conversation_id}/messages")
+async def get_messages_since(
+    request: Request,
+    response: Response,
+    conversation_id: str,
+    since_id: int = 0,
+    limit: int = 100,
+    email: str = Depends(verify_token)
+):
+    """Messages added after since_id, for incremental sync of an open thread"""
+    user_id = get_user_id_from_email(email)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    not_modified = conditional_get(request, response, user_id, "history")
+    if not_modified:
+        return not_modified
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute(
+        "SELECT message_count, updated_at FROM conversations WHERE id = ? AND user_id = ?",
+        (int(conversation_id), user_id)
+    )
+    conversation = cursor.fetchone()
+    if not conversation:
+        conn.close()
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    
+    # Ids follow insertion order, so nothing added after since_id is missed,
+    # even a backdated import whose created_at sorts before the anchor
+    cursor.execute('''
+        SELECT * FROM messages
+        WHERE conversation_id = ? AND id > ?
+        ORDER BY id
+        LIMIT ?
+    ''', (int(conversation_id), since_id, limit + 1))
+    messages = cursor.fetchall()
+    conn.close()
+    
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    
+    return {
+        "conversation_id": conversation_id,
+        "messages": [_message_detail(msg) for msg in messages],
+        "latest_id": str(messages[-1]['id']) if messages else str(since_id),
+        "has_more": has_more,
+        "message_count": conversation['message_count'] or 0,
+        "updated_at": conversation['updated_at']
+    }
+
 @router.post("/api/history/conversations/{conversation_id}/messages")
 async def add_message_to_conversation(
     conversation_id: int,
@@ -233,12 +325,7 @@ async def add_message_to_conversation(
     )
     message_id = cursor.lastrowid
     
-    # Update conversation timestamp
-    cursor.execute(
-        "UPDATE conversations SET updated_at = CURRENT_TIMESTAMP WHERE id = ?",
-        (conversation_id,)
-    )
-    
+    # messages_insert_counters bumps updated_at, message_count and the preview
     conn.commit()
     conn.close()
     
@@ -250,6 +337,118 @@ async def add_message_to_conversation(
         "created_at": datetime.now().isoformat()
     }
 
+def _sqlite_timestamp(value: Optional[datetime]) -> Optional[str]:
+    """UTC 'YYYY-MM-DD HH:MM:SS', the format CURRENT_TIMESTAMP writes"""
+    if value is None:
+        return None
+    if value.tzinfo:
+        value = value.astimezone(timezone.utc)
+    return value.strftime('%Y-%m-%d %H:%M:%S')
+
+@router.post("/api/history/messages/bulk")
+async def add_messages_bulk(
+    bulk_request: BulkMessageRequest,
+    email: str = Depends(verify_token)
+):
+    """Append many messages, possibly across conversations, in one transaction.
+
+    Messages carrying a client_message_id already stored for that
+    conversation (or repeated within the batch) are reported as duplicates
+    instead of inserted again, so a client can safely retry a whole batch.
+    """
+    user_id = get_user_id_from_email(email)
+    items = bulk_request.messages
+    if not items:
+        raise HTTPException(status_code=400, detail="No messages to add")
+    if len(items) > MAX_BULK_MESSAGES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_MESSAGES} messages per request")
+    try:
+        conversation_ids = [int(item.conversation_id) for item in items]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid conversation id")
+    distinct_ids = sorted(set(conversation_ids))
+    
+    placeholders = ",".join("?" for _ in distinct_ids)
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    try:
+        # Take the write lock up front so a concurrent retry cannot slip in
+        # between the duplicate check and the insert
+        cursor.execute("BEGIN IMMEDIATE")
+        
+        # Ownership is checked once per conversation, not once per message
+        cursor.execute(
+            f"SELECT id FROM conversations WHERE user_id = ? AND id IN ({placeholders})",
+            [user_id] + distinct_ids
+        )
+        owned = {row['id'] for row in cursor.fetchall()}
+        missing = [str(conversation_id) for conversation_id in distinct_ids if conversation_id not in owned]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Conversations not found: {', '.join(missing)}")
+        
+        keys = sorted({item.client_message_id for item in items if item.client_message_id})
+        
+        def stored_keys():
+            if not keys:
+                return {}
+            cursor.execute(f'''
+                SELECT id, conversation_id, client_message_id FROM messages
+                WHERE conversation_id IN ({placeholders})
+                  AND client_message_id IN ({",".join("?" for _ in keys)})
+            ''', distinct_ids + keys)
+            return {(row['conversation_id'], row['client_message_id']): row['id'] for row in cursor.fetchall()}
+        
+        # Keys stored by an earlier attempt, or repeated within this batch, are
+        # skipped and reported with the id already stored for them
+        stored = stored_keys()
+        inserted = 0
+        results = []
+        for conversation_id, item in zip(conversation_ids, items):
+            key = (conversation_id, item.client_message_id)
+            if item.client_message_id and key in stored:
+                results.append((stored[key], "duplicate"))
+                continue
+            # Triggers keep counters, search index and activity rollups current per row
+            cursor.execute('''
+                INSERT INTO messages (conversation_id, content, sender, ai_provider, created_at, client_message_id)
+                VALUES (?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP), ?)
+            ''', (conversation_id, item.content, item.sender, item.ai_provider,
+                  _sqlite_timestamp(item.created_at), item.client_message_id))
+            inserted += 1
+            if item.client_message_id:
+                stored[key] = cursor.lastrowid
+            results.append((cursor.lastrowid, "created"))
+        
+        cursor.execute(
+            f"SELECT id, message_count, updated_at FROM conversations WHERE id IN ({placeholders})",
+            distinct_ids
+        )
+        conversations = {
+            str(row['id']): {"message_count": row['message_count'], "updated_at": row['updated_at']}
+            for row in cursor.fetchall()
+        }
+        
+        conn.commit()
+    finally:
+        conn.close()
+    
+    return {
+        "inserted": inserted,
+        "duplicates": len(items) - inserted,
+        "results": [
+            {
+                "conversation_id": str(conversation_id),
+                "client_message_id": item.client_message_id,
+                "id": str(message_id),
+                "status": status
+            }
+            for conversation_id, item, (message_id, status) in zip(conversation_ids, items, results)
+        ],
+        "conversations": conversations
+    }
+
 @router.put("/api/history/conversations/{conversation_id}")
 async def update_conversation(
     conversation_id: str,
@@ -330,90 +529,97 @@ async def search_conversations(
     conn = get_db_connection()
     cursor = conn.cursor()
     
-    # Simple search implementation
-    search_term = f"%{search_request.query}%"
     offset = (search_request.page - 1) * search_request.limit
     
-    query = """
-        SELECT c.*, 
-               (SELECT COUNT(*) FROM messages WHERE conversation_id = c.id) as message_count,
-               (SELECT MAX(created_at) FROM messages WHERE conversation_id = c.id) as last_message_time,
-               (SELECT content FROM messages WHERE conversation_id = c.id ORDER BY created_at DESC LIMIT 1) as last_message
-        FROM conversations c
-        WHERE c.user_id = ? AND (c.title LIKE ? OR EXISTS (
-            SELECT 1 FROM messages WHERE conversation_id = c.id AND content LIKE ?
-        ))
-        ORDER BY c.updated_at DESC
-        LIMIT ? OFFSET ?
-    """
-    
-    cursor.execute(query, (user_id, search_term, search_term, search_request.limit, offset))
-    results = cursor.fetchall()
+    found = rank_conversations(cursor, user_id, search_request.query, search_request.limit, offset)
+    results = found["rows"]
+    highlights = highlight_conversations(
+        cursor, user_id, search_request.query, [result['id'] for result in results]
+    )
     
     conn.close()
     
     search_results = []
     for result in results:
-        conversation = {
-            "id": str(result['id']),
-            "title": result['title'],
-            "created_at": result['created_at'],
-            "updated_at": result['updated_at'],
-            "message_count": result['message_count'] or 0,
-            "last_message_preview": result['last_message'] or "",
-            "last_message_timestamp": result['last_message_time'] if result['last_message_time'] else result['created_at'],
-            "is_archived": bool(result['is_archived'])
-        }
+        conversation = _conversation_summary(result)
+        conversation["title"] = result['title']
         
         search_results.append({
             "conversation": conversation,
-            "highlights": [search_request.query],
-            "relevance_score": 1.0
+            "highlights": highlights[result['id']],
+            "relevance_score": round(-result['score'], 4)
         })
     
     return {
         "results": search_results,
-        "total_count": len(search_results),
+        "total_count": found["total_count"],
         "page": search_request.page,
         "limit": search_request.limit,
-        "has_more": len(search_results) == search_request.limit
+        "has_more": offset + len(search_results) < found["total_count"]
     }
 
 @router.get("/api/history/stats")
 async def get_conversation_stats(email: str = Depends(verify_token)):
     user_id = get_user_id_from_email(email)
-    
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Get basic stats
-    cursor.execute("SELECT COUNT(*) FROM conversations WHERE user_id = ?", (user_id,))
-    total_conversations = cursor.fetchone()[0]
-    
-    cursor.execute("""
-        SELECT COUNT(*) FROM messages m 
-        JOIN conversations c ON m.conversation_id = c.id 
-        WHERE c.user_id = ?
-    """, (user_id,))
-    total_messages = cursor.fetchone()[0]
-    
-    conn.close()
-    
-    avg_messages = total_messages / total_conversations if total_conversations > 0 else 0
-    
-    return {
-        "total_conversations": total_conversations,
-        "total_messages": total_messages,
-        "active_days": 1,  # Simplified
-        "average_messages_per_conversation": avg_messages,
-        "most_active_day": "Today",
-        "conversation_frequency": {"today": total_conversations}
-    }
+    return get_activity_stats(user_id)
 
 @router.post("/api/history/export")
 async def export_conversations(
     export_request: ExportRequest,
+    background_tasks: BackgroundTasks,
     email: str = Depends(verify_token)
 ):
-    # Simple export implementation
-    return {"message": "Export feature coming soon!", "format": export_request.options.format}
\ No newline at end of file
+    user_id = get_user_id_from_email(email)
+    export_format = normalize_format(export_request.format)
+    conversation_ids = parse_conversation_ids(export_request.conversation_ids)
+    
+    if export_request.background:
+        job_id = create_export_job(user_id, export_format, conversation_ids, export_request.include_metadata)
+        background_tasks.add_task(run_export_job, job_id)
+        return {
+            "job_id": job_id,
+            "status": "pending",
+            "status_url": f"/api/history/export/jobs/{job_id}"
+        }
+    
+    return StreamingResponse(
+        generate_export(user_id, export_format, conversation_ids, export_request.include_metadata),
+        media_type=EXPORT_FORMATS[export_format][0],
+        headers={"Content-Disposition": f'attachment; filename="{export_filename(export_format)}"'}
+    )
+
+@router.get("/api/history/export/jobs/{job_id}")
+async def get_export_job_status(
+    job_id: str,
+    email: str = Depends(verify_token)
+):
+    user_id = get_user_id_from_email(email)
+    job = get_export_job(job_id, user_id)
+    
+    status = {
+        "job_id": job['id'],
+        "format": job['format'],
+        "status": job['status'],
+        "file_size": job['file_size'],
+        "error": job['error'],
+        "created_at": job['created_at'],
+        "completed_at": job['completed_at']
+    }
+    if job['status'] == 'completed':
+        # A fresh link each time; the file itself supports Range requests for resuming
+        status["download_url"] = f"/api/history/export/jobs/{job_id}/download?token={create_download_token(job_id)}"
+    return status
+
+@router.get("/api/history/export/jobs/{job_id}/download")
+async def download_export(job_id: str, token: str):
+    verify_download_token(job_id, token)
+    job = get_export_job(job_id)
+    path = export_file_path(job_id, job['format'])
+    if job['status'] != 'completed' or not path.exists():
+        raise HTTPException(status_code=404, detail="Export file not available")
+    
+    return FileResponse(
+        path,
+        media_type=EXPORT_FORMATS[job['format']][0],
+        filename=export_filename(job['format'])
+    )
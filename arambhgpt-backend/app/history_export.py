@@ -0,0 +1,333 @@
+from fastapi import HTTPException
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+from jose import JWTError, jwt
+import csv
+import io
+import json
+import os
+import uuid
+import zipfile
+from .database import get_db_connection
+from .auth import create_access_token, SECRET_KEY, ALGORITHM
+
+EXPORT_DIR = Path(os.getenv("EXPORT_DIR", "exports"))
+
+# format -> (media type, file extension)
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "jsonl"),
+    "csv": ("text/csv", "csv"),
+    "zip": ("application/zip", "zip"),
+}
+FORMAT_ALIASES = {"json": "ndjson", "jsonl": "ndjson"}
+
+# Bytes buffered before a chunk is handed to the response or file
+CHUNK_SIZE = 64 * 1024
+DOWNLOAD_LINK_HOURS = 24
+# Finished files outlive their first link so a fresh link can resume the download
+EXPORT_RETENTION_HOURS = 48
+
+CSV_COLUMNS = ["conversation_id", "conversation_title", "message_id", "sender", "content", "created_at"]
+CSV_METADATA_COLUMNS = ["ai_provider", "conversation_created_at", "conversation_updated_at", "is_archived"]
+
+
+def init_export_tables():
+    """Initialize background export jobs"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS export_jobs (
+            id TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            format TEXT NOT NULL,
+            conversation_ids TEXT,
+            include_metadata BOOLEAN DEFAULT TRUE,
+            status TEXT DEFAULT 'pending',
+            file_size INTEGER,
+            error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            completed_at TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_export_jobs_user ON export_jobs (user_id, created_at)")
+    # Walks a user's conversations in id order, so the export query needs no sort
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_conversations_user ON conversations (user_id)")
+
+    conn.commit()
+    conn.close()
+
+
+def normalize_format(export_format: str) -> str:
+    export_format = FORMAT_ALIASES.get(export_format.lower(), export_format.lower())
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported export format; use one of {', '.join(EXPORT_FORMATS)}"
+        )
+    return export_format
+
+
+def parse_conversation_ids(conversation_ids: List[str]) -> List[int]:
+    try:
+        return [int(conversation_id) for conversation_id in conversation_ids]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid conversation id")
+
+
+def export_filename(export_format: str) -> str:
+    return f"arambhgpt-conversations-{datetime.now().strftime('%Y%m%d')}.{EXPORT_FORMATS[export_format][1]}"
+
+
+class _ChunkBuffer(io.RawIOBase):
+    """Write-only, unseekable sink that the generators drain in chunks"""
+
+    def __init__(self):
+        super().__init__()
+        self.data = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, chunk):
+        self.data += chunk
+        return len(chunk)
+
+    def drain(self) -> bytes:
+        chunk = bytes(self.data)
+        self.data.clear()
+        return chunk
+
+
+def _iter_export_rows(user_id: int, conversation_ids: List[int]):
+    """Conversation + message rows in conversation, then message order, fetched lazily"""
+    # The connection is stepped from whichever threadpool thread runs the next chunk
+    conn = get_db_connection(check_same_thread=False)
+    try:
+        cursor = conn.cursor()
+        query = '''
+            SELECT c.id AS conversation_id, c.title, c.created_at AS conversation_created_at,
+                   c.updated_at AS conversation_updated_at, c.is_archived, c.message_count,
+                   m.id AS message_id, m.sender, m.content, m.ai_provider, m.created_at
+            FROM conversations c
+            LEFT JOIN messages m ON m.conversation_id = c.id
+            WHERE c.user_id = ?
+        '''
+        params: List = [user_id]
+        if conversation_ids:
+            query += f" AND c.id IN ({','.join('?' for _ in conversation_ids)})"
+            params.extend(conversation_ids)
+        query += " ORDER BY c.id, m.created_at, m.id"
+        cursor.execute(query, params)
+        for row in cursor:
+            yield row
+    finally:
+        conn.close()
+
+
+def _conversation_record(row, include_metadata: bool) -> Dict:
+    record = {"id": str(row['conversation_id']), "title": row['title'] or "New Conversation"}
+    if include_metadata:
+        record.update({
+            "created_at": row['conversation_created_at'],
+            "updated_at": row['conversation_updated_at'],
+            "is_archived": bool(row['is_archived']),
+            "message_count": row['message_count'] or 0
+        })
+    return record
+
+
+def _message_record(row, include_metadata: bool) -> Dict:
+    record = {
+        "id": str(row['message_id']),
+        "sender": row['sender'],
+        "content": row['content'],
+        "created_at": row['created_at']
+    }
+    if include_metadata:
+        record["ai_provider"] = row['ai_provider']
+    return record
+
+
+def _ndjson_chunks(rows, include_metadata: bool) -> Iterator[bytes]:
+    """One line per conversation followed by one line per message"""
+    buffer = bytearray()
+    current = None
+    for row in rows:
+        if row['conversation_id'] != current:
+            current = row['conversation_id']
+            record = {"type": "conversation", **_conversation_record(row, include_metadata)}
+            buffer += json.dumps(record, ensure_ascii=False).encode() + b"\n"
+        if row['message_id'] is not None:
+            record = {"type": "message", "conversation_id": str(current), **_message_record(row, include_metadata)}
+            buffer += json.dumps(record, ensure_ascii=False).encode() + b"\n"
+        if len(buffer) >= CHUNK_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+def _csv_chunks(rows, include_metadata: bool) -> Iterator[bytes]:
+    """One row per message; conversations without messages get one empty row"""
+    text = io.StringIO()
+    writer = csv.writer(text)
+    # BOM so Excel opens Devanagari text as UTF-8
+    text.write("\ufeff")
+    writer.writerow(CSV_COLUMNS + (CSV_METADATA_COLUMNS if include_metadata else []))
+    for row in rows:
+        values = [row['conversation_id'], row['title'] or "", row['message_id'] or "",
+                  row['sender'] or "", row['content'] or "", row['created_at'] or ""]
+        if include_metadata:
+            values += [row['ai_provider'] or "", row['conversation_created_at'],
+                       row['conversation_updated_at'], bool(row['is_archived'])]
+        writer.writerow(values)
+        if text.tell() >= CHUNK_SIZE:
+            yield text.getvalue().encode()
+            text.seek(0)
+            text.truncate()
+    if text.tell():
+        yield text.getvalue().encode()
+
+
+def _zip_chunks(rows, include_metadata: bool) -> Iterator[bytes]:
+    """A ZIP with one JSON document per conversation, written member by member"""
+    sink = _ChunkBuffer()
+    # An unseekable sink makes zipfile write data descriptors instead of seeking back
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        member = None
+        current = None
+        first_message = True
+        for row in rows:
+            if row['conversation_id'] != current:
+                if member:
+                    member.write(b"]}")
+                    member.close()
+                current = row['conversation_id']
+                member = archive.open(f"conversations/{current}.json", "w", force_zip64=True)
+                header = json.dumps(_conversation_record(row, include_metadata), ensure_ascii=False)
+                member.write(header[:-1].encode() + b', "messages": [')
+                first_message = True
+            if row['message_id'] is not None:
+                if not first_message:
+                    member.write(b",")
+                member.write(json.dumps(_message_record(row, include_metadata), ensure_ascii=False).encode())
+                first_message = False
+            if len(sink.data) >= CHUNK_SIZE:
+                yield sink.drain()
+        if member:
+            member.write(b"]}")
+            member.close()
+    yield sink.drain()
+
+
+def generate_export(user_id: int, export_format: str, conversation_ids: List[int],
+                    include_metadata: bool = True) -> Iterator[bytes]:
+    """Stream an export in bounded chunks; memory does not grow with history size"""
+    writers = {"ndjson": _ndjson_chunks, "csv": _csv_chunks, "zip": _zip_chunks}
+    return writers[export_format](_iter_export_rows(user_id, conversation_ids), include_metadata)
+
+
+def export_file_path(job_id: str, export_format: str) -> Path:
+    return EXPORT_DIR / f"{job_id}.{EXPORT_FORMATS[export_format][1]}"
+
+
+def create_export_job(user_id: int, export_format: str, conversation_ids: List[int],
+                      include_metadata: bool) -> str:
+    cleanup_expired_exports()
+    job_id = str(uuid.uuid4())
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO export_jobs (id, user_id, format, conversation_ids, include_metadata)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (job_id, user_id, export_format, json.dumps(conversation_ids), include_metadata))
+    conn.commit()
+    conn.close()
+    return job_id
+
+
+def run_export_job(job_id: str):
+    """Write a job's export to disk; runs as a background task"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM export_jobs WHERE id = ?", (job_id,))
+    job = cursor.fetchone()
+    if not job:
+        conn.close()
+        return
+    cursor.execute("UPDATE export_jobs SET status = 'running' WHERE id = ?", (job_id,))
+    conn.commit()
+
+    EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+    path = export_file_path(job_id, job['format'])
+    partial = path.with_suffix(path.suffix + ".part")
+    try:
+        with open(partial, "wb") as output:
+            for chunk in generate_export(job['user_id'], job['format'],
+                                         json.loads(job['conversation_ids'] or "[]"),
+                                         bool(job['include_metadata'])):
+                output.write(chunk)
+        # Only complete files are ever visible under the final name
+        os.replace(partial, path)
+        cursor.execute('''
+            UPDATE export_jobs SET status = 'completed', file_size = ?, completed_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (path.stat().st_size, job_id))
+        print(f"📦 Export {job_id} ready ({path.stat().st_size} bytes)")
+    except Exception as e:
+        partial.unlink(missing_ok=True)
+        cursor.execute("UPDATE export_jobs SET status = 'failed', error = ? WHERE id = ?", (str(e), job_id))
+        print(f"❌ Export {job_id} failed: {e}")
+    conn.commit()
+    conn.close()
+
+
+def get_export_job(job_id: str, user_id: Optional[int] = None):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    if user_id is None:
+        cursor.execute("SELECT * FROM export_jobs WHERE id = ?", (job_id,))
+    else:
+        cursor.execute("SELECT * FROM export_jobs WHERE id = ? AND user_id = ?", (job_id, user_id))
+    job = cursor.fetchone()
+    conn.close()
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return job
+
+
+def create_download_token(job_id: str) -> str:
+    """Link token for one export file. It has no 'sub', so it is not a login token"""
+    return create_access_token({"export_job": job_id}, expires_delta=timedelta(hours=DOWNLOAD_LINK_HOURS))
+
+
+def verify_download_token(job_id: str, token: str):
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise HTTPException(status_code=403, detail="Download link is invalid or expired")
+    if payload.get("export_job") != job_id:
+        raise HTTPException(status_code=403, detail="Download link is invalid or expired")
+
+
+def cleanup_expired_exports():
+    """Delete finished export files and jobs past their retention window"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT id, format FROM export_jobs
+        WHERE created_at < datetime('now', ?)
+    ''', (f"-{EXPORT_RETENTION_HOURS} hours",))
+    expired = cursor.fetchall()
+    for job in expired:
+        export_file_path(job['id'], job['format']).unlink(missing_ok=True)
+    cursor.executemany("DELETE FROM export_jobs WHERE id = ?", [(job['id'],) for job in expired])
+    conn.commit()
+    conn.close()
+
+
+# Initialize tables on import
+init_export_tables()
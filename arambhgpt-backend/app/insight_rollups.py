@@ -0,0 +1,166 @@
+from typing import Dict, Iterable, Optional
+import json
+from .database import get_db_connection
+from .tagging import normalize_tags
+
+# Longest window /ai-learning/user-insights will sum over
+MAX_WINDOW_DAYS = 365
+TOP_TOPICS = 5
+UNKNOWN_EMOTION = 'unknown'
+
+
+def init_rollup_tables():
+    """Initialize per-user daily emotion and topic rollups"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_emotion_daily (
+            user_id TEXT NOT NULL,
+            day DATE NOT NULL,
+            emotion TEXT NOT NULL,
+            count INTEGER DEFAULT 0,
+            PRIMARY KEY (user_id, day, emotion)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_topic_daily (
+            user_id TEXT NOT NULL,
+            day DATE NOT NULL,
+            topic TEXT NOT NULL,
+            count INTEGER DEFAULT 0,
+            PRIMARY KEY (user_id, day, topic)
+        )
+    ''')
+
+    conn.commit()
+    conn.close()
+
+
+def record_interaction(cursor, user_id: str, emotion: Optional[str], topics: Iterable[str]):
+    """Bump today's rollups inside the caller's transaction"""
+    cursor.execute('''
+        INSERT INTO user_emotion_daily (user_id, day, emotion, count)
+        VALUES (?, date('now'), ?, 1)
+        ON CONFLICT(user_id, day, emotion) DO UPDATE SET count = count + 1
+    ''', (user_id, emotion or UNKNOWN_EMOTION))
+
+    normalized = normalize_tags(topics)
+    if normalized:
+        cursor.executemany('''
+            INSERT INTO user_topic_daily (user_id, day, topic, count)
+            VALUES (?, date('now'), ?, 1)
+            ON CONFLICT(user_id, day, topic) DO UPDATE SET count = count + 1
+        ''', [(user_id, topic) for topic in normalized])
+
+
+def get_window_patterns(user_id: str, days: int = 30, top_topics: int = TOP_TOPICS) -> Dict:
+    """Emotion and topic frequencies over the last `days` days, summed from daily rows"""
+    days = max(1, min(days, MAX_WINDOW_DAYS))
+    since = f"-{days} days"
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        SELECT emotion, SUM(count) AS frequency
+        FROM user_emotion_daily
+        WHERE user_id = ? AND day > date('now', ?)
+        GROUP BY emotion
+        ORDER BY frequency DESC
+    ''', (user_id, since))
+    emotion_patterns = [{"emotion": row[0], "frequency": row[1]} for row in cursor.fetchall()]
+
+    cursor.execute('''
+        SELECT topic, SUM(count) AS frequency
+        FROM user_topic_daily
+        WHERE user_id = ? AND day > date('now', ?)
+        GROUP BY topic
+        ORDER BY frequency DESC
+        LIMIT ?
+    ''', (user_id, since, top_topics))
+    # 'topics' keeps the earlier response shape (a JSON-encoded topic list) for
+    # existing clients; each entry now covers a single topic, also given as 'topic'
+    topic_patterns = [
+        {"topics": json.dumps([row[0]]), "topic": row[0], "frequency": row[1]}
+        for row in cursor.fetchall()
+    ]
+
+    conn.close()
+
+    return {"emotion_patterns": emotion_patterns, "topic_patterns": topic_patterns}
+
+
+def backfill_rollups(user_id: Optional[str] = None) -> Dict:
+    """Rebuild rollups from raw conversation_context history.
+
+    Compaction prunes a prefix of each user's history, so every day after
+    the earliest remaining raw day is complete and is rebuilt. The earliest
+    day is only filled in when no rollup exists for it yet.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    if user_id:
+        user_ids = [str(user_id)]
+    else:
+        cursor.execute("SELECT DISTINCT user_id FROM conversation_context")
+        user_ids = [row[0] for row in cursor.fetchall()]
+
+    totals = {'users': 0, 'days': 0}
+    for uid in user_ids:
+        cursor.execute(
+            "SELECT date(MIN(timestamp)) FROM conversation_context WHERE user_id = ?",
+            (uid,)
+        )
+        first_day = cursor.fetchone()[0]
+        if not first_day:
+            continue
+
+        cursor.execute(
+            "SELECT 1 FROM user_emotion_daily WHERE user_id = ? AND day = ? LIMIT 1",
+            (uid, first_day)
+        )
+        if cursor.fetchone():
+            cursor.execute("SELECT date(?, '+1 day')", (first_day,))
+            first_day = cursor.fetchone()[0]
+
+        cursor.execute("DELETE FROM user_emotion_daily WHERE user_id = ? AND day >= ?", (uid, first_day))
+        cursor.execute("DELETE FROM user_topic_daily WHERE user_id = ? AND day >= ?", (uid, first_day))
+
+        cursor.execute('''
+            INSERT INTO user_emotion_daily (user_id, day, emotion, count)
+            SELECT user_id, date(timestamp), COALESCE(emotion_detected, ?), COUNT(*)
+            FROM conversation_context
+            WHERE user_id = ? AND date(timestamp) >= ?
+            GROUP BY date(timestamp), COALESCE(emotion_detected, ?)
+        ''', (UNKNOWN_EMOTION, uid, first_day, UNKNOWN_EMOTION))
+
+        # One count per (row, topic) even if a row repeats a topic
+        cursor.execute('''
+            INSERT INTO user_topic_daily (user_id, day, topic, count)
+            SELECT user_id, day, topic, COUNT(*) FROM (
+                SELECT DISTINCT c.id, c.user_id, date(c.timestamp) AS day,
+                       lower(trim(t.value)) AS topic
+                FROM conversation_context c, json_each(c.topics_discussed) t
+                WHERE c.user_id = ? AND date(c.timestamp) >= ?
+                  AND json_valid(c.topics_discussed) AND trim(t.value) != ''
+            )
+            GROUP BY day, topic
+        ''', (uid, first_day))
+
+        cursor.execute(
+            "SELECT COUNT(DISTINCT day) FROM user_emotion_daily WHERE user_id = ? AND day >= ?",
+            (uid, first_day)
+        )
+        totals['days'] += cursor.fetchone()[0]
+        totals['users'] += 1
+        conn.commit()
+
+    conn.close()
+    return totals
+
+
+# Initialize tables on import
+init_rollup_tables()
@@ -0,0 +1,148 @@
+from array import array
+from math import exp, log
+from typing import Dict, Iterable, List, Tuple
+from .language_samples import TRAINING_SAMPLES
+
+# Languages in table column order
+LANGUAGES = ('hindi', 'hinglish', 'english')
+DEFAULT_LANGUAGE = 'hinglish'  # Default for Indian users
+
+# Hashed n-gram table: TABLE_SIZE buckets x 3 float32 columns
+TABLE_BITS = 14
+TABLE_SIZE = 1 << TABLE_BITS
+TABLE_MASK = TABLE_SIZE - 1
+HASH_MULTIPLIER = 2654435761
+SMOOTHING = 0.1
+
+# Scales mean per-n-gram log-likelihood before softmax
+CONFIDENCE_SHARPNESS = 6.0
+
+# Pseudo-count of n-grams added when averaging, so short messages (a word
+# is ~10-20 n-grams) get a flatter softmax. Fitted on prefixes of the
+# held-out samples; benchmark_language_id.py prints the calibration table
+CONFIDENCE_PRIOR_FEATURES = 30
+
+# Per-word score cache; chat vocabulary is small and repeats constantly
+WORD_CACHE_LIMIT = 50000
+
+# Digits and punctuation split words just like whitespace
+NORMALIZE = str.maketrans({char: ' ' for char in '0123456789.,!?;:()[]{}"\'-_/\\@#*&%+=<>~`|'})
+
+BOUNDARY_KEY = (32 * HASH_MULTIPLIER) & 0xFFFFFFFF
+
+
+class LanguageIdentifier:
+    """Character n-gram language identifier for Hindi, Hinglish and English"""
+
+    def __init__(self, samples: Dict[str, List[str]] = None):
+        self.table = array('f', bytes(4 * TABLE_SIZE * len(LANGUAGES)))
+        self.word_scores: Dict[str, Tuple[float, float, float, int]] = {}
+        self.train(samples or TRAINING_SAMPLES)
+
+    def train(self, samples: Dict[str, List[str]]):
+        """Build the log-probability table from labeled samples"""
+        counts = [array('I', bytes(4 * TABLE_SIZE)) for _ in LANGUAGES]
+        totals = [0] * len(LANGUAGES)
+
+        for column, language in enumerate(LANGUAGES):
+            column_counts = counts[column]
+            for text in samples.get(language, []):
+                for word in _words(text):
+                    for bucket in _word_buckets(word):
+                        column_counts[bucket] += 1
+                        totals[column] += 1
+
+        width = len(LANGUAGES)
+        for column in range(width):
+            column_counts = counts[column]
+            denominator = log(totals[column] + SMOOTHING * TABLE_SIZE)
+            for bucket in range(TABLE_SIZE):
+                self.table[bucket * width + column] = (
+                    log(column_counts[bucket] + SMOOTHING) - denominator
+                )
+
+        self.word_scores.clear()
+
+    def identify(self, text: str) -> Tuple[str, float]:
+        """Return (language, confidence) for a single message"""
+        word_scores = self.word_scores
+        hindi = hinglish = english = 0.0
+        features = 0
+
+        for word in _words(text):
+            scores = word_scores.get(word)
+            if scores is None:
+                scores = self._score_word(word)
+            hindi += scores[0]
+            hinglish += scores[1]
+            english += scores[2]
+            features += scores[3]
+
+        if not features:
+            return DEFAULT_LANGUAGE, 0.0
+
+        # Softmax over the mean log-likelihood so confidence does not
+        # saturate just because a message is long; the prior keeps a
+        # single word from looking as certain as a sentence
+        scale = CONFIDENCE_SHARPNESS / (features + CONFIDENCE_PRIOR_FEATURES)
+        scaled = (hindi * scale, hinglish * scale, english * scale)
+        best = max(range(3), key=scaled.__getitem__)
+        weights = [exp(value - scaled[best]) for value in scaled]
+        return LANGUAGES[best], weights[best] / sum(weights)
+
+    def identify_batch(self, texts: Iterable[str]) -> List[Tuple[str, float]]:
+        """Identify a batch of messages"""
+        identify = self.identify
+        return [identify(text) for text in texts]
+
+    def detect(self, text: str) -> str:
+        """Return only the detected language"""
+        return self.identify(text)[0]
+
+    def _score_word(self, word: str) -> Tuple[float, float, float, int]:
+        """Sum the table rows for one word and cache the result"""
+        table = self.table
+        hindi = hinglish = english = 0.0
+        features = 0
+
+        for bucket in _word_buckets(word):
+            offset = bucket * 3
+            hindi += table[offset]
+            hinglish += table[offset + 1]
+            english += table[offset + 2]
+            features += 1
+
+        if len(self.word_scores) >= WORD_CACHE_LIMIT:
+            self.word_scores.clear()
+        scores = (hindi, hinglish, english, features)
+        self.word_scores[word] = scores
+        return scores
+
+
+def _words(text: str) -> List[str]:
+    """Lowercase and split a message into words"""
+    return text.lower().translate(NORMALIZE).split()
+
+
+def _word_buckets(word: str):
+    """Yield hashed 1-3 gram buckets of a word padded with boundaries.
+
+    Padding makes word edges part of the n-grams, so 'hai' as a word
+    scores differently from 'hai' inside 'chair'.
+    """
+    previous, before_previous = BOUNDARY_KEY, BOUNDARY_KEY
+    for char in word + ' ':
+        if char == ' ':
+            key = BOUNDARY_KEY
+        else:
+            key = (ord(char) * HASH_MULTIPLIER) & 0xFFFFFFFF
+        bigram = key ^ previous >> 3
+        if char != ' ':
+            yield key & TABLE_MASK
+        yield bigram & TABLE_MASK
+        yield (bigram ^ before_previous >> 6) & TABLE_MASK
+        before_previous, previous = previous, key
+
+
+# Shared instance, trained once at import
+language_identifier = LanguageIdentifier()
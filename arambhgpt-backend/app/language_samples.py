@@ -0,0 +1,237 @@
+"""
+Labeled chat samples used to train the language identifier.
+
+TRAINING_SAMPLES feed the character n-gram model at startup and
+EVALUATION_SAMPLES are held out for benchmark_language_id.py.
+"""
+
+TRAINING_SAMPLES = {
+    'hindi': [
+        "मैं बहुत परेशान हूं",
+        "मुझे बहुत tension हो रही है",
+        "परिवार वाले समझते नहीं हैं",
+        "आज मेरा मन बिल्कुल अच्छा नहीं है",
+        "मुझे नींद नहीं आ रही है",
+        "क्या आप मेरी मदद कर सकती हैं",
+        "मैं अकेला महसूस कर रहा हूं",
+        "नौकरी नहीं मिल रही है और घर वाले ताना मारते हैं",
+        "मां-बाप समझते नहीं",
+        "लोग क्या कहेंगे यही सोचकर डर लगता है",
+        "मेरा ब्रेकअप हुआ है और मैं बहुत दुखी हूं",
+        "पढ़ाई में मन नहीं लगता",
+        "परीक्षा का बहुत दबाव है",
+        "मैं थक गया हूं",
+        "मुझे गुस्सा बहुत आता है",
+        "नमस्ते, आप कैसी हैं",
+        "धन्यवाद, आपसे बात करके अच्छा लगा",
+        "मैं ठीक हूं, बस थोड़ा उदास हूं",
+        "सब कुछ बेकार लगता है",
+        "ऑफिस में बॉस बहुत परेशान करता है",
+        "पैसा नहीं है और EMI भरनी है",
+        "घर चलाना मुश्किल हो गया है",
+        "मुझे किसी से बात करनी है",
+        "क्या यह सामान्य है",
+        "मेरी शादी का दबाव बढ़ रहा है",
+        "रिश्तेदार ताना मारते हैं",
+        "मुझे डर लग रहा है",
+        "कल रात से रो रही हूं",
+        "मैं खुश हूं आज",
+        "आपकी बात से मुझे अच्छा लगा",
+        "मेरे दोस्त मुझसे बात नहीं करते",
+        "मन बहुत भारी है",
+        "सिर में दर्द है और नींद नहीं आती",
+        "मैं क्या करूं समझ नहीं आ रहा",
+        "कोई मुझे समझता ही नहीं",
+        "हां, मैं बताना चाहता हूं",
+        "जी, ठीक है",
+        "अच्छा, फिर क्या करूं",
+        "मुझे अपने भविष्य की चिंता है",
+        "करियर में कन्फ्यूजन है",
+        "यौन स्वास्थ्य के बारे में पूछना था",
+        "मेरा आत्मविश्वास कम हो गया है",
+        "मैं हर समय सोचता रहता हूं",
+        "बहुत ज्यादा तनाव है",
+        "मुझे अपने पति से डर लगता है",
+        "बच्चों की पढ़ाई की चिंता है",
+        "आज का दिन अच्छा था",
+        "मैं अपनी जिंदगी से तंग आ गया हूं",
+        "क्या आप मेरी बात सुनेंगी",
+        "मुझे अकेलापन महसूस होता है",
+    ],
+    'hinglish': [
+        "Main bahut stressed hun yaar, job pressure hai",
+        "Relationship mein problems aa rahe hain",
+        "Sexual health ke baare mein puchna tha",
+        "Main bahut pareshan hun",
+        "kya haal hai",
+        "thik hun yaar",
+        "tum itna jyda msg kyu likhte ho",
+        "yaar mujhe neend nahi aa rahi",
+        "ghar wale samjhte nahi",
+        "log kya kahenge yahi soch ke darr lagta hai",
+        "breakup hua hai aur bahut bura lag raha hai",
+        "padhai mein mann nahi lagta",
+        "exam ka bahut pressure hai bhai",
+        "main thak gaya hun",
+        "mujhe bahut gussa aata hai",
+        "kaise ho aap",
+        "thanks yaar, baat karke achha laga",
+        "main theek hun bas thoda udaas hun",
+        "sab kuch bekaar lagta hai",
+        "office mein boss bahut pareshan karta hai",
+        "paisa nahi hai aur EMI bharni hai",
+        "ghar chalana mushkil ho gaya hai",
+        "mujhe kisi se baat karni hai",
+        "kya yeh normal hai",
+        "shaadi ka pressure badh raha hai",
+        "relatives taunt karte hain",
+        "mujhe darr lag raha hai",
+        "kal raat se ro rahi hun",
+        "aaj main khush hun",
+        "tumhari baat se achha laga",
+        "mere dost mujhse baat nahi karte",
+        "mann bahut bhaari hai",
+        "sir mein dard hai aur neend nahi aati",
+        "samajh nahi aa raha kya karun",
+        "koi mujhe samjhta hi nahi",
+        "haan main batana chahta hun",
+        "achha theek hai",
+        "arre yaar kya bataun",
+        "future ki bahut tension hai",
+        "career mein confusion hai",
+        "job nahi mil rahi",
+        "placement ki tension hai",
+        "bhai sach mein bahut bura time chal raha hai",
+        "bohot zyada overthinking karta hun",
+        "matlab kuch samajh nahi aata",
+        "bilkul sahi kaha tumne",
+        "ekdum se mood off ho gaya",
+        "batao na kya karun",
+        "suno, mujhe ek baat puchni thi",
+        "dekho main try kar raha hun",
+        "kuch nahi bas aise hi",
+        "haan yaar sab theek hai",
+        "thoda off feel kar raha hun",
+        "mera confidence kam ho gaya hai",
+        "meditation karta hun par help nahi hoti",
+        "gharwale pareshan karte hain",
+        "kyun hota hai aisa mere saath",
+        "kal interview hai aur bahut nervous hun",
+        "mummy papa se fight ho gayi",
+        "akela feel hota hai",
+    ],
+    'english': [
+        "I'm feeling really anxious lately",
+        "Having trouble with my mental health",
+        "I'm feeling stressed",
+        "Life is tough",
+        "hi",
+        "hello there",
+        "how are you doing today",
+        "nice to meet you",
+        "I can't sleep at night",
+        "my parents don't understand me",
+        "I'm worried about what people will think",
+        "I just went through a breakup and it hurts",
+        "I can't focus on my studies",
+        "there is so much exam pressure",
+        "I'm exhausted",
+        "I get angry very easily",
+        "thank you, talking to you helped",
+        "I'm okay, just a little sad",
+        "everything feels pointless",
+        "my boss at the office is really toxic",
+        "I don't have money and the loan payment is due",
+        "it is hard to run the house these days",
+        "I need someone to talk to",
+        "is this normal",
+        "my family is pressuring me to get married",
+        "my relatives keep taunting me",
+        "I'm scared",
+        "I have been crying since last night",
+        "I'm happy today",
+        "what you said made me feel better",
+        "my friends don't talk to me anymore",
+        "my heart feels heavy",
+        "I have a headache and can't fall asleep",
+        "I don't know what to do",
+        "nobody understands me",
+        "yes, I would like to tell you",
+        "okay, that sounds good",
+        "I am worried about my future",
+        "I'm confused about my career",
+        "I can't find a job",
+        "I feel overwhelmed by everything",
+        "could you give me some advice",
+        "why does this always happen to me",
+        "I have an interview tomorrow and I'm nervous",
+        "I had a fight with my mom",
+        "I feel lonely",
+        "I would prefer shorter and more concise responses",
+        "can we talk about something else",
+        "I've been overthinking a lot",
+        "my confidence is really low",
+        "meditation doesn't seem to help",
+        "I'm not sure how to explain it",
+        "what should I do next",
+        "that makes sense, thanks",
+        "I feel like giving up on everything",
+        "work has been really hectic this week",
+        "good morning",
+        "I am doing fine",
+        "please listen without judgment",
+        "tell me more about anxiety",
+    ],
+}
+
+EVALUATION_SAMPLES = [
+    ("मुझे आज बहुत अकेलापन लग रहा है", 'hindi'),
+    ("मेरे माता-पिता मेरी बात नहीं सुनते", 'hindi'),
+    ("नौकरी छूट गई है, अब क्या करूं", 'hindi'),
+    ("मैं रात भर सो नहीं पाया", 'hindi'),
+    ("मुझे बहुत घबराहट हो रही है", 'hindi'),
+    ("आप बहुत अच्छी हैं", 'hindi'),
+    ("मेरा मन कहीं नहीं लगता", 'hindi'),
+    ("परीक्षा में नंबर कम आए हैं", 'hindi'),
+    ("मुझे अपनी पत्नी से बात करने में दिक्कत होती है", 'hindi'),
+    ("क्या मैं ठीक हो जाऊंगा", 'hindi'),
+    ("घर में रोज झगड़ा होता है", 'hindi'),
+    ("मैं बहुत थका हुआ महसूस करता हूं", 'hindi'),
+    ("ऑफिस का काम बहुत ज्यादा है", 'hindi'),
+    ("मुझे डॉक्टर के पास जाना चाहिए क्या", 'hindi'),
+    ("शुक्रिया, अब मैं बेहतर महसूस कर रहा हूं", 'hindi'),
+    ("mujhe aaj bahut akelapan lag raha hai", 'hinglish'),
+    ("mere parents meri baat nahi sunte", 'hinglish'),
+    ("naukri chhoot gayi hai ab kya karun", 'hinglish'),
+    ("main raat bhar so nahi paaya", 'hinglish'),
+    ("mujhe bahut ghabrahat ho rahi hai", 'hinglish'),
+    ("tum bahut achhi ho yaar", 'hinglish'),
+    ("mera mann kahin nahi lagta", 'hinglish'),
+    ("exam mein marks kam aaye hain", 'hinglish'),
+    ("wife se baat karne mein dikkat hoti hai", 'hinglish'),
+    ("kya main theek ho jaunga", 'hinglish'),
+    ("ghar mein roz jhagda hota hai", 'hinglish'),
+    ("bahut thaka hua feel karta hun", 'hinglish'),
+    ("office ka kaam bahut zyada hai", 'hinglish'),
+    ("doctor ke paas jaana chahiye kya", 'hinglish'),
+    ("shukriya ab better feel kar raha hun", 'hinglish'),
+    ("I feel so lonely today", 'english'),
+    ("my parents never listen to me", 'english'),
+    ("I lost my job, what do I do now", 'english'),
+    ("I couldn't sleep the whole night", 'english'),
+    ("I'm having a panic attack", 'english'),
+    ("you are really kind", 'english'),
+    ("I can't concentrate on anything", 'english'),
+    ("I got low marks in my exams", 'english'),
+    ("I find it hard to talk to my wife", 'english'),
+    ("will I ever get better", 'english'),
+    ("there are fights at home every day", 'english'),
+    ("I feel tired all the time", 'english'),
+    ("there is way too much work at the office", 'english'),
+    ("should I see a doctor", 'english'),
+    ("thanks, I feel better now", 'english'),
+    ("hai", 'hinglish'),
+    ("chai pe chalein?", 'hinglish'),
+    ("that hairstyle is nice", 'english'),
+    ("the chair is broken", 'english'),
+]
@@ -1,5 +1,6 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 import os
 
@@ -12,6 +13,7 @@ from .chat import router as chat_router
 from .history import router as history_router
 from .mood import router as mood_router
 from .notifications import router as notifications_router
+from .notification_broadcasts import router as notification_broadcasts_router
 from .social import router as social_router
 from .ai_context import router as ai_context_router
 from .ai_learning import router as ai_learning_router
@@ -22,12 +24,23 @@ from .webrtc_signaling import router as webrtc_router
 from .wallet import router as wallet_router
 from .file_upload import router as file_upload_router
 from .professional_auth import router as professional_auth_router
+from .reminder_scheduler import reminder_scheduler
+from .auth import verify_admin
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Set REMINDER_SCHEDULER=false on workers that should not send reminders
+    if os.getenv("REMINDER_SCHEDULER", "true").lower() == "true":
+        reminder_scheduler.start()
+    yield
+    reminder_scheduler.stop()
 
 # Create FastAPI app
 app = FastAPI(
     title="ArambhGPT API",
     description="AI-powered mental health chat API with Honey",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -37,6 +50,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include routers
@@ -45,6 +59,7 @@ app.include_router(chat_router, tags=["chat"])
 app.include_router(history_router, tags=["history"])
 app.include_router(mood_router, tags=["mood"])
 app.include_router(notifications_router, tags=["notifications"])
+app.include_router(notification_broadcasts_router, tags=["notifications"])
 app.include_router(social_router, tags=["social"])
 app.include_router(ai_context_router, tags=["ai-context"])
 app.include_router(ai_learning_router, tags=["ai-learning"])
@@ -64,6 +79,11 @@ async def root():
 async def health_check():
     return {"status": "healthy", "service": "ArambhGPT API", "ai": "Honey"}
 
+@app.get("/debug/reminder-stats")
+async def reminder_stats(email: str = Depends(verify_admin)):
+    """Tick latency, slot lag and catch-up history of the reminder scheduler"""
+    return reminder_scheduler.get_stats()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
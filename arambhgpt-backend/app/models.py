@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime
 
 # User models
@@ -49,6 +49,14 @@ class MessageCreate(BaseModel):
     sender: str
     ai_provider: Optional[str] = None
 
+class BulkMessageItem(MessageCreate):
+    conversation_id: str
+    client_message_id: Optional[str] = None  # idempotency key, unique per conversation
+    created_at: Optional[datetime] = None  # when the message was written offline
+
+class BulkMessageRequest(BaseModel):
+    messages: List[BulkMessageItem]
+
 class MessageDetail(BaseModel):
     id: str
     content: str
@@ -115,14 +123,19 @@ class ConversationStats(BaseModel):
     total_messages: int
     active_days: int
     average_messages_per_conversation: float
+    average_messages_per_active_day: float = 0.0
     most_active_day: Optional[str] = None
+    weekday_histogram: dict = {}
     conversation_frequency: dict = {}
+    first_active_day: Optional[str] = None
+    last_active_day: Optional[str] = None
 
 # Export models
 class ExportRequest(BaseModel):
-    format: str = "json"
+    format: str = "ndjson"  # ndjson (or json), csv, zip
     conversation_ids: List[str] = []
     include_metadata: bool = True
+    background: bool = False
 
 # Mood Tracking models
 class MoodEntryCreate(BaseModel):
@@ -135,6 +148,9 @@ class MoodEntryCreate(BaseModel):
     energy_level: Optional[int] = None
     date: Optional[str] = None  # YYYY-MM-DD format
 
+class MoodBatchRequest(BaseModel):
+    entries: List[MoodEntryCreate]  # each with its date
+
 class MoodEntryUpdate(BaseModel):
     mood: Optional[int] = None
     emotions: Optional[List[str]] = None
@@ -166,6 +182,10 @@ class MoodStats(BaseModel):
     mood_trend: str  # 'improving', 'declining', 'stable'
     weekly_average: float
     monthly_average: float
+    longest_streak: int = 0
+    trend_slope: float = 0.0  # fitted mood change per week
+    window_averages: Dict[str, float] = {}  # "7", "30", "90", "365" calendar days
+    mood_distribution: Dict[int, int] = {}
 
 # Notification models
 class NotificationCreate(BaseModel):
@@ -176,6 +196,11 @@ class NotificationCreate(BaseModel):
     action_url: Optional[str] = None
     icon: Optional[str] = None
 
+class NotificationBroadcastCreate(NotificationCreate):
+    audience: str = "all"  # 'all', 'group' or 'users'
+    group_id: Optional[str] = None  # for audience 'group'
+    user_ids: List[int] = []  # for audience 'users'
+
 class Notification(BaseModel):
     id: str
     user_id: str
@@ -1,17 +1,42 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response, UploadFile, File, status
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, date, timedelta
 import sqlite3
 import json
+import csv
+import io
+import math
+import re
 from .auth import verify_token, get_user_by_email
 from .models import (
-    MoodEntryCreate, MoodEntryUpdate, MoodEntry, MoodStats,
+    MoodEntryCreate, MoodEntryUpdate, MoodEntry, MoodStats, MoodBatchRequest,
     User
 )
 from .database import get_db_connection
+from .tagging import normalize_tags
+from .resource_versions import conditional_get, track_table_versions
+from .mood_stats import get_mood_stats as compute_mood_stats
+from .mood_analytics import MAX_REPORT_DAYS, get_mood_analytics
 
 router = APIRouter(prefix="/mood", tags=["mood"])
 
+MOOD_MIN, MOOD_MAX = 1, 5
+MAX_BATCH_ENTRIES = 1000
+MAX_IMPORT_BYTES = 5 * 1024 * 1024
+
+# Earliest date an entry may have; CSV formats without a year parse to 1900
+MIN_ENTRY_DATE = date(2000, 1, 1)
+
+# Word moods used by other trackers' CSV exports
+MOOD_WORDS = {"rad": 5, "great": 5, "good": 4, "okay": 3, "ok": 3, "meh": 3, "bad": 2, "awful": 1, "terrible": 1}
+
+# CSV headers from other apps mapped to mood_entries columns
+CSV_COLUMN_ALIASES = {
+    "full_date": "date", "day": "date", "note": "notes", "note_title": "notes",
+    "emotion": "emotions", "feelings": "emotions", "activity": "activities",
+    "sleep": "sleep_hours", "stress": "stress_level", "energy": "energy_level"
+}
+
 def init_mood_tables():
     """Initialize mood tracking tables"""
     conn = get_db_connection()
@@ -37,9 +62,213 @@ def init_mood_tables():
         )
     ''')
     
+    # Normalized emotions/activities per entry (JSON columns keep the display copy)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS mood_entry_tags (
+            entry_id TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            date TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            tag TEXT NOT NULL,
+            PRIMARY KEY (entry_id, kind, tag)
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_mood_entry_tags_user
+        ON mood_entry_tags (user_id, kind, tag, date)
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS mood_entries_delete_tags
+        AFTER DELETE ON mood_entries
+        BEGIN
+            DELETE FROM mood_entry_tags WHERE entry_id = OLD.id;
+        END
+    ''')
+    track_table_versions(cursor, 'mood_entries', 'mood')
+    
     conn.commit()
     conn.close()
 
+def validate_mood_entry(entry: MoodEntryCreate) -> Optional[str]:
+    """Why an offline or imported entry cannot be saved, or None"""
+    if not entry.date:
+        return "date is required"
+    try:
+        entry_date = date.fromisoformat(entry.date)
+    except ValueError:
+        return "date must be YYYY-MM-DD"
+    # fromisoformat also reads forms like 20260105; dates are stored in one form
+    if entry_date.isoformat() != entry.date:
+        return "date must be YYYY-MM-DD"
+    # One day of slack for clients ahead of the server's timezone
+    if entry_date > date.today() + timedelta(days=1):
+        return "date is in the future"
+    if entry_date < MIN_ENTRY_DATE:
+        return f"date is before {MIN_ENTRY_DATE.isoformat()}"
+    if not MOOD_MIN <= entry.mood <= MOOD_MAX:
+        return f"mood must be between {MOOD_MIN} and {MOOD_MAX}"
+    return None
+
+def upsert_mood_entries(cursor, user_id: str, entries: List[Tuple[str, MoodEntryCreate]]) -> Dict[str, Tuple[str, str]]:
+    """Create or update one entry per date with a single upsert statement.
+
+    Dates must be distinct. Returns date -> (entry id, 'created' or 'updated').
+    """
+    dates = [entry_date for entry_date, _ in entries]
+    placeholders = ",".join("?" for _ in dates)
+    
+    cursor.execute(
+        f"SELECT date FROM mood_entries WHERE user_id = ? AND date IN ({placeholders})",
+        [user_id] + dates
+    )
+    existing = {row[0] for row in cursor.fetchall()}
+    
+    cursor.executemany('''
+        INSERT INTO mood_entries 
+        (id, user_id, date, mood, emotions, notes, activities, 
+         sleep_hours, stress_level, energy_level)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(user_id, date) DO UPDATE SET
+            mood = excluded.mood, emotions = excluded.emotions, notes = excluded.notes,
+            activities = excluded.activities, sleep_hours = excluded.sleep_hours,
+            stress_level = excluded.stress_level, energy_level = excluded.energy_level,
+            updated_at = CURRENT_TIMESTAMP
+    ''', [
+        (
+            f"mood_{user_id}_{entry_date}", user_id, entry_date, entry.mood,
+            json.dumps(entry.emotions), entry.notes, json.dumps(entry.activities),
+            entry.sleep_hours, entry.stress_level, entry.energy_level
+        )
+        for entry_date, entry in entries
+    ])
+    
+    # Rows created before the id scheme keep their old ids
+    cursor.execute(
+        f"SELECT id, date FROM mood_entries WHERE user_id = ? AND date IN ({placeholders})",
+        [user_id] + dates
+    )
+    entry_ids = {row[1]: row[0] for row in cursor.fetchall()}
+    
+    cursor.execute(
+        f"DELETE FROM mood_entry_tags WHERE entry_id IN ({placeholders})",
+        [entry_ids[entry_date] for entry_date in dates]
+    )
+    tag_rows = []
+    for entry_date, entry in entries:
+        entry_id = entry_ids[entry_date]
+        tag_rows += [(entry_id, user_id, entry_date, 'emotion', tag) for tag in normalize_tags(entry.emotions)]
+        tag_rows += [(entry_id, user_id, entry_date, 'activity', tag) for tag in normalize_tags(entry.activities)]
+    cursor.executemany(
+        "INSERT INTO mood_entry_tags (entry_id, user_id, date, kind, tag) VALUES (?, ?, ?, ?, ?)",
+        tag_rows
+    )
+    
+    return {
+        entry_date: (entry_ids[entry_date], "updated" if entry_date in existing else "created")
+        for entry_date in dates
+    }
+
+def save_mood_batch(user_id: str, items: List[Tuple[Optional[MoodEntryCreate], Optional[str]]]) -> Dict:
+    """Upsert the valid entries of a batch in one transaction and report on every item.
+
+    Each item is (entry, None) or (None, parse error). When a date appears
+    more than once the last entry wins and earlier ones are 'superseded'.
+    """
+    errors = [error or validate_mood_entry(entry) for entry, error in items]
+    latest = {}
+    for index, (entry, _) in enumerate(items):
+        if not errors[index]:
+            latest[entry.date] = index
+    
+    saved = {}
+    if latest:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            dated = [(entry_date, items[index][0]) for entry_date, index in latest.items()]
+            for start in range(0, len(dated), MAX_BATCH_ENTRIES):
+                saved.update(upsert_mood_entries(cursor, user_id, dated[start:start + MAX_BATCH_ENTRIES]))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    results = []
+    for index, (entry, _) in enumerate(items):
+        result = {"index": index, "date": entry.date if entry else None}
+        if errors[index]:
+            result.update(status="invalid", error=errors[index])
+        elif latest[entry.date] != index:
+            result.update(status="superseded")
+        else:
+            entry_id, status_name = saved[entry.date]
+            result.update(id=entry_id, status=status_name)
+        results.append(result)
+    
+    counts = {name: 0 for name in ("created", "updated", "superseded", "invalid")}
+    for result in results:
+        counts[result["status"]] += 1
+    return {**counts, "results": results}
+
+def _finite(text: str) -> float:
+    """float() that also rejects inf and nan, which round() and int() cannot take"""
+    value = float(text)
+    if not math.isfinite(value):
+        raise ValueError(f"not a finite number: {text!r}")
+    return value
+
+def parse_mood_csv(text: str, scale: int = MOOD_MAX, date_format: str = "%Y-%m-%d") -> List[Tuple[Optional[MoodEntryCreate], Optional[str]]]:
+    """Turn a mood CSV from another app into batch items.
+
+    Needs date and mood columns; moods on a 1..scale range are rescaled to
+    1-5, and words like "good" or "meh" are accepted. Tags are split on
+    | ; or , and unknown columns are ignored.
+    """
+    reader = csv.DictReader(io.StringIO(text))
+    if not reader.fieldnames:
+        return []
+    # When two headers map to the same field the first one wins
+    columns = {}
+    for name in reader.fieldnames:
+        field = CSV_COLUMN_ALIASES.get(name.strip().lower(), name.strip().lower())
+        if field not in columns.values():
+            columns[name] = field
+    
+    items = []
+    for raw in reader:
+        row = {columns[name]: (value or "").strip() for name, value in raw.items() if name in columns}
+        try:
+            entry_date = datetime.strptime(row.get("date", ""), date_format).date().isoformat()
+            mood_text = row.get("mood", "").lower()
+            if mood_text in MOOD_WORDS:
+                mood = MOOD_WORDS[mood_text]
+            else:
+                value = _finite(mood_text)
+                mood = round(MOOD_MIN + (value - 1) * (MOOD_MAX - MOOD_MIN) / (scale - 1)) if scale != MOOD_MAX else round(value)
+            
+            def number(column, cast):
+                return cast(_finite(row[column])) if row.get(column) else None
+            
+            def tags(column):
+                return [tag.strip() for tag in re.split(r"[|;,]", row.get(column, "")) if tag.strip()]
+            
+            items.append((MoodEntryCreate(
+                date=entry_date,
+                mood=mood,
+                emotions=tags("emotions"),
+                activities=tags("activities"),
+                notes=row.get("notes") or None,
+                sleep_hours=number("sleep_hours", float),
+                stress_level=number("stress_level", int),
+                energy_level=number("energy_level", int)
+            ), None))
+        except ValueError as e:
+            items.append((None, f"row {reader.line_num}: {e}"))
+    return items
+
 @router.post("/entries", response_model=MoodEntry)
 async def create_mood_entry(
     mood_data: MoodEntryCreate,
@@ -51,51 +280,16 @@ async def create_mood_entry(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
+    entry_date = mood_data.date = mood_data.date or date.today().isoformat()
+    error = validate_mood_entry(mood_data)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
+    
     conn = get_db_connection()
     cursor = conn.cursor()
     
-    # Initialize mood tables
-    init_mood_tables()
-    
     try:
-        entry_date = mood_data.date or date.today().isoformat()
-        entry_id = f"mood_{user['id']}_{entry_date}"
-        
-        # Check if entry exists for this date
-        cursor.execute(
-            "SELECT id FROM mood_entries WHERE user_id = ? AND date = ?",
-            (str(user['id']), entry_date)
-        )
-        existing = cursor.fetchone()
-        
-        emotions_json = json.dumps(mood_data.emotions)
-        activities_json = json.dumps(mood_data.activities)
-        
-        if existing:
-            # Update existing entry
-            cursor.execute('''
-                UPDATE mood_entries 
-                SET mood = ?, emotions = ?, notes = ?, activities = ?, 
-                    sleep_hours = ?, stress_level = ?, energy_level = ?, 
-                    updated_at = CURRENT_TIMESTAMP
-                WHERE user_id = ? AND date = ?
-            ''', (
-                mood_data.mood, emotions_json, mood_data.notes, activities_json,
-                mood_data.sleep_hours, mood_data.stress_level, mood_data.energy_level,
-                str(user['id']), entry_date
-            ))
-        else:
-            # Create new entry
-            cursor.execute('''
-                INSERT INTO mood_entries 
-                (id, user_id, date, mood, emotions, notes, activities, 
-                 sleep_hours, stress_level, energy_level)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                entry_id, str(user['id']), entry_date, mood_data.mood,
-                emotions_json, mood_data.notes, activities_json,
-                mood_data.sleep_hours, mood_data.stress_level, mood_data.energy_level
-            ))
+        upsert_mood_entries(cursor, str(user['id']), [(entry_date, mood_data)])
         
         conn.commit()
         
@@ -131,9 +325,63 @@ async def create_mood_entry(
     finally:
         conn.close()
 
+@router.post("/entries/batch")
+async def save_mood_entries_batch(
+    batch: MoodBatchRequest,
+    email: str = Depends(verify_token)
+):
+    """Save many dated entries at once, e.g. days logged while offline"""
+    user = get_user_by_email(email)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    if not batch.entries:
+        raise HTTPException(status_code=400, detail="No mood entries to save")
+    if len(batch.entries) > MAX_BATCH_ENTRIES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_ENTRIES} entries per request")
+    
+    try:
+        return save_mood_batch(str(user['id']), [(entry, None) for entry in batch.entries])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to save mood entries: {str(e)}")
+
+@router.post("/import")
+async def import_mood_csv(
+    file: UploadFile = File(...),
+    scale: int = MOOD_MAX,
+    date_format: str = "%Y-%m-%d",
+    email: str = Depends(verify_token)
+):
+    """Import historical moods from another app's CSV export (date and mood columns required)"""
+    user = get_user_by_email(email)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    if scale < 2:
+        raise HTTPException(status_code=400, detail="scale must be at least 2")
+    
+    content = await file.read()
+    if len(content) > MAX_IMPORT_BYTES:
+        raise HTTPException(status_code=400, detail="File too large (max 5MB)")
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV must be UTF-8 encoded")
+    
+    items = parse_mood_csv(text, scale, date_format)
+    if not items:
+        raise HTTPException(status_code=400, detail="No rows found in CSV")
+    
+    try:
+        return save_mood_batch(str(user['id']), items)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to import mood entries: {str(e)}")
+
 @router.get("/entries", response_model=List[MoodEntry])
 async def get_mood_entries(
+    request: Request,
+    response: Response,
     days: int = 30,
+    emotion: Optional[str] = None,
+    activity: Optional[str] = None,
     email: str = Depends(verify_token)
 ):
     """Get mood entries for the current user"""
@@ -142,24 +390,35 @@ async def get_mood_entries(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
+    # The window ends today, so the date is part of the representation
+    not_modified = conditional_get(request, response, user['id'], "mood", date.today())
+    if not_modified:
+        return not_modified
+    
     conn = get_db_connection()
     cursor = conn.cursor()
     
-    # Initialize mood tables
-    init_mood_tables()
-    
     try:
         # Calculate date range
         end_date = date.today()
         start_date = end_date - timedelta(days=days)
         
-        cursor.execute('''
+        params = [str(user['id']), start_date.isoformat(), end_date.isoformat()]
+        
+        # Tag filters use the indexed tag table instead of parsing JSON
+        tag_filters = ""
+        for kind, tag in (('emotion', emotion), ('activity', activity)):
+            if tag:
+                tag_filters += " AND id IN (SELECT entry_id FROM mood_entry_tags WHERE user_id = ? AND kind = ? AND tag = ?)"
+                params.extend([str(user['id']), kind, tag.strip().lower()])
+        
+        cursor.execute(f'''
             SELECT id, user_id, date, mood, emotions, notes, activities,
                    sleep_hours, stress_level, energy_level, created_at, updated_at
             FROM mood_entries 
-            WHERE user_id = ? AND date >= ? AND date <= ?
+            WHERE user_id = ? AND date >= ? AND date <= ?{tag_filters}
             ORDER BY date DESC
-        ''', (str(user['id']), start_date.isoformat(), end_date.isoformat()))
+        ''', params)
         
         rows = cursor.fetchall()
         entries = []
@@ -187,10 +446,20 @@ async def get_mood_entries(
 
 @router.get("/entries/{entry_date}", response_model=MoodEntry)
 async def get_mood_entry_by_date(
+    request: Request,
+    response: Response,
     entry_date: str,
     email: str = Depends(verify_token)
 ):
     """Get mood entry for a specific date"""
+    user = get_user_by_email(email)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    not_modified = conditional_get(request, response, user['id'], "mood")
+    if not_modified:
+        return not_modified
+    
     conn = get_db_connection()
     cursor = conn.cursor()
     
@@ -200,7 +469,7 @@ async def get_mood_entry_by_date(
                    sleep_hours, stress_level, energy_level, created_at, updated_at
             FROM mood_entries 
             WHERE user_id = ? AND date = ?
-        ''', (current_user.id, entry_date))
+        ''', (str(user['id']), entry_date))
         
         row = cursor.fetchone()
         if not row:
@@ -226,6 +495,8 @@ async def get_mood_entry_by_date(
 
 @router.get("/stats", response_model=MoodStats)
 async def get_mood_stats(
+    request: Request,
+    response: Response,
     days: int = 30,
     email: str = Depends(verify_token)
 ):
@@ -235,103 +506,90 @@ async def get_mood_stats(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
+    not_modified = conditional_get(request, response, user['id'], "mood", date.today())
+    if not_modified:
+        return not_modified
+    
+    return MoodStats(**compute_mood_stats(user['id'], days))
+
+@router.get("/tags")
+async def get_mood_tag_stats(
+    request: Request,
+    response: Response,
+    days: int = 30,
+    email: str = Depends(verify_token)
+):
+    """How often each emotion/activity was logged and the average mood alongside it"""
+    user = get_user_by_email(email)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    not_modified = conditional_get(request, response, user['id'], "mood", date.today())
+    if not_modified:
+        return not_modified
+    
     conn = get_db_connection()
     cursor = conn.cursor()
     
     try:
-        # Calculate date range
-        end_date = date.today()
-        start_date = end_date - timedelta(days=days)
-        
-        # Get all mood entries in range
+        start_date = (date.today() - timedelta(days=days)).isoformat()
         cursor.execute('''
-            SELECT mood, date FROM mood_entries 
-            WHERE user_id = ? AND date >= ? AND date <= ?
-            ORDER BY date ASC
-        ''', (str(user['id']), start_date.isoformat(), end_date.isoformat()))
-        
-        rows = cursor.fetchall()
-        
-        if not rows:
-            return MoodStats(
-                average_mood=0.0,
-                total_entries=0,
-                streak_days=0,
-                most_common_mood=3,
-                mood_trend="stable",
-                weekly_average=0.0,
-                monthly_average=0.0
-            )
-        
-        moods = [row[0] for row in rows]
-        dates = [row[1] for row in rows]
-        
-        # Calculate statistics
-        average_mood = sum(moods) / len(moods)
-        total_entries = len(moods)
-        
-        # Most common mood
-        mood_counts = {}
-        for mood in moods:
-            mood_counts[mood] = mood_counts.get(mood, 0) + 1
-        most_common_mood = max(mood_counts.keys(), key=lambda k: mood_counts[k])
-        
-        # Calculate streak (consecutive days with entries)
-        streak_days = 0
-        current_date = date.today()
-        
-        for i in range(len(dates)):
-            expected_date = (current_date - timedelta(days=i)).isoformat()
-            if expected_date in dates:
-                streak_days += 1
-            else:
-                break
-        
-        # Calculate trend (last 7 days vs previous 7 days)
-        recent_moods = moods[-7:] if len(moods) >= 7 else moods
-        older_moods = moods[-14:-7] if len(moods) >= 14 else []
-        
-        recent_avg = sum(recent_moods) / len(recent_moods)
-        older_avg = sum(older_moods) / len(older_moods) if older_moods else recent_avg
-        
-        if recent_avg > older_avg + 0.2:
-            mood_trend = "improving"
-        elif recent_avg < older_avg - 0.2:
-            mood_trend = "declining"
-        else:
-            mood_trend = "stable"
-        
-        # Weekly and monthly averages
-        weekly_moods = moods[-7:] if len(moods) >= 7 else moods
-        weekly_average = sum(weekly_moods) / len(weekly_moods)
-        monthly_average = average_mood
-        
-        return MoodStats(
-            average_mood=round(average_mood, 2),
-            total_entries=total_entries,
-            streak_days=streak_days,
-            most_common_mood=most_common_mood,
-            mood_trend=mood_trend,
-            weekly_average=round(weekly_average, 2),
-            monthly_average=round(monthly_average, 2)
-        )
+            SELECT t.kind, t.tag, COUNT(*) AS entries, AVG(m.mood) AS average_mood
+            FROM mood_entry_tags t
+            JOIN mood_entries m ON m.id = t.entry_id
+            WHERE t.user_id = ? AND t.date >= ?
+            GROUP BY t.kind, t.tag
+            ORDER BY entries DESC
+        ''', (str(user['id']), start_date))
+        
+        stats = {"emotions": [], "activities": []}
+        for kind, tag, entries, average_mood in cursor.fetchall():
+            stats["emotions" if kind == 'emotion' else "activities"].append({
+                "tag": tag,
+                "entries": entries,
+                "average_mood": round(average_mood, 2)
+            })
+        
+        return stats
         
     finally:
         conn.close()
 
+@router.get("/analytics")
+async def get_mood_analytics_report(
+    request: Request,
+    response: Response,
+    days: int = Query(90, ge=1, le=MAX_REPORT_DAYS),
+    email: str = Depends(verify_token)
+):
+    """Rolling means, sleep/stress/energy correlations, activity lift and weekday profile"""
+    user = get_user_by_email(email)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    not_modified = conditional_get(request, response, user['id'], "mood", date.today())
+    if not_modified:
+        return not_modified
+    
+    return get_mood_analytics(user['id'], days)
+
 @router.delete("/entries/{entry_date}")
 async def delete_mood_entry(
     entry_date: str,
     email: str = Depends(verify_token)
 ):
     """Delete a mood entry for a specific date"""
+    user = get_user_by_email(email)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
     conn = get_db_connection()
     cursor = conn.cursor()
     
     try:
         cursor.execute(
             "DELETE FROM mood_entries WHERE user_id = ? AND date = ?",
-            (current_user.id, entry_date)
+            (str(user['id']), entry_date)
         )
         
         if cursor.rowcount == 0:
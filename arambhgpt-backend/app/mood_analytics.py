@@ -0,0 +1,171 @@
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+import numpy as np
+from .database import get_db_connection
+from .resource_versions import VersionedCache
+from .mood_stats import parse_entry_dates
+
+# Rolling mean windows, in calendar days
+ROLLING_WINDOWS = (7, 30)
+
+# Most days of rolling means a report can ask for
+MAX_REPORT_DAYS = 365
+
+# Days held in the dense series: the longest report plus the lookback of its first mean
+DENSE_DAYS = MAX_REPORT_DAYS + max(ROLLING_WINDOWS) - 1
+
+# Entry fields correlated against mood
+CORRELATED_FIELDS = ("sleep_hours", "stress_level", "energy_level")
+
+# Fewer paired entries than this and a correlation is not reported
+MIN_CORRELATION_ENTRIES = 3
+
+# Maximum number of users whose analytics are kept
+MOOD_ANALYTICS_CACHE_SIZE = 2000
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def _rounded(value, digits: int = 2) -> Optional[float]:
+    return None if value is None or np.isnan(value) else round(float(value), digits)
+
+
+def _rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Mean of the logged (non-NaN) days in each trailing window; NaN where none"""
+    logged = ~np.isnan(values)
+    totals = np.concatenate(([0.0], np.cumsum(np.where(logged, values, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(logged)))
+    end = np.arange(1, len(values) + 1)
+    start = np.maximum(end - window, 0)
+    window_counts = counts[end] - counts[start]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(window_counts > 0, (totals[end] - totals[start]) / window_counts, np.nan)
+
+
+class MoodAnalytics:
+    """Time-series and correlation analysis over a user's full mood history.
+
+    Correlations, activity lift and the weekday profile use every entry;
+    the dense daily series behind the rolling means covers only the last
+    DENSE_DAYS days.
+    """
+
+    def __init__(self, entries: List, activity_rows: List, today: date):
+        """entries are (date, row) pairs, oldest first, as from parse_entry_dates"""
+        self.today = today
+        self.entries = len(entries)
+        if not entries:
+            self.first = self.start = today
+            self.rolling = {window: np.array([]) for window in ROLLING_WINDOWS}
+            self.daily = np.array([])
+            self.correlations = {field: {"r": None, "entries": 0} for field in CORRELATED_FIELDS}
+            self.activity_lift = []
+            self.weekday_profile = {name: {"average_mood": None, "entries": 0} for name in WEEKDAYS}
+            return
+
+        rows = [row for _, row in entries]
+        self.first = entries[0][0]
+        offsets = np.array([(day - self.first).days for day, _ in entries])
+        moods = np.array([row['mood'] for row in rows], dtype=float)
+
+        # Dense daily series over the recent window, NaN on days without an entry
+        self.start = max(self.first, today - timedelta(days=DENSE_DAYS - 1))
+        shift = (self.start - self.first).days
+        recent = offsets >= shift
+        self.daily = np.full((today - self.start).days + 1, np.nan)
+        self.daily[offsets[recent] - shift] = moods[recent]
+        self.rolling = {window: _rolling_mean(self.daily, window) for window in ROLLING_WINDOWS}
+
+        self.correlations = {}
+        for field in CORRELATED_FIELDS:
+            other = np.array([row[field] if row[field] is not None else np.nan for row in rows], dtype=float)
+            paired = ~np.isnan(other)
+            n = int(paired.sum())
+            r = None
+            if n >= MIN_CORRELATION_ENTRIES and moods[paired].std() > 0 and other[paired].std() > 0:
+                r = _rounded(np.corrcoef(moods[paired], other[paired])[0, 1], 3)
+            self.correlations[field] = {"r": r, "entries": n}
+
+        # Lift: mean mood on days with the activity minus mean mood on days without
+        self.activity_lift = []
+        if activity_rows:
+            position = {row['date']: index for index, row in enumerate(rows)}
+            pairs = [(row['tag'], position[row['date']]) for row in activity_rows if row['date'] in position]
+            if pairs:
+                tags, tag_codes = np.unique([tag for tag, _ in pairs], return_inverse=True)
+                tagged_moods = moods[[entry for _, entry in pairs]]
+                with_count = np.bincount(tag_codes, minlength=len(tags))
+                with_total = np.bincount(tag_codes, weights=tagged_moods, minlength=len(tags))
+                without_count = self.entries - with_count
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    with_mean = with_total / with_count
+                    without_mean = np.where(without_count > 0, (moods.sum() - with_total) / without_count, np.nan)
+                lift = with_mean - without_mean
+                for index in np.argsort(-np.nan_to_num(lift, nan=-np.inf)):
+                    self.activity_lift.append({
+                        "activity": str(tags[index]),
+                        "entries": int(with_count[index]),
+                        "average_mood": _rounded(with_mean[index]),
+                        "lift": _rounded(lift[index])
+                    })
+
+        weekdays = (offsets + self.first.weekday()) % 7
+        weekday_count = np.bincount(weekdays, minlength=7)
+        weekday_total = np.bincount(weekdays, weights=moods, minlength=7)
+        self.weekday_profile = {
+            name: {
+                "average_mood": _rounded(weekday_total[index] / weekday_count[index]) if weekday_count[index] else None,
+                "entries": int(weekday_count[index])
+            }
+            for index, name in enumerate(WEEKDAYS)
+        }
+
+    @classmethod
+    def load(cls, user_id, today: Optional[date] = None) -> "MoodAnalytics":
+        today = today or date.today()
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT date, mood, sleep_hours, stress_level, energy_level
+            FROM mood_entries
+            WHERE user_id = ? AND date <= ?
+            ORDER BY date ASC
+        ''', (str(user_id), today.isoformat()))
+        rows = cursor.fetchall()
+        cursor.execute('''
+            SELECT tag, date FROM mood_entry_tags
+            WHERE user_id = ? AND kind = 'activity' AND date <= ?
+        ''', (str(user_id), today.isoformat()))
+        activity_rows = cursor.fetchall()
+        conn.close()
+        return cls(parse_entry_dates(rows, user_id, today), activity_rows, today)
+
+    def report(self, days: int) -> Dict:
+        """The analytics payload, with rolling means for the last `days` days"""
+        days = max(1, min(days, MAX_REPORT_DAYS, len(self.daily)))
+        first = len(self.daily) - days
+        rolling = [
+            {
+                "date": (self.start + timedelta(days=first + offset)).isoformat(),
+                "mood": _rounded(self.daily[first + offset]),
+                **{f"mean_{window}": _rounded(self.rolling[window][first + offset]) for window in ROLLING_WINDOWS}
+            }
+            for offset in range(days if len(self.daily) else 0)
+        ]
+        return {
+            "total_entries": self.entries,
+            "first_entry_date": self.first.isoformat() if self.entries else None,
+            "rolling_means": rolling,
+            "correlations": self.correlations,
+            "activity_lift": self.activity_lift,
+            "weekday_profile": self.weekday_profile
+        }
+
+
+_analytics_cache = VersionedCache("mood", MOOD_ANALYTICS_CACHE_SIZE)
+
+
+def get_mood_analytics(user_id, days: int = 90) -> Dict:
+    """Analytics for a user, recomputed after any mood write or at midnight"""
+    analytics = _analytics_cache.get_or_load(user_id, lambda today: MoodAnalytics.load(user_id, today))
+    return analytics.report(days)
@@ -0,0 +1,165 @@
+from datetime import date, timedelta
+from itertools import accumulate
+from typing import Dict, List, Optional, Tuple
+from .database import get_db_connection
+from .resource_versions import VersionedCache
+
+# Calendar windows (days, ending today) reported on every stats response
+MOOD_WINDOWS = (7, 30, 90, 365)
+
+# Days held in the dense series, ending today; enough for the largest window
+SERIES_DAYS = max(MOOD_WINDOWS)
+
+# Maximum number of users whose loaded series is kept
+MOOD_STATS_CACHE_SIZE = 5000
+
+# Change in mood per week, from the fitted slope, that counts as a trend
+TREND_THRESHOLD = 0.2
+
+
+def parse_entry_dates(rows, user_id, today: date) -> List[Tuple[date, object]]:
+    """(date, row) for rows with a usable date up to today, oldest first.
+
+    Entries saved before dates were validated may hold strings that do
+    not parse; those are logged and skipped instead of failing the read.
+    When two stored strings name the same day the later row wins.
+    """
+    parsed = {}
+    for row in rows:
+        try:
+            day = date.fromisoformat(row['date'])
+        except (TypeError, ValueError):
+            print(f"⚠️ Skipping mood entry with unreadable date {row['date']!r} for user {user_id}")
+            continue
+        if day <= today:
+            parsed[day] = row
+    return sorted(parsed.items())
+
+
+def _streaks(days: List[date], today: date) -> Tuple[int, int]:
+    """(longest run of consecutive days, run ending today) over sorted distinct days"""
+    longest = run = 0
+    previous = None
+    for day in days:
+        run = run + 1 if previous is not None and (day - previous).days == 1 else 1
+        longest = max(longest, run)
+        previous = day
+    return longest, run if previous == today else 0
+
+
+class MoodSeries:
+    """A user's mood history as a dense, date-indexed array with prefix sums.
+
+    Index i is day `start + i`; days without an entry hold 0. The array
+    covers at most the last SERIES_DAYS days, so its size does not depend
+    on how far back the history goes. Built in one pass, after which any
+    window ending today is answered in O(1) from differences of the
+    prefix arrays. Streaks come from the full history (see _streaks).
+    """
+
+    def __init__(self, start: date, moods: list, today: date, streaks: Tuple[int, int] = (0, 0)):
+        self.start = start
+        self.today = today
+        self.span = len(moods)
+
+        logged = [1 if mood else 0 for mood in moods]
+        days = range(self.span)
+        self.count = list(accumulate(logged, initial=0))
+        self.total = list(accumulate(moods, initial=0))
+        self.x = list(accumulate((i * seen for i, seen in zip(days, logged)), initial=0))
+        self.xx = list(accumulate((i * i * seen for i, seen in zip(days, logged)), initial=0))
+        self.xy = list(accumulate((i * mood for i, mood in zip(days, moods)), initial=0))
+        self.by_mood = {
+            value: list(accumulate((1 if mood == value else 0 for mood in moods), initial=0))
+            for value in sorted(set(moods) - {0})
+        }
+        self.longest_streak, self.current_streak = streaks
+
+    @classmethod
+    def load(cls, user_id, today: Optional[date] = None) -> "MoodSeries":
+        """Read a user's entries up to today; the last SERIES_DAYS go into the dense series"""
+        today = today or date.today()
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT date, mood FROM mood_entries
+            WHERE user_id = ? AND date <= ?
+            ORDER BY date ASC
+        ''', (str(user_id), today.isoformat()))
+        rows = cursor.fetchall()
+        conn.close()
+
+        entries = parse_entry_dates(rows, user_id, today)
+        if not entries:
+            return cls(today, [], today)
+
+        start = max(entries[0][0], today - timedelta(days=SERIES_DAYS - 1))
+        moods = [0] * ((today - start).days + 1)
+        for day, row in entries:
+            if day >= start:
+                moods[(day - start).days] = row['mood']
+        return cls(start, moods, today, _streaks([day for day, _ in entries], today))
+
+    def _range(self, days: int) -> Tuple[int, int]:
+        return max(self.span - days, 0), self.span
+
+    def _sum(self, prefix: list, days: int):
+        lo, hi = self._range(days)
+        return prefix[hi] - prefix[lo]
+
+    def entries(self, days: int) -> int:
+        return self._sum(self.count, days)
+
+    def average(self, days: int) -> float:
+        entries = self.entries(days)
+        return round(self._sum(self.total, days) / entries, 2) if entries else 0.0
+
+    def distribution(self, days: int) -> Dict[int, int]:
+        counts = {value: self._sum(prefix, days) for value, prefix in self.by_mood.items()}
+        return {value: count for value, count in counts.items() if count}
+
+    def slope(self, days: int) -> float:
+        """Least-squares mood change per day over the logged days in the window"""
+        n = self.entries(days)
+        sx, sy = self._sum(self.x, days), self._sum(self.total, days)
+        denominator = n * self._sum(self.xx, days) - sx * sx
+        if n < 2 or denominator == 0:
+            return 0.0
+        return (n * self._sum(self.xy, days) - sx * sy) / denominator
+
+    def summary(self, days: int) -> Dict:
+        """Everything /mood/stats reports, for the `days` days ending today"""
+        distribution = self.distribution(days)
+        weekly_slope = self.slope(days) * 7
+        if weekly_slope > TREND_THRESHOLD:
+            mood_trend = "improving"
+        elif weekly_slope < -TREND_THRESHOLD:
+            mood_trend = "declining"
+        else:
+            mood_trend = "stable"
+
+        return {
+            "average_mood": self.average(days),
+            "total_entries": self.entries(days),
+            "streak_days": self.current_streak,
+            "longest_streak": self.longest_streak,
+            "most_common_mood": max(distribution, key=distribution.get) if distribution else 3,
+            "mood_trend": mood_trend,
+            "trend_slope": round(weekly_slope, 3),
+            "weekly_average": self.average(7),
+            "monthly_average": self.average(30),
+            "window_averages": {str(window): self.average(window) for window in MOOD_WINDOWS},
+            "mood_distribution": distribution
+        }
+
+
+_series_cache = VersionedCache("mood", MOOD_STATS_CACHE_SIZE)
+
+
+def get_mood_series(user_id) -> MoodSeries:
+    """Cached series for a user, reloaded after any mood write or at midnight"""
+    return _series_cache.get_or_load(user_id, lambda today: MoodSeries.load(user_id, today))
+
+
+def get_mood_stats(user_id, days: int = 30) -> Dict:
+    return get_mood_series(user_id).summary(max(days, 1))
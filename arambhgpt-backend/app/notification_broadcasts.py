@@ -0,0 +1,338 @@
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, status
+from typing import Dict, Optional, Tuple
+import json
+import time
+import uuid
+from .auth import verify_admin
+from .database import get_db_connection
+from .models import NotificationBroadcastCreate
+from .notifications import advance_notification_seq, current_notification_seq, publish_new_notifications
+
+router = APIRouter(prefix="/notifications/broadcasts", tags=["notifications"])
+
+# Recipients inserted per transaction; the write lock is released between chunks
+BROADCAST_CHUNK_SIZE = 500
+
+# Pause between chunks so request writers waiting on the lock get a turn
+CHUNK_PAUSE_SECONDS = 0.005
+
+MAX_BROADCAST_USER_IDS = 100000
+
+# A running broadcast with no progress for this long is taken to have died with
+# its process (background tasks do not survive a restart) and may be resumed
+STALE_BROADCAST_MINUTES = 10
+
+# Notification type -> (notification_settings column, its default for users without settings).
+# None means the notification is always delivered.
+BROADCAST_TYPES = {
+    "system": None,
+    "achievement": ("achievements", 1),
+    "social": ("social_updates", 0),
+    "wellness_tip": ("wellness_tips", 1),
+    "mood_reminder": ("mood_reminders", 1),
+}
+
+AUDIENCES = ("all", "group", "users")
+
+
+def init_broadcast_tables():
+    """Initialize notification broadcast jobs"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    # last_key is the keyset position of the last committed chunk, untyped so
+    # it compares as the audience's own key (users.id or group_members.user_id)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS notification_broadcasts (
+            id TEXT PRIMARY KEY,
+            created_by TEXT NOT NULL,
+            type TEXT NOT NULL,
+            title TEXT NOT NULL,
+            message TEXT NOT NULL,
+            priority TEXT DEFAULT 'medium',
+            action_url TEXT,
+            icon TEXT,
+            audience TEXT NOT NULL,
+            group_id TEXT,
+            user_ids TEXT,
+            status TEXT DEFAULT 'pending',
+            total INTEGER,
+            processed INTEGER DEFAULT 0,
+            sent INTEGER DEFAULT 0,
+            last_key,
+            error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            started_at TIMESTAMP,
+            updated_at TIMESTAMP,
+            completed_at TIMESTAMP
+        )
+    ''')
+    # updated_at is touched by every committed chunk, so a stalled run shows its age
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(notification_broadcasts)")}
+    if "updated_at" not in columns:
+        cursor.execute("ALTER TABLE notification_broadcasts ADD COLUMN updated_at TIMESTAMP")
+
+    conn.commit()
+    conn.close()
+
+
+def _audience_sql(broadcast) -> Tuple[str, str, str, list, list, object]:
+    """(FROM clause, keyset column, user id expression, conditions, params, key before the first row)"""
+    if broadcast['audience'] == 'group':
+        return ("group_members a", "a.user_id", "a.user_id",
+                ["a.group_id = ?", "a.status = 'active'"], [broadcast['group_id']], "")
+    if broadcast['audience'] == 'users':
+        return ("users a", "a.id", "CAST(a.id AS TEXT)",
+                ["a.id IN (SELECT value FROM json_each(?))"], [broadcast['user_ids']], 0)
+    return ("users a", "a.id", "CAST(a.id AS TEXT)", [], [], 0)
+
+
+def _where(conditions, *extra) -> str:
+    return " WHERE " + " AND ".join(list(conditions) + list(extra)) if conditions or extra else ""
+
+
+def create_broadcast(created_by: str, request: NotificationBroadcastCreate) -> str:
+    if request.type not in BROADCAST_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Broadcast type must be one of: {', '.join(BROADCAST_TYPES)}"
+        )
+    if request.audience not in AUDIENCES:
+        raise HTTPException(status_code=400, detail=f"Audience must be one of: {', '.join(AUDIENCES)}")
+    if request.audience == 'users' and not request.user_ids:
+        raise HTTPException(status_code=400, detail="user_ids is required for audience 'users'")
+    if len(request.user_ids) > MAX_BROADCAST_USER_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BROADCAST_USER_IDS} user_ids per broadcast; use audience 'all' or 'group'"
+        )
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        if request.audience == 'group':
+            cursor.execute("SELECT 1 FROM support_groups WHERE id = ?", (request.group_id,))
+            if not request.group_id or not cursor.fetchone():
+                raise HTTPException(status_code=404, detail="Group not found")
+
+        broadcast_id = uuid.uuid4().hex
+        cursor.execute('''
+            INSERT INTO notification_broadcasts
+            (id, created_by, type, title, message, priority, action_url, icon, audience, group_id, user_ids)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            broadcast_id, created_by, request.type, request.title, request.message,
+            request.priority, request.action_url, request.icon, request.audience,
+            request.group_id if request.audience == 'group' else None,
+            json.dumps(sorted(set(request.user_ids))) if request.audience == 'users' else None
+        ))
+        conn.commit()
+        return broadcast_id
+    finally:
+        conn.close()
+
+
+def run_broadcast(broadcast_id: str, chunk_size: int = BROADCAST_CHUNK_SIZE):
+    """Insert a broadcast's notifications chunk by chunk; runs as a background task.
+
+    Each chunk is one transaction: find the next chunk_size audience keys,
+    insert notifications for those whose settings allow the type (one
+    INSERT ... SELECT), save the position and commit, then push the new
+    rows to open streams. Ids are 'broadcast_<id>_<user>', so re-running
+    an interrupted broadcast resumes from last_key without duplicates.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM notification_broadcasts WHERE id = ?", (broadcast_id,))
+    broadcast = cursor.fetchone()
+    if not broadcast or broadcast['status'] == 'completed':
+        conn.close()
+        return
+
+    source, key, user_expr, conditions, params, first_key = _audience_sql(broadcast)
+    setting = BROADCAST_TYPES[broadcast['type']]
+    allowed = f"COALESCE(s.{setting[0]}, {setting[1]})" if setting else "1"
+    last_key = broadcast['last_key'] if broadcast['last_key'] is not None else first_key
+
+    try:
+        cursor.execute(f"SELECT COUNT(*) FROM {source}{_where(conditions)}", params)
+        total = cursor.fetchone()[0]
+        cursor.execute('''
+            UPDATE notification_broadcasts
+            SET status = 'running', total = ?, started_at = COALESCE(started_at, CURRENT_TIMESTAMP),
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (total, broadcast_id))
+        conn.commit()
+
+        started = time.perf_counter()
+        while True:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute(f'''
+                SELECT MAX(k), COUNT(*) FROM (
+                    SELECT {key} AS k FROM {source}{_where(conditions, f"{key} > ?")}
+                    ORDER BY {key} LIMIT ?
+                )
+            ''', params + [last_key, chunk_size])
+            chunk_end, chunk_count = cursor.fetchone()
+            if not chunk_count:
+                conn.rollback()
+                break
+
+            before = current_notification_seq(cursor)
+            cursor.execute(f'''
+                INSERT OR IGNORE INTO notifications
+                (id, user_id, type, title, message, priority, action_url, icon, seq)
+                SELECT 'broadcast_' || ? || '_' || {user_expr}, {user_expr}, ?, ?, ?, ?, ?, ?,
+                       ? + row_number() OVER ()
+                FROM {source}
+                LEFT JOIN notification_settings s ON s.user_id = {user_expr}
+                {_where(conditions, f"{key} > ?", f"{key} <= ?", allowed)}
+            ''', [
+                broadcast_id, broadcast['type'], broadcast['title'], broadcast['message'],
+                broadcast['priority'], broadcast['action_url'], broadcast['icon'], before
+            ] + params + [last_key, chunk_end])
+            sent = cursor.rowcount
+            advance_notification_seq(cursor)
+
+            cursor.execute('''
+                UPDATE notification_broadcasts
+                SET processed = processed + ?, sent = sent + ?, last_key = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (chunk_count, sent, chunk_end, broadcast_id))
+            conn.commit()
+            last_key = chunk_end
+
+            if sent:
+                publish_new_notifications(cursor, before)
+            time.sleep(CHUNK_PAUSE_SECONDS)
+
+        cursor.execute('''
+            UPDATE notification_broadcasts SET status = 'completed', completed_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (broadcast_id,))
+        conn.commit()
+        cursor.execute("SELECT sent, processed FROM notification_broadcasts WHERE id = ?", (broadcast_id,))
+        sent, processed = cursor.fetchone()
+        print(f"📣 Broadcast {broadcast_id} sent {sent} of {processed} recipients "
+              f"in {time.perf_counter() - started:.1f}s")
+    except Exception as e:
+        conn.rollback()
+        cursor.execute("UPDATE notification_broadcasts SET status = 'failed', error = ? WHERE id = ?",
+                       (str(e), broadcast_id))
+        conn.commit()
+        print(f"❌ Broadcast {broadcast_id} failed: {e}")
+    finally:
+        conn.close()
+
+
+def broadcast_to_dict(row) -> Dict:
+    total = row['total']
+    return {
+        "id": row['id'],
+        "type": row['type'],
+        "title": row['title'],
+        "audience": row['audience'],
+        "group_id": row['group_id'],
+        "status": row['status'],
+        "total": total,
+        "processed": row['processed'],
+        "sent": row['sent'],
+        # Turned off in the recipient's settings, or already sent before a resume
+        "skipped": row['processed'] - row['sent'],
+        "progress": round(row['processed'] / total, 4) if total else (1.0 if row['status'] == 'completed' else 0.0),
+        "error": row['error'],
+        "created_by": row['created_by'],
+        "created_at": row['created_at'],
+        "started_at": row['started_at'],
+        "updated_at": row['updated_at'],
+        "completed_at": row['completed_at']
+    }
+
+
+def claim_for_resume(broadcast_id: str) -> bool:
+    """Mark a failed or stale broadcast pending again; False if it is neither.
+
+    One conditional UPDATE, so two resume calls cannot both start a run.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute('''
+            UPDATE notification_broadcasts
+            SET status = 'pending', error = NULL, updated_at = CURRENT_TIMESTAMP
+            WHERE id = ? AND (
+                status = 'failed'
+                OR (status IN ('pending', 'running')
+                    AND COALESCE(updated_at, started_at, created_at) < datetime('now', ?))
+            )
+        ''', (broadcast_id, f"-{STALE_BROADCAST_MINUTES} minutes"))
+        conn.commit()
+        return cursor.rowcount > 0
+    finally:
+        conn.close()
+
+
+def get_broadcast(broadcast_id: str) -> Optional[Dict]:
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM notification_broadcasts WHERE id = ?", (broadcast_id,))
+    row = cursor.fetchone()
+    conn.close()
+    return broadcast_to_dict(row) if row else None
+
+
+@router.post("/", status_code=status.HTTP_202_ACCEPTED)
+async def create_notification_broadcast(
+    request: NotificationBroadcastCreate,
+    background_tasks: BackgroundTasks,
+    email: str = Depends(verify_admin)
+):
+    """Send a notification to all users, a group's members or a list of user ids"""
+    broadcast_id = create_broadcast(email, request)
+    background_tasks.add_task(run_broadcast, broadcast_id)
+    return {
+        "id": broadcast_id,
+        "status": "pending",
+        "status_url": f"/notifications/broadcasts/{broadcast_id}"
+    }
+
+
+@router.post("/{broadcast_id}/resume", status_code=status.HTTP_202_ACCEPTED)
+async def resume_notification_broadcast(
+    broadcast_id: str,
+    background_tasks: BackgroundTasks,
+    email: str = Depends(verify_admin)
+):
+    """Continue a failed or interrupted broadcast from its last committed chunk.
+
+    A broadcast still marked pending or running counts as interrupted once it has made
+    no progress for STALE_BROADCAST_MINUTES, e.g. after a restart.
+    """
+    broadcast = get_broadcast(broadcast_id)
+    if not broadcast:
+        raise HTTPException(status_code=404, detail="Broadcast not found")
+    if not claim_for_resume(broadcast_id):
+        raise HTTPException(
+            status_code=409,
+            detail=f"Broadcast is {broadcast['status']}; only failed broadcasts or unfinished ones "
+                   f"without progress for {STALE_BROADCAST_MINUTES} minutes can be resumed"
+        )
+    background_tasks.add_task(run_broadcast, broadcast_id)
+    return {"id": broadcast_id, "status": "pending", "status_url": f"/notifications/broadcasts/{broadcast_id}"}
+
+
+@router.get("/{broadcast_id}")
+async def get_notification_broadcast(
+    broadcast_id: str,
+    email: str = Depends(verify_admin)
+):
+    """Progress of a broadcast: recipients processed, sent and skipped by settings"""
+    broadcast = get_broadcast(broadcast_id)
+    if not broadcast:
+        raise HTTPException(status_code=404, detail="Broadcast not found")
+    return broadcast
+
+
+# Initialize tables on import
+init_broadcast_tables()
@@ -0,0 +1,106 @@
+from typing import Dict, Iterable, Optional, Set, Tuple
+import asyncio
+import json
+import threading
+
+# Events a subscriber may fall behind before it is dropped
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class Subscription:
+    """One connected stream: a queue on the event loop that opened it"""
+
+    def __init__(self, user_id: str, queue_size: int):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.closed = False
+
+    def deliver(self, item):
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            # Too far behind: end the stream and let the client replay from the database
+            self.closed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+class NotificationBus:
+    """In-process pub/sub of notification events, one topic per user.
+
+    publish() may be called from any thread; items are handed to each
+    subscriber's own event loop. Nothing is persisted here: the
+    notifications table is the replay log for reconnecting clients.
+    """
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id) -> Subscription:
+        subscription = Subscription(str(user_id), self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(subscription.user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def is_subscribed(self, user_id) -> bool:
+        return str(user_id) in self._subscribers
+
+    def subscribed_users(self) -> Set[str]:
+        with self._lock:
+            return set(self._subscribers)
+
+    def publish_batch(self, items: Iterable[Tuple[str, str, Dict, Optional[int]]]):
+        """Publish many (user_id, event, data, event_id) items with one wake-up per event loop"""
+        by_loop: Dict[asyncio.AbstractEventLoop, list] = {}
+        with self._lock:
+            for user_id, event, data, event_id in items:
+                for subscription in self._subscribers.get(str(user_id), ()):
+                    by_loop.setdefault(subscription.loop, []).append((subscription, (event, data, event_id)))
+        for loop, deliveries in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(self._deliver_all, deliveries)
+            except RuntimeError:
+                for subscription, _ in deliveries:
+                    self.unsubscribe(subscription)
+
+    @staticmethod
+    def _deliver_all(deliveries):
+        for subscription, item in deliveries:
+            subscription.deliver(item)
+
+    def publish(self, user_id, event: str, data: Dict, event_id: Optional[int] = None):
+        """Send an event to every open stream of a user; a no-op when none are open"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(str(user_id), ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, (event, data, event_id))
+            except RuntimeError:
+                # The subscriber's loop has closed; its stream is gone
+                self.unsubscribe(subscription)
+
+
+def format_event(event: str, data: Dict, event_id: Optional[int] = None) -> str:
+    """Serialize one server-sent event"""
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+notification_bus = NotificationBus()
@@ -1,13 +1,26 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Header, Request, Response, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Dict, List, Optional
 from datetime import datetime, timedelta
+from jose import JWTError, jwt
+import asyncio
 import sqlite3
 import json
-from .auth import verify_token, get_user_by_email
+import uuid
+from .auth import verify_token, get_user_by_email, create_access_token, SECRET_KEY, ALGORITHM
 from .database import get_db_connection
+from .pagination import KeysetPage
+from .resource_versions import conditional_get, track_table_versions
+from .notification_bus import notification_bus, format_event
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 
+STREAM_TOKEN_MINUTES = 15
+HEARTBEAT_SECONDS = 15
+# Missed notifications resent on reconnect; beyond this the client reloads the list
+REPLAY_LIMIT = 100
+
 def init_notification_tables():
     """Initialize notification tables"""
     conn = get_db_connection()
@@ -29,6 +42,10 @@ def init_notification_tables():
             FOREIGN KEY (user_id) REFERENCES users (id)
         )
     ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_notifications_user_created
+        ON notifications (user_id, created_at, id)
+    ''')
     
     # Create notification_settings table
     cursor.execute('''
@@ -46,9 +63,237 @@ def init_notification_tables():
             FOREIGN KEY (user_id) REFERENCES users (id)
         )
     ''')
+    track_table_versions(cursor, 'notifications', 'notifications')
+    init_notification_sequence(cursor)
+    is_new = init_notification_counters(cursor)
+    
+    conn.commit()
+    conn.close()
+    
+    # Existing notifications predate the triggers
+    if is_new:
+        rebuild_notification_counters()
+
+def init_notification_sequence(cursor):
+    """Explicit, ever-increasing seq on notifications, assigned by trigger.
+
+    The TEXT primary key leaves rowid implicit: VACUUM may renumber it and
+    deleting the newest row lets its rowid be reused. Read watermarks and
+    stream event ids use seq instead, taken from a counter that never
+    moves back. Bulk writers number their rows themselves (see
+    advance_notification_seq), so the per-row trigger only fires for
+    single inserts.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS notification_sequence (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            value INTEGER NOT NULL
+        )
+    ''')
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(notifications)")}
+    if "seq" not in columns:
+        cursor.execute("ALTER TABLE notifications ADD COLUMN seq INTEGER")
+        # Watermarks and clients' last event ids were rowids until now; keep them valid
+        cursor.execute("UPDATE notifications SET seq = rowid")
+    cursor.execute('''
+        INSERT OR IGNORE INTO notification_sequence (id, value)
+        SELECT 1, COALESCE(MAX(seq), 0) FROM notifications
+    ''')
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_notifications_seq ON notifications (seq)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_notifications_user_seq ON notifications (user_id, seq)")
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS notifications_assign_seq
+        AFTER INSERT ON notifications
+        WHEN NEW.seq IS NULL
+        BEGIN
+            UPDATE notification_sequence SET value = value + 1 WHERE id = 1;
+            UPDATE notifications SET seq = (SELECT value FROM notification_sequence WHERE id = 1)
+            WHERE id = NEW.id;
+        END
+    ''')
+
+def current_notification_seq(cursor) -> int:
+    """The seq of the newest notification ever created"""
+    cursor.execute("SELECT value FROM notification_sequence WHERE id = 1")
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+def advance_notification_seq(cursor):
+    """Move the counter past seqs a bulk insert assigned itself.
+
+    Bulk inserts set seq = current_notification_seq() + row_number() OVER ()
+    in the same write transaction, which skips two row updates per
+    notification in the trigger; this then catches the counter up.
+    """
+    cursor.execute('''
+        UPDATE notification_sequence
+        SET value = MAX(value, (SELECT COALESCE(MAX(seq), 0) FROM notifications))
+        WHERE id = 1
+    ''')
+
+def init_notification_counters(cursor) -> bool:
+    """Per-user unread counter and read watermark, kept current by triggers.
+
+    A notification is read when is_read is set or its seq is at or
+    below the user's read_watermark, so mark-all-read is one row update.
+    Returns True when the counter table was just created.
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'notification_counters'")
+    is_new = cursor.fetchone() is None
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS notification_counters (
+            user_id TEXT PRIMARY KEY,
+            unread_count INTEGER DEFAULT 0,
+            read_watermark INTEGER DEFAULT 0
+        )
+    ''')
+    # Recreated rather than IF NOT EXISTS: earlier versions keyed these on rowid
+    for trigger in ("notifications_read_counters", "notifications_delete_counters"):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    cursor.execute("DROP VIEW IF EXISTS notifications_read_state")
+    cursor.execute('''
+        CREATE VIEW notifications_read_state AS
+        SELECT n.seq AS event_id, n.id, n.user_id, n.type, n.title, n.message,
+               (COALESCE(n.is_read, 0) OR n.seq <= COALESCE(c.read_watermark, 0)) AS is_read,
+               n.priority, n.action_url, n.icon, n.created_at
+        FROM notifications n
+        LEFT JOIN notification_counters c ON c.user_id = n.user_id
+    ''')
+    
+    # New rows are always above the watermark
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS notifications_insert_counters
+        AFTER INSERT ON notifications
+        BEGIN
+            INSERT INTO notification_counters (user_id, unread_count)
+            VALUES (NEW.user_id, CASE WHEN COALESCE(NEW.is_read, 0) THEN 0 ELSE 1 END)
+            ON CONFLICT(user_id) DO UPDATE SET unread_count = unread_count + excluded.unread_count;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER notifications_read_counters
+        AFTER UPDATE OF is_read ON notifications
+        WHEN COALESCE(OLD.is_read, 0) != COALESCE(NEW.is_read, 0)
+         AND OLD.seq > COALESCE((SELECT read_watermark FROM notification_counters WHERE user_id = OLD.user_id), 0)
+        BEGIN
+            UPDATE notification_counters
+            SET unread_count = unread_count + CASE WHEN NEW.is_read THEN -1 ELSE 1 END
+            WHERE user_id = NEW.user_id;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER notifications_delete_counters
+        AFTER DELETE ON notifications
+        WHEN NOT COALESCE(OLD.is_read, 0)
+         AND OLD.seq > COALESCE((SELECT read_watermark FROM notification_counters WHERE user_id = OLD.user_id), 0)
+        BEGIN
+            UPDATE notification_counters SET unread_count = unread_count - 1 WHERE user_id = OLD.user_id;
+        END
+    ''')
+    # Watermark moves do not touch notifications, so they bump the version themselves
+    track_table_versions(cursor, 'notification_counters', 'notifications')
+    return is_new
+
+def rebuild_notification_counters(user_id: Optional[str] = None) -> Dict[str, int]:
+    """Recount unread notifications from the rows, keeping each watermark. Safe to re-run"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    user_filter = " WHERE user_id = ?" if user_id else ""
+    params = (str(user_id),) if user_id else ()
+    
+    cursor.execute(f'''
+        INSERT INTO notification_counters (user_id, unread_count)
+        SELECT DISTINCT user_id, 0 FROM notifications{user_filter or " WHERE true"}
+        ON CONFLICT(user_id) DO NOTHING
+    ''', params)
+    cursor.execute(f'''
+        UPDATE notification_counters SET unread_count = (
+            SELECT COUNT(*) FROM notifications n
+            WHERE n.user_id = notification_counters.user_id
+              AND NOT COALESCE(n.is_read, 0) AND n.seq > notification_counters.read_watermark
+        ){user_filter}
+    ''', params)
+    cursor.execute(
+        "SELECT COUNT(*), COALESCE(SUM(unread_count), 0) FROM notification_counters" + user_filter,
+        params
+    )
+    users, unread = cursor.fetchone()
     
     conn.commit()
     conn.close()
+    return {'users': users, 'unread': unread}
+
+def notification_to_dict(row) -> Dict:
+    return {
+        "id": row['id'],
+        "user_id": row['user_id'],
+        "type": row['type'],
+        "title": row['title'],
+        "message": row['message'],
+        "is_read": bool(row['is_read']),
+        "priority": row['priority'],
+        "action_url": row['action_url'],
+        "icon": row['icon'],
+        "created_at": row['created_at']
+    }
+
+def count_unread(cursor, user_id: str) -> int:
+    cursor.execute("SELECT unread_count FROM notification_counters WHERE user_id = ?", (user_id,))
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+def publish_unread_count(cursor, user_id: str):
+    """Push the current unread count to the user's open streams, if any"""
+    if notification_bus.is_subscribed(user_id):
+        notification_bus.publish(user_id, "unread_count", {"unread_count": count_unread(cursor, user_id)})
+
+def publish_notifications(cursor, user_id: str, seqs: List[int]):
+    """Push newly created notifications (by seq) and the new unread count"""
+    if not seqs or not notification_bus.is_subscribed(user_id):
+        return
+    cursor.execute(f'''
+        SELECT event_id, id, user_id, type, title, message, is_read, priority,
+               action_url, icon, created_at
+        FROM notifications_read_state WHERE event_id IN ({",".join("?" for _ in seqs)})
+        ORDER BY event_id
+    ''', seqs)
+    for row in cursor.fetchall():
+        notification_bus.publish(user_id, "notification", notification_to_dict(row), row['event_id'])
+    publish_unread_count(cursor, user_id)
+
+def publish_new_notifications(cursor, after_seq: int, chunk_size: int = 500) -> int:
+    """Fan out every notification created after a seq to the users with open streams.
+
+    Bulk writers (scheduler, broadcasts) call this once after committing.
+    Only subscribed users are queried, through the per-user index, so
+    the cost follows connected users rather than rows inserted.
+    """
+    subscribed = sorted(notification_bus.subscribed_users())
+    items = []
+    for start in range(0, len(subscribed), chunk_size):
+        users = subscribed[start:start + chunk_size]
+        placeholders = ",".join("?" for _ in users)
+        cursor.execute(f'''
+            SELECT event_id, id, user_id, type, title, message, is_read, priority,
+                   action_url, icon, created_at
+            FROM notifications_read_state
+            WHERE user_id IN ({placeholders}) AND event_id > ?
+            ORDER BY event_id
+        ''', users + [after_seq])
+        rows = cursor.fetchall()
+        if not rows:
+            continue
+        notified = sorted({row['user_id'] for row in rows})
+        items += [(row['user_id'], "notification", notification_to_dict(row), row['event_id']) for row in rows]
+        cursor.execute(
+            f"SELECT user_id, unread_count FROM notification_counters WHERE user_id IN ({','.join('?' for _ in notified)})",
+            notified
+        )
+        items += [(row['user_id'], "unread_count", {"unread_count": row['unread_count']}, None) for row in cursor.fetchall()]
+    notification_bus.publish_batch(items)
+    return len(items)
 
 @router.post("/")
 async def create_notification(
@@ -64,7 +309,8 @@ async def create_notification(
     cursor = conn.cursor()
     
     try:
-        notification_id = f"notif_{user['id']}_{int(datetime.now().timestamp())}"
+        # A seconds timestamp alone collided when two arrived in the same second
+        notification_id = f"notif_{user['id']}_{int(datetime.now().timestamp())}_{uuid.uuid4().hex[:8]}"
         
         cursor.execute('''
             INSERT INTO notifications 
@@ -82,27 +328,17 @@ async def create_notification(
         
         # Fetch the created notification
         cursor.execute('''
-            SELECT id, user_id, type, title, message, is_read, priority, 
+            SELECT event_id, id, user_id, type, title, message, is_read, priority, 
                    action_url, icon, created_at
-            FROM notifications WHERE id = ?
+            FROM notifications_read_state WHERE id = ?
         ''', (notification_id,))
         
         row = cursor.fetchone()
         if not row:
             raise HTTPException(status_code=404, detail="Failed to create notification")
         
-        return {
-            "id": row[0],
-            "user_id": row[1],
-            "type": row[2],
-            "title": row[3],
-            "message": row[4],
-            "is_read": bool(row[5]),
-            "priority": row[6],
-            "action_url": row[7],
-            "icon": row[8],
-            "created_at": row[9]
-        }
+        publish_notifications(cursor, str(user['id']), [row['event_id']])
+        return notification_to_dict(row)
         
     except Exception as e:
         conn.rollback()
@@ -112,8 +348,11 @@ async def create_notification(
 
 @router.get("/")
 async def get_notifications(
+    request: Request,
+    response: Response,
     limit: int = 50,
     unread_only: bool = False,
+    cursor: Optional[str] = None,
     email: str = Depends(verify_token)
 ):
     """Get notifications for the current user"""
@@ -121,26 +360,36 @@ async def get_notifications(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
+    keyset = KeysetPage(f"notifications:{user['id']}", "created_at", "id", limit, cursor)
+    
+    not_modified = conditional_get(request, response, user['id'], "notifications")
+    if not_modified:
+        return not_modified
+    
     conn = get_db_connection()
-    cursor = conn.cursor()
+    db_cursor = conn.cursor()
     
     try:
         query = '''
             SELECT id, user_id, type, title, message, is_read, priority, 
-                   action_url, icon, created_at
-            FROM notifications 
+                   action_url, icon, created_at, event_id
+            FROM notifications_read_state 
             WHERE user_id = ?
         '''
         params = [str(user['id'])]
         
         if unread_only:
-            query += " AND is_read = FALSE"
+            query += " AND NOT is_read"
         
-        query += " ORDER BY created_at DESC LIMIT ?"
-        params.append(limit)
+        query += keyset.where_sql() + keyset.order_limit_sql()
+        params.extend(keyset.params + [keyset.fetch_size])
         
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
+        db_cursor.execute(query, params)
+        rows, next_cursor = keyset.finish(db_cursor.fetchall())
+        
+        # The body stays a plain list; the next page cursor travels in a header
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         
         notifications = []
         for row in rows:
@@ -154,7 +403,10 @@ async def get_notifications(
                 "priority": row[6],
                 "action_url": row[7],
                 "icon": row[8],
-                "created_at": row[9]
+                "created_at": row[9],
+                # Stream position of this row: pass the newest as last_event_id
+                # when opening /stream so nothing created after this read is missed
+                "event_id": row[10]
             })
         
         return notifications
@@ -185,6 +437,8 @@ async def mark_notification_read(
             raise HTTPException(status_code=404, detail="Notification not found")
         
         conn.commit()
+        notification_bus.publish(user['id'], "read", {"ids": [notification_id]})
+        publish_unread_count(cursor, str(user['id']))
         return {"message": "Notification marked as read"}
         
     finally:
@@ -203,13 +457,20 @@ async def mark_all_notifications_read(
     cursor = conn.cursor()
     
     try:
-        cursor.execute(
-            "UPDATE notifications SET is_read = TRUE WHERE user_id = ?",
-            (str(user['id']),)
-        )
+        cursor.execute("BEGIN IMMEDIATE")
+        marked = count_unread(cursor, str(user['id']))
         
+        # Move the watermark instead of rewriting every row
+        cursor.execute('''
+            UPDATE notification_counters
+            SET read_watermark = (SELECT COALESCE(MAX(seq), 0) FROM notifications WHERE user_id = ?),
+                unread_count = 0
+            WHERE user_id = ?
+        ''', (str(user['id']), str(user['id'])))
         conn.commit()
-        return {"message": f"Marked {cursor.rowcount} notifications as read"}
+        notification_bus.publish(user['id'], "read", {"all": True})
+        publish_unread_count(cursor, str(user['id']))
+        return {"message": f"Marked {marked} notifications as read"}
         
     finally:
         conn.close()
@@ -331,6 +592,8 @@ async def update_notification_settings(
 
 @router.get("/unread-count")
 async def get_unread_count(
+    request: Request,
+    response: Response,
     email: str = Depends(verify_token)
 ):
     """Get count of unread notifications"""
@@ -338,20 +601,117 @@ async def get_unread_count(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
+    not_modified = conditional_get(request, response, user['id'], "notifications")
+    if not_modified:
+        return not_modified
+    
     conn = get_db_connection()
     cursor = conn.cursor()
     
     try:
-        cursor.execute(
-            "SELECT COUNT(*) FROM notifications WHERE user_id = ? AND is_read = FALSE",
-            (str(user['id']),)
-        )
-        
-        count = cursor.fetchone()[0]
-        return {"unread_count": count}
+        return {"unread_count": count_unread(cursor, str(user['id']))}
         
     finally:
         conn.close()
 
+@router.get("/stream-token")
+async def get_stream_token(
+    email: str = Depends(verify_token)
+):
+    """Short-lived token for /notifications/stream, since EventSource cannot send headers"""
+    user = get_user_by_email(email)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    # No 'sub', so it cannot be used as a login token
+    token = create_access_token(
+        {"notification_stream": str(user['id'])},
+        expires_delta=timedelta(minutes=STREAM_TOKEN_MINUTES)
+    )
+    return {"token": token, "expires_in": STREAM_TOKEN_MINUTES * 60}
+
+@router.get("/stream")
+async def stream_notifications(
+    token: str,
+    last_event_id: Optional[int] = None,
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID")
+):
+    """Server-sent events: new notifications, unread count changes and read receipts.
+
+    Event ids are notification seqs. On reconnect the browser sends
+    Last-Event-ID (or the client passes last_event_id) and everything
+    created since is replayed before live events resume.
+    """
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Stream token is invalid or expired")
+    user_id = payload.get("notification_stream")
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Stream token is invalid or expired")
+    
+    if last_event_id_header and last_event_id_header.isdigit():
+        last_event_id = int(last_event_id_header)
+    
+    def load_initial():
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            replay = []
+            if last_event_id is not None:
+                cursor.execute('''
+                    SELECT event_id, id, user_id, type, title, message, is_read, priority,
+                           action_url, icon, created_at
+                    FROM notifications_read_state
+                    WHERE user_id = ? AND event_id > ?
+                    ORDER BY event_id
+                    LIMIT ?
+                ''', (user_id, last_event_id, REPLAY_LIMIT + 1))
+                replay = cursor.fetchall()
+            cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM notifications WHERE user_id = ?", (user_id,))
+            return replay, cursor.fetchone()[0], count_unread(cursor, user_id)
+        finally:
+            conn.close()
+    
+    async def events():
+        # Subscribe before reading so nothing created meanwhile is lost;
+        # anything both replayed and queued is skipped by its id
+        subscription = notification_bus.subscribe(user_id)
+        try:
+            # Replay and count queries run in the threadpool, off the event loop
+            replay, watermark, unread_count = await run_in_threadpool(load_initial)
+            
+            yield "retry: 3000\n\n"
+            if len(replay) > REPLAY_LIMIT:
+                yield format_event("reset", {"reason": "too many missed notifications"}, watermark)
+            else:
+                for row in replay:
+                    yield format_event("notification", notification_to_dict(row), row['event_id'])
+            yield format_event("unread_count", {"unread_count": unread_count}, watermark)
+            
+            while True:
+                try:
+                    item = await asyncio.wait_for(subscription.queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if item is None:
+                    # Fell too far behind; the client reconnects and replays
+                    break
+                event, data, event_id = item
+                if event_id is not None:
+                    if event_id <= watermark:
+                        continue
+                    watermark = event_id
+                yield format_event(event, data, event_id)
+        finally:
+            notification_bus.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # Initialize tables when module is imported
 init_notification_tables()
\ No newline at end of file
@@ -0,0 +1,88 @@
+from fastapi import HTTPException
+from typing import List, Optional, Tuple
+import base64
+import hashlib
+import hmac
+import json
+from .auth import SECRET_KEY
+
+MAX_PAGE_SIZE = 200
+SIGNATURE_BYTES = 12
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(scope: str, payload: bytes) -> bytes:
+    return hmac.new(SECRET_KEY.encode(), scope.encode() + b"|" + payload, hashlib.sha256).digest()[:SIGNATURE_BYTES]
+
+
+def encode_cursor(scope: str, sort_key, row_id) -> str:
+    """Opaque cursor for the row after which the next page starts"""
+    payload = json.dumps([sort_key, row_id], separators=(",", ":")).encode()
+    return f"{_b64encode(payload)}.{_b64encode(_sign(scope, payload))}"
+
+
+def decode_cursor(scope: str, cursor: str) -> Tuple:
+    """Verify a cursor was issued for this scope and return its (sort_key, id)"""
+    try:
+        payload_text, signature_text = cursor.split(".", 1)
+        payload = _b64decode(payload_text)
+        if not hmac.compare_digest(_b64decode(signature_text), _sign(scope, payload)):
+            raise ValueError("bad signature")
+        sort_key, row_id = json.loads(payload)
+        return sort_key, row_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+class KeysetPage:
+    """Keyset pagination over (sort_column, id_column) with signed cursors.
+
+    The scope (endpoint plus owner) is part of the signature, so a cursor
+    cannot be replayed against another endpoint or another user's list.
+    """
+
+    def __init__(self, scope: str, sort_column: str, id_column: str, limit: int,
+                 cursor: Optional[str] = None, descending: bool = True):
+        self.scope = scope
+        self.sort_column = sort_column
+        self.id_column = id_column
+        self.limit = max(1, min(limit, MAX_PAGE_SIZE))
+        self.descending = descending
+        self.after = decode_cursor(scope, cursor) if cursor else None
+
+    def where_sql(self) -> str:
+        """' AND (sort, id) < (?, ?)' for the page after the cursor, else ''"""
+        if not self.after:
+            return ""
+        operator = "<" if self.descending else ">"
+        return f" AND ({self.sort_column}, {self.id_column}) {operator} (?, ?)"
+
+    @property
+    def params(self) -> List:
+        return list(self.after) if self.after else []
+
+    def order_limit_sql(self) -> str:
+        direction = "DESC" if self.descending else "ASC"
+        return f" ORDER BY {self.sort_column} {direction}, {self.id_column} {direction} LIMIT ?"
+
+    @property
+    def fetch_size(self) -> int:
+        # One extra row tells us whether another page exists
+        return self.limit + 1
+
+    def finish(self, rows: List) -> Tuple[List, Optional[str]]:
+        """Trim the look-ahead row and build next_cursor from the last row kept"""
+        if len(rows) <= self.limit:
+            return rows, None
+        rows = rows[:self.limit]
+        last = rows[-1]
+        sort_field = self.sort_column.split(".")[-1]
+        id_field = self.id_column.split(".")[-1]
+        return rows, encode_cursor(self.scope, last[sort_field], last[id_field])
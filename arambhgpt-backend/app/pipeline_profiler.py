@@ -0,0 +1,87 @@
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+import os
+import random
+import threading
+import time
+from .latency_stats import LatencyHistogram
+
+# Fraction of requests that also keep a detailed per-stage trace
+TRACE_SAMPLE_RATE = float(os.getenv("PIPELINE_TRACE_SAMPLE_RATE", "0.01"))
+MAX_TRACES = 50
+
+# Trace of the request currently running in this context, if sampled
+_current_trace: ContextVar[Optional[Dict]] = ContextVar("pipeline_trace", default=None)
+
+
+class PipelineProfiler:
+    """Per-stage latency histograms with sampled request traces"""
+
+    def __init__(self, sample_rate: float = TRACE_SAMPLE_RATE, max_traces: int = MAX_TRACES):
+        self.sample_rate = sample_rate
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.traces = deque(maxlen=max_traces)
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str) -> LatencyHistogram:
+        """Get or create the histogram for a stage"""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(name, LatencyHistogram())
+        return histogram
+
+    @contextmanager
+    def request(self, name: str):
+        """Time a whole request and maybe start a detailed trace for it"""
+        trace = None
+        if self.sample_rate and random.random() < self.sample_rate:
+            trace = {"request": name, "started_at": time.time(), "stages": []}
+        token = _current_trace.set(trace)
+        start = time.perf_counter()
+        try:
+            yield trace
+        finally:
+            elapsed = time.perf_counter() - start
+            _current_trace.reset(token)
+            self.histogram(name).record(elapsed)
+            if trace is not None:
+                trace["total_ms"] = round(elapsed * 1000, 3)
+                self.traces.append(trace)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time one pipeline stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.histogram(name).record(elapsed)
+            trace = _current_trace.get()
+            if trace is not None:
+                trace["stages"].append({"stage": name, "ms": round(elapsed * 1000, 3)})
+
+    def get_stats(self, include_traces: bool = True) -> Dict:
+        """p50/p95/p99 per stage plus the most recent sampled traces"""
+        stats = {
+            "sample_rate": self.sample_rate,
+            "stages": {
+                name: histogram.summary()
+                for name, histogram in sorted(self.histograms.items())
+            }
+        }
+        if include_traces:
+            stats["traces"] = list(self.traces)
+        return stats
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.traces.clear()
+
+
+# Shared profiler for the chat pipeline
+profiler = PipelineProfiler()
@@ -0,0 +1,246 @@
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from zoneinfo import ZoneInfo
+import os
+import threading
+import time
+from .database import get_db_connection
+from .latency_stats import LatencyHistogram
+from .notifications import advance_notification_seq, current_notification_seq, publish_new_notifications
+
+# reminder_time is a wall-clock time; this is the clock it is read on
+REMINDER_TIMEZONE = ZoneInfo(os.getenv("REMINDER_TIMEZONE", "Asia/Kolkata"))
+
+# Daily wellness tips go out to everyone who enabled them at this minute
+WELLNESS_TIP_TIME = os.getenv("WELLNESS_TIP_TIME", "10:00")
+
+# Weekly reminders are sent on this weekday (Monday = 0)
+WEEKLY_REMINDER_WEEKDAY = 6
+
+# Slots missed during downtime older than this are skipped, not sent late
+MAX_CATCH_UP_MINUTES = 360
+
+WELLNESS_TIPS = [
+    "Take 5 deep breaths to reduce stress",
+    "Drink a glass of water to stay hydrated",
+    "Step outside for some fresh air",
+    "Practice gratitude by listing 3 things you're thankful for",
+    "Take a 5-minute break from screens"
+]
+
+
+def _minute_of_day(hhmm: str) -> int:
+    hours, minutes = hhmm.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def init_reminder_tables():
+    """Index notification settings by reminder minute and track the last processed slot"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    # table_info leaves out generated columns; table_xinfo lists them
+    columns = {row[1] for row in cursor.execute("PRAGMA table_xinfo(notification_settings)")}
+    # The minute of day is the bucket in a 1440-slot timing wheel; the
+    # index means a tick reads only its own bucket, whatever the user count
+    if "reminder_minute" not in columns:
+        cursor.execute('''
+            ALTER TABLE notification_settings ADD COLUMN reminder_minute INTEGER
+            GENERATED ALWAYS AS (
+                CAST(substr(reminder_time, 1, instr(reminder_time, ':') - 1) AS INTEGER) * 60
+                + CAST(substr(reminder_time, instr(reminder_time, ':') + 1) AS INTEGER)
+            ) VIRTUAL
+        ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_notification_settings_minute
+        ON notification_settings (reminder_minute)
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS reminder_scheduler_state (
+            name TEXT PRIMARY KEY,
+            last_slot TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    conn.commit()
+    conn.close()
+
+
+class ReminderScheduler:
+    """Sends mood reminders and wellness tips one minute-bucket at a time.
+
+    Each tick processes every slot (local minute) since the last one it
+    recorded: one INSERT ... SELECT per kind creates the whole bucket's
+    notifications in SQL, and one batched publish pushes them to the users
+    with open streams. Notification ids are derived from user, kind and
+    date, so a slot processed twice (a crash before the state update, or
+    two workers) inserts nothing new.
+    """
+
+    def __init__(self, name: str = "reminders"):
+        self.name = name
+        self.tick_latency = LatencyHistogram()
+        self.slot_lag = LatencyHistogram()
+        self.slots_processed = 0
+        self.notifications_created = 0
+        self.catch_ups = deque(maxlen=20)
+        self.last_slot: Optional[Dict] = None
+        self._scheduler = None
+        self._lock = threading.Lock()
+
+    def now_slot(self) -> datetime:
+        """The current local minute, as a naive datetime"""
+        return datetime.now(REMINDER_TIMEZONE).replace(second=0, microsecond=0, tzinfo=None)
+
+    def run_due_slots(self, now: Optional[datetime] = None) -> Dict:
+        """Process every slot from the last recorded one up to now"""
+        # Overlapping runs would only find nothing to do; skip them outright
+        if not self._lock.acquire(blocking=False):
+            return {"processed": 0, "skipped": 0}
+        try:
+            now = now or self.now_slot()
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            cursor.execute("SELECT last_slot FROM reminder_scheduler_state WHERE name = ?", (self.name,))
+            row = cursor.fetchone()
+            conn.close()
+
+            # First run: start from now rather than replaying history
+            last = datetime.fromisoformat(row['last_slot']) if row else now - timedelta(minutes=1)
+            first = last + timedelta(minutes=1)
+            skipped = 0
+            if now - first > timedelta(minutes=MAX_CATCH_UP_MINUTES):
+                oldest = now - timedelta(minutes=MAX_CATCH_UP_MINUTES)
+                skipped = int((oldest - first).total_seconds() // 60)
+                first = oldest
+
+            processed = 0
+            slot = first
+            while slot <= now:
+                self.process_slot(slot, now)
+                processed += 1
+                slot += timedelta(minutes=1)
+
+            if processed > 1 or skipped:
+                catch_up = {
+                    "at": now.isoformat(),
+                    "down_since": last.isoformat(),
+                    "slots_caught_up": processed,
+                    "slots_skipped": skipped
+                }
+                self.catch_ups.append(catch_up)
+                print(f"⏰ Reminder catch-up: {processed} slots sent, {skipped} skipped since {last.isoformat()}")
+            return {"processed": processed, "skipped": skipped}
+        finally:
+            self._lock.release()
+
+    def process_slot(self, slot: datetime, now: Optional[datetime] = None) -> int:
+        """Create and push one minute's reminders; returns notifications created"""
+        started = time.perf_counter()
+        minute = slot.hour * 60 + slot.minute
+        slot_date = slot.date().isoformat()
+
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            before = current_notification_seq(cursor)
+
+            # Users who already logged today's mood are not reminded
+            cursor.execute('''
+                INSERT OR IGNORE INTO notifications
+                (id, user_id, type, title, message, priority, action_url, icon, seq)
+                SELECT 'reminder_mood_' || s.user_id || '_' || ?, s.user_id, 'mood_reminder',
+                       'Daily Mood Check-in',
+                       'How are you feeling today? Take a moment to log your mood.',
+                       'medium', '/mood', '😊', ? + row_number() OVER ()
+                FROM notification_settings s
+                WHERE s.reminder_minute = ?
+                  AND s.mood_reminders
+                  AND (s.frequency = 'daily' OR (s.frequency = 'weekly' AND ?))
+                  AND NOT EXISTS (
+                      SELECT 1 FROM mood_entries m WHERE m.user_id = s.user_id AND m.date = ?
+                  )
+            ''', (slot_date, before, minute, slot.weekday() == WEEKLY_REMINDER_WEEKDAY, slot_date))
+            created = cursor.rowcount
+            advance_notification_seq(cursor)
+
+            if minute == _minute_of_day(WELLNESS_TIP_TIME):
+                tip = WELLNESS_TIPS[slot.toordinal() % len(WELLNESS_TIPS)]
+                cursor.execute('''
+                    INSERT OR IGNORE INTO notifications
+                    (id, user_id, type, title, message, priority, icon, seq)
+                    SELECT 'reminder_tip_' || s.user_id || '_' || ?, s.user_id, 'wellness_tip',
+                           'Wellness Tip 💡', ?, 'low', '💡', ? + row_number() OVER ()
+                    FROM notification_settings s
+                    WHERE s.wellness_tips
+                ''', (slot_date, tip, current_notification_seq(cursor)))
+                created += cursor.rowcount
+                advance_notification_seq(cursor)
+
+            cursor.execute('''
+                INSERT INTO reminder_scheduler_state (name, last_slot) VALUES (?, ?)
+                ON CONFLICT(name) DO UPDATE SET last_slot = excluded.last_slot, updated_at = CURRENT_TIMESTAMP
+            ''', (self.name, slot.isoformat()))
+            conn.commit()
+
+            if created:
+                publish_new_notifications(cursor, before)
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        duration = time.perf_counter() - started
+        self.tick_latency.record(duration)
+        lag = ((now or self.now_slot()) - slot).total_seconds()
+        self.slot_lag.record(max(lag, 0.0))
+        self.slots_processed += 1
+        self.notifications_created += created
+        self.last_slot = {
+            "slot": slot.isoformat(),
+            "created": created,
+            "duration_ms": round(duration * 1000, 3)
+        }
+        return created
+
+    def start(self):
+        """Run every minute in a background thread, catching up first"""
+        from apscheduler.schedulers.background import BackgroundScheduler
+        if self._scheduler:
+            return
+        self._scheduler = BackgroundScheduler(timezone=REMINDER_TIMEZONE)
+        self._scheduler.add_job(
+            self.run_due_slots, "cron", second=0,
+            max_instances=1, coalesce=True, next_run_time=datetime.now(REMINDER_TIMEZONE)
+        )
+        self._scheduler.start()
+        print("⏰ Reminder scheduler started")
+
+    def stop(self):
+        if self._scheduler:
+            self._scheduler.shutdown(wait=False)
+            self._scheduler = None
+
+    def get_stats(self) -> Dict:
+        """Tick latency, slot lag and catch-up history for monitoring"""
+        return {
+            "running": self._scheduler is not None,
+            "timezone": str(REMINDER_TIMEZONE),
+            "slots_processed": self.slots_processed,
+            "notifications_created": self.notifications_created,
+            "last_slot": self.last_slot,
+            "tick_latency": self.tick_latency.summary(),
+            "slot_lag": self.slot_lag.summary(),
+            "catch_ups": list(self.catch_ups)
+        }
+
+
+# Initialize tables on import
+init_reminder_tables()
+
+reminder_scheduler = ReminderScheduler()
@@ -0,0 +1,136 @@
+from fastapi import Request, Response
+from collections import OrderedDict
+from email.utils import format_datetime
+from datetime import date, datetime, timezone
+from typing import Callable, Optional, Tuple
+import threading
+import zlib
+from .database import get_db_connection
+
+
+def init_resource_versions():
+    """Initialize per-user, per-resource version counters"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS resource_versions (
+            user_id TEXT NOT NULL,
+            resource TEXT NOT NULL,
+            version INTEGER DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, resource)
+        )
+    ''')
+    # Message writes reach conversations through the counter triggers
+    track_table_versions(cursor, 'conversations', 'history')
+
+    conn.commit()
+    conn.close()
+
+
+def track_table_versions(cursor, table: str, resource: str):
+    """Bump the owner's version of `resource` on every write to `table`.
+
+    Triggers rather than calls in each endpoint, so writes from scripts,
+    schedulers and other modules invalidate cached reads too.
+    """
+    for event, row in (('INSERT', 'NEW'), ('UPDATE', 'NEW'), ('DELETE', 'OLD')):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_{event.lower()}_version
+            AFTER {event} ON {table}
+            BEGIN
+                INSERT INTO resource_versions (user_id, resource, version, updated_at)
+                VALUES (CAST({row}.user_id AS TEXT), '{resource}', 1, CURRENT_TIMESTAMP)
+                ON CONFLICT(user_id, resource) DO UPDATE SET
+                    version = version + 1,
+                    updated_at = CURRENT_TIMESTAMP;
+            END
+        ''')
+
+
+def get_resource_version(user_id, resource: str) -> Tuple[int, Optional[str]]:
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT version, updated_at FROM resource_versions WHERE user_id = ? AND resource = ?",
+        (str(user_id), resource)
+    )
+    row = cursor.fetchone()
+    conn.close()
+    return (row['version'], row['updated_at']) if row else (0, None)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: W/ prefixes are ignored on both sides
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def conditional_get(request: Request, response: Response, user_id, resource: str, *variant) -> Optional[Response]:
+    """Answer 304 from the version counter alone, or set ETag/Last-Modified on `response`.
+
+    The ETag covers the user, the version, the query string and any extra
+    `variant` (e.g. today's date for windows relative to today), since
+    those change the payload without a write. The user is part of it
+    because version counters are small and collide across users, and the
+    browser cache is keyed by URL alone. Call this before reading
+    any rows: a write racing the read then only makes the ETag stale,
+    which costs one extra full response, never a wrong 304.
+    """
+    version, updated_at = get_resource_version(user_id, resource)
+    representation = "|".join([str(user_id), request.url.path, request.url.query, *map(str, variant)])
+    etag = f'W/"{version}-{zlib.crc32(representation.encode()):08x}"'
+
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"}
+    if updated_at:
+        modified = datetime.strptime(updated_at, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+        headers["Last-Modified"] = format_datetime(modified, usegmt=True)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return None
+
+
+class VersionedCache:
+    """Bounded per-user LRU whose entries expire when the resource version or the day changes.
+
+    The version is read before loading, so a write racing the load leaves
+    a stale version behind and the next call reloads.
+    """
+
+    def __init__(self, resource: str, max_size: int):
+        self.resource = resource
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[int, date, object]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_load(self, user_id, load: Callable[[date], object]):
+        key = str(user_id)
+        version, _ = get_resource_version(user_id, self.resource)
+        today = date.today()
+
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached and cached[0] == version and cached[1] == today:
+                self._entries.move_to_end(key)
+                return cached[2]
+
+        value = load(today)
+
+        with self._lock:
+            self._entries[key] = (version, today, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+        return value
+
+
+# Initialize tables on import
+init_resource_versions()
@@ -4,6 +4,12 @@ from .emotion_analyzer import AdvancedEmotionAnalyzer
 from .ai_memory import ConversationMemory
 from .advanced_nlp import AdvancedNLPProcessor
 from .smart_templates import SmartResponseTemplates
+from .language_detector import language_identifier
+
+# Below this identifier confidence the personalizer keeps its English default
+MIN_LANGUAGE_CONFIDENCE = 0.5
+from .analysis_cache import AnalysisCache
+from .pipeline_profiler import profiler
 
 class ResponsePersonalizer:
     """Personalize AI responses based on user context and emotion analysis"""
@@ -14,6 +20,9 @@ class ResponsePersonalizer:
         self.nlp_processor = AdvancedNLPProcessor()
         self.smart_templates = SmartResponseTemplates()
         
+        # Message analysis does not depend on the user, so it is shared
+        self.analysis_cache = AnalysisCache([self.emotion_analyzer, self.nlp_processor])
+        
         # Response templates for different strategies
         self.response_templates = {
             'hindi': {
@@ -79,36 +88,35 @@ class ResponsePersonalizer:
         
         # Get user context if available
         user_context = {}
-        user_history = []
         if user_id:
-            user_context = self.memory.get_user_context(user_id)
-            user_history = user_context.get('recent_context', [])
-        
-        # Advanced NLP analysis
-        deep_analysis = self.nlp_processor.deep_analyze_message(message, user_history)
-        
-        # Basic emotion analysis (for backward compatibility)
-        basic_analysis = self.emotion_analyzer.analyze_emotion(message)
+            with profiler.stage('personalizer.get_user_context'):
+                user_context = self.memory.get_user_context(user_id)
+            with profiler.stage('personalizer.memory_recall'):
+                user_context['related_memories'] = self.memory.recall(user_id, message)
+        
+        # Cached, read-only NLP + emotion analysis of the message itself
+        with profiler.stage('personalizer.message_analysis'):
+            message_analysis = self.analysis_cache.get_or_compute(
+                message, self._analyze_message
+            )
         
         # Combine analyses
         combined_analysis = {
-            **basic_analysis,
-            **deep_analysis,
+            **message_analysis,
             'user_context': user_context
         }
         
         # Determine language preference
         language = self._detect_language(message, user_context)
         
-        # Generate smart contextual response
-        smart_response = self.smart_templates.get_contextual_response(
-            combined_analysis, language
-        )
-        
-        # Add follow-up question
-        follow_up = self.smart_templates.get_follow_up_question(
-            combined_analysis, language
-        )
+        # Generate smart contextual response and follow-up question
+        with profiler.stage('personalizer.template_rendering'):
+            smart_response = self.smart_templates.get_contextual_response(
+                combined_analysis, language
+            )
+            follow_up = self.smart_templates.get_follow_up_question(
+                combined_analysis, language
+            )
         
         # Combine response and follow-up
         final_response = smart_response
@@ -120,14 +128,16 @@ class ResponsePersonalizer:
             emotions_list = list(combined_analysis.get('emotions', {}).keys())
             contexts_list = [k for k, v in combined_analysis.get('cultural_context', {}).items() if v]
             
-            self.memory.save_interaction(
-                user_id, message, 
-                emotions_list[0] if emotions_list else 'neutral',
-                contexts_list, final_response
-            )
+            with profiler.stage('personalizer.save_interaction'):
+                self.memory.save_interaction(
+                    user_id, message, 
+                    emotions_list[0] if emotions_list else 'neutral',
+                    contexts_list, final_response
+                )
             
             # Update user personality based on interaction
-            self._update_user_personality(user_id, combined_analysis, language)
+            with profiler.stage('personalizer.personality_update'):
+                self._update_user_personality(user_id, combined_analysis, language)
         
         return {
             'response': final_response,
@@ -137,6 +147,18 @@ class ResponsePersonalizer:
             'advanced_features_used': True
         }
     
+    def _analyze_message(self, message: str) -> Dict:
+        """Run the user-independent analyzers on a normalized message"""
+        # Advanced NLP analysis (history is not used by the analyzers)
+        with profiler.stage('personalizer.deep_analyze_message'):
+            deep_analysis = self.nlp_processor.deep_analyze_message(message)
+        
+        # Basic emotion analysis (for backward compatibility)
+        with profiler.stage('personalizer.emotion_analysis'):
+            basic_analysis = self.emotion_analyzer.analyze_emotion(message)
+        
+        return {**basic_analysis, **deep_analysis}
+    
     def _detect_language(self, message: str, user_context: Dict) -> str:
         """Detect preferred language"""
         # Check user preference first
@@ -145,16 +167,9 @@ class ResponsePersonalizer:
             if pref_lang:
                 return pref_lang
         
-        # Detect from message
-        hindi_chars = ['है', 'हूं', 'का', 'की', 'को', 'में', 'हैं', 'और']
-        hinglish_words = ['hai', 'hun', 'kar', 'kya', 'main', 'yaar', 'bhai']
-        
-        if any(char in message for char in hindi_chars):
-            return 'hindi'
-        elif any(word in message.lower() for word in hinglish_words):
-            return 'hinglish'
-        else:
-            return 'english'
+        # Detect from message; English when there is too little to go on
+        language, confidence = language_identifier.identify(message)
+        return language if confidence >= MIN_LANGUAGE_CONFIDENCE else 'english'
     
     def _generate_base_response(self, analysis: Dict, strategy: Dict, 
                                language: str, user_context: Dict) -> str:
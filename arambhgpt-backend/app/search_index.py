@@ -0,0 +1,259 @@
+from typing import Dict, List
+import re
+import unicodedata
+from .database import get_db_connection
+
+# Devanagari vowel signs, anusvara, nukta and virama are combining marks that
+# unicode61 would otherwise treat as separators, splitting 'परेशान' into 'पर', 'श', 'न'
+DEVANAGARI_MARKS = "".join(
+    chr(code) for code in range(0x0900, 0x0980)
+    if unicodedata.category(chr(code)) in ("Mn", "Mc")
+)
+# remove_diacritics folds 'café' to 'cafe'; prefix indexes keep Hinglish
+# suffix variants ('dost*' -> 'dosto', 'doston') cheap to match
+TOKENIZE = f"unicode61 remove_diacritics 2 tokenchars '{DEVANAGARI_MARKS}'"
+PREFIX_INDEXES = "2 3"
+
+# Title hits count for more than a single message hit
+TITLE_WEIGHT = 2.0
+SNIPPET_TOKENS = 12
+HIGHLIGHTS_PER_CONVERSATION = 3
+MAX_QUERY_TERMS = 16
+# Matches are wrapped in STX/ETX control characters, not HTML tags: contents
+# are raw user text, so clients render the marks themselves and never parse HTML
+HIGHLIGHT_OPEN = "\u0002"
+HIGHLIGHT_CLOSE = "\u0003"
+
+QUERY_TERM = re.compile(r"[\w\u0900-\u097F]+")
+
+
+def init_search_index():
+    """Initialize FTS5 indexes over message contents and conversation titles.
+
+    Both are external-content tables reading from views, so text is not
+    stored twice. Each row carries an owner token ('u<user_id>') that the
+    MATCH expression filters on, letting FTS5 intersect posting lists
+    instead of scoring every user's matches and discarding them afterwards.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT name FROM sqlite_master WHERE name IN ('messages_fts', 'conversations_fts')")
+    existing = {row[0] for row in cursor.fetchall()}
+
+    cursor.execute('''
+        CREATE VIEW IF NOT EXISTS messages_search_source AS
+        SELECT m.id AS id, m.content AS content, 'u' || c.user_id AS owner
+        FROM messages m JOIN conversations c ON c.id = m.conversation_id
+    ''')
+    cursor.execute('''
+        CREATE VIEW IF NOT EXISTS conversations_search_source AS
+        SELECT id, title, 'u' || user_id AS owner FROM conversations
+    ''')
+
+    cursor.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+            content, owner,
+            content='messages_search_source', content_rowid='id',
+            tokenize="{TOKENIZE}", prefix='{PREFIX_INDEXES}'
+        )
+    ''')
+    cursor.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS conversations_fts USING fts5(
+            title, owner,
+            content='conversations_search_source', content_rowid='id',
+            tokenize="{TOKENIZE}", prefix='{PREFIX_INDEXES}'
+        )
+    ''')
+
+    # Deletes must hand FTS5 the exact values that were indexed
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS messages_fts_insert
+        AFTER INSERT ON messages
+        BEGIN
+            INSERT INTO messages_fts (rowid, content, owner)
+            SELECT NEW.id, NEW.content, 'u' || user_id FROM conversations WHERE id = NEW.conversation_id;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS messages_fts_delete
+        AFTER DELETE ON messages
+        BEGIN
+            INSERT INTO messages_fts (messages_fts, rowid, content, owner)
+            SELECT 'delete', OLD.id, OLD.content, 'u' || user_id FROM conversations WHERE id = OLD.conversation_id;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS messages_fts_update
+        AFTER UPDATE OF content ON messages
+        BEGIN
+            INSERT INTO messages_fts (messages_fts, rowid, content, owner)
+            SELECT 'delete', OLD.id, OLD.content, 'u' || user_id FROM conversations WHERE id = OLD.conversation_id;
+            INSERT INTO messages_fts (rowid, content, owner)
+            SELECT NEW.id, NEW.content, 'u' || user_id FROM conversations WHERE id = NEW.conversation_id;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS conversations_fts_insert
+        AFTER INSERT ON conversations
+        BEGIN
+            INSERT INTO conversations_fts (rowid, title, owner) VALUES (NEW.id, NEW.title, 'u' || NEW.user_id);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS conversations_fts_delete
+        AFTER DELETE ON conversations
+        BEGIN
+            INSERT INTO conversations_fts (conversations_fts, rowid, title, owner)
+            VALUES ('delete', OLD.id, OLD.title, 'u' || OLD.user_id);
+        END
+    ''')
+    # Only title changes; the message counter trigger updates conversations on every message
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS conversations_fts_update
+        AFTER UPDATE OF title, user_id ON conversations
+        BEGIN
+            INSERT INTO conversations_fts (conversations_fts, rowid, title, owner)
+            VALUES ('delete', OLD.id, OLD.title, 'u' || OLD.user_id);
+            INSERT INTO conversations_fts (rowid, title, owner) VALUES (NEW.id, NEW.title, 'u' || NEW.user_id);
+        END
+    ''')
+
+    # Index history that predates the FTS tables
+    if 'messages_fts' not in existing:
+        cursor.execute("INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')")
+    if 'conversations_fts' not in existing:
+        cursor.execute("INSERT INTO conversations_fts (conversations_fts) VALUES ('rebuild')")
+
+    conn.commit()
+    conn.close()
+
+
+def rebuild_search_index(optimize: bool = True) -> Dict[str, int]:
+    """Re-read both indexes from their source tables, then merge index segments"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    counts = {}
+    for table in ('messages_fts', 'conversations_fts'):
+        cursor.execute(f"INSERT INTO {table} ({table}) VALUES ('rebuild')")
+        if optimize:
+            cursor.execute(f"INSERT INTO {table} ({table}) VALUES ('optimize')")
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        counts[table] = cursor.fetchone()[0]
+
+    conn.commit()
+    conn.close()
+    return counts
+
+
+def check_search_index() -> List[str]:
+    """Names of indexes that disagree with their source tables"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    broken = []
+    for table in ('messages_fts', 'conversations_fts'):
+        try:
+            cursor.execute(f"INSERT INTO {table} ({table}, rank) VALUES ('integrity-check', 1)")
+        except Exception:
+            broken.append(table)
+
+    conn.close()
+    return broken
+
+
+def build_match_query(text: str, user_id: int, column: str) -> str:
+    """FTS5 MATCH expression for a user's free-text query, or '' if it has no terms.
+
+    Terms are quoted so FTS5 syntax in user input is never interpreted, and
+    matched as prefixes so inflected Hinglish forms are found.
+    """
+    terms = QUERY_TERM.findall(text.lower())[:MAX_QUERY_TERMS]
+    if not terms:
+        return ""
+    phrase = " ".join(f'"{term}"*' for term in terms)
+    return f'owner : "u{user_id}" AND {column} : ({phrase})'
+
+
+def rank_conversations(cursor, user_id: int, text: str, limit: int, offset: int) -> Dict:
+    """Rank a user's conversations by their best BM25 hit across titles and messages"""
+    message_query = build_match_query(text, user_id, "content")
+    if not message_query:
+        return {"rows": [], "total_count": 0}
+    title_query = build_match_query(text, user_id, "title")
+
+    # bm25() is negative; smaller means more relevant. The owner column carries no weight
+    cursor.execute('''
+        WITH hits AS (
+            SELECT m.conversation_id AS conversation_id, bm25(messages_fts, 1.0, 0.0) AS score
+            FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid
+            WHERE messages_fts MATCH ?
+            UNION ALL
+            SELECT rowid, bm25(conversations_fts, 1.0, 0.0) * ?
+            FROM conversations_fts
+            WHERE conversations_fts MATCH ?
+        ), ranked AS (
+            SELECT conversation_id, MIN(score) AS score, COUNT(*) AS hit_count
+            FROM hits
+            GROUP BY conversation_id
+        )
+        SELECT c.*, r.score, r.hit_count, COUNT(*) OVER () AS total_count
+        FROM ranked r JOIN conversations c ON c.id = r.conversation_id
+        WHERE c.user_id = ?
+        ORDER BY r.score, c.updated_at DESC
+        LIMIT ? OFFSET ?
+    ''', (message_query, TITLE_WEIGHT, title_query, user_id, limit, offset))
+    rows = cursor.fetchall()
+
+    if rows:
+        total_count = rows[0]['total_count']
+    elif offset:
+        # Past the last page: the window count is gone with the rows
+        cursor.execute('''
+            SELECT COUNT(*) FROM (
+                SELECT m.conversation_id FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid
+                WHERE messages_fts MATCH ?
+                UNION
+                SELECT rowid FROM conversations_fts WHERE conversations_fts MATCH ?
+            )
+        ''', (message_query, title_query))
+        total_count = cursor.fetchone()[0]
+    else:
+        total_count = 0
+
+    return {"rows": rows, "total_count": total_count}
+
+
+def highlight_conversations(cursor, user_id: int, text: str, conversation_ids: List[int]) -> Dict[int, List[str]]:
+    """Best few snippets per conversation; titles first, then messages by BM25"""
+    highlights: Dict[int, List[str]] = {conversation_id: [] for conversation_id in conversation_ids}
+    if not conversation_ids:
+        return highlights
+
+    placeholders = ",".join("?" for _ in conversation_ids)
+    cursor.execute(f'''
+        SELECT rowid, highlight(conversations_fts, 0, ?, ?)
+        FROM conversations_fts
+        WHERE conversations_fts MATCH ? AND rowid IN ({placeholders})
+    ''', [HIGHLIGHT_OPEN, HIGHLIGHT_CLOSE, build_match_query(text, user_id, "title")] + conversation_ids)
+    for conversation_id, title in cursor.fetchall():
+        highlights[conversation_id].append(title)
+
+    # snippet() is only evaluated for hits in this page's conversations
+    cursor.execute(f'''
+        SELECT m.conversation_id, snippet(messages_fts, 0, ?, ?, '…', ?)
+        FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid
+        WHERE messages_fts MATCH ? AND m.conversation_id IN ({placeholders})
+        ORDER BY bm25(messages_fts, 1.0, 0.0)
+    ''', [HIGHLIGHT_OPEN, HIGHLIGHT_CLOSE, SNIPPET_TOKENS,
+          build_match_query(text, user_id, "content")] + conversation_ids)
+    for conversation_id, snippet in cursor.fetchall():
+        if len(highlights[conversation_id]) < HIGHLIGHTS_PER_CONVERSATION:
+            highlights[conversation_id].append(snippet)
+
+    return highlights
+
+
+# Initialize indexes on import
+init_search_index()
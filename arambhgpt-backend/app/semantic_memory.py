@@ -0,0 +1,315 @@
+from array import array
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Tuple
+import heapq
+import math
+import threading
+import zlib
+from .database import get_db_connection
+from .language_detector import NORMALIZE
+
+# Hashed feature space: word unigrams plus padded character trigrams
+FEATURE_BITS = 20
+FEATURE_MASK = (1 << FEATURE_BITS) - 1
+
+# Per-user bound; a loaded index is compacted back to it once it grows this
+# share past it, so appends stay O(1) amortized
+MAX_MEMORIES_PER_USER = 2000
+INDEX_SLACK = 0.25
+# Memories held in loaded indexes across all users (~3 KB each, so ~150 MB),
+# evicted least recently used user first
+LOADED_MEMORIES_LIMIT = 50000
+
+# Retrieval
+DEFAULT_TOP_K = 3
+MIN_SIMILARITY = 0.1
+# Candidates re-ranked by exact cosine per returned result
+RERANK_FACTOR = 4
+MIN_WORD_LENGTH = 2
+
+
+def init_semantic_memory_tables():
+    """Initialize the per-message vector table"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    # Sparse TF vectors stored as packed uint32 feature ids and float32 weights
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS memory_vectors (
+            context_id INTEGER PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            snippet TEXT,
+            features BLOB,
+            weights BLOB,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_memory_vectors_user
+        ON memory_vectors (user_id, context_id)
+    ''')
+
+    conn.commit()
+    conn.close()
+
+
+def vectorize(text: str) -> Tuple[array, array]:
+    """Hashed, log-scaled and L2-normalized term frequencies of a message"""
+    counts: Dict[int, int] = {}
+    for word in text.lower().translate(NORMALIZE).split():
+        if len(word) < MIN_WORD_LENGTH:
+            continue
+        word_feature = zlib.crc32(word.encode()) & FEATURE_MASK
+        counts[word_feature] = counts.get(word_feature, 0) + 1
+        # Trigrams let 'exams' match 'exam' and spelling variants like 'pareshan'/'pareshaan'
+        padded = f"#{word}#"
+        for start in range(len(padded) - 2):
+            gram = zlib.crc32(padded[start:start + 3].encode(), 0x9E3779B9) & FEATURE_MASK
+            counts[gram] = counts.get(gram, 0) + 1
+
+    features = array('I', sorted(counts))
+    weights = array('f', (1.0 + math.log(counts[feature]) for feature in features))
+    norm = math.sqrt(sum(weight * weight for weight in weights))
+    if norm:
+        for index in range(len(weights)):
+            weights[index] /= norm
+    return features, weights
+
+
+class UserMemoryIndex:
+    """Inverted index over one user's newest past messages"""
+
+    def __init__(self, max_memories: int = MAX_MEMORIES_PER_USER):
+        self.max_memories = max_memories
+        self.context_ids = array('q')
+        self.snippets: List[str] = []
+        self.timestamps: List[str] = []
+        self.vectors: List[Tuple[array, array]] = []
+        # feature -> (doc positions, weights)
+        self.postings: Dict[int, Tuple[array, array]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.context_ids)
+
+    def add(self, context_id: int, snippet: str, timestamp: str, features: array, weights: array) -> int:
+        """Append a memory; returns the change in size, negative when the index was compacted"""
+        with self._lock:
+            before = len(self.context_ids)
+            self._append(context_id, snippet, timestamp, features, weights)
+            if len(self.context_ids) > self.max_memories * (1 + INDEX_SLACK):
+                self._compact()
+            return len(self.context_ids) - before
+
+    def _append(self, context_id: int, snippet: str, timestamp: str, features: array, weights: array):
+        position = len(self.context_ids)
+        self.snippets.append(snippet)
+        self.timestamps.append(timestamp)
+        self.context_ids.append(context_id)
+        self.vectors.append((features, weights))
+        for feature, weight in zip(features, weights):
+            posting = self.postings.get(feature)
+            if posting is None:
+                posting = self.postings[feature] = (array('I'), array('f'))
+            posting[0].append(position)
+            posting[1].append(weight)
+
+    def _compact(self):
+        """Rebuild from the newest max_memories entries; positions are renumbered"""
+        kept = list(zip(self.context_ids, self.snippets, self.timestamps, self.vectors))[-self.max_memories:]
+        self.context_ids = array('q')
+        self.snippets, self.timestamps, self.vectors = [], [], []
+        self.postings = {}
+        for context_id, snippet, timestamp, (features, weights) in kept:
+            self._append(context_id, snippet, timestamp, features, weights)
+
+    def search(self, text: str, k: int = DEFAULT_TOP_K, skip_recent: int = 0) -> List[Dict]:
+        """Top-k memories by TF-IDF cosine; only postings of the query's features are read"""
+        features, weights = vectorize(text)
+        with self._lock:
+            total = len(self.context_ids)
+            searchable = total - skip_recent
+            if searchable <= 0:
+                return []
+
+            # Smoothed idf, never below 1: a topic in most of a user's memories
+            # ranks lower than a rare one but is still recalled
+            def idf(feature: int) -> float:
+                posting = self.postings.get(feature)
+                df = len(posting[0]) if posting else 0
+                return math.log((total + 1) / (df + 1)) + 1.0
+
+            # Accumulate dot products over the query's postings only
+            scores: Dict[int, float] = {}
+            query_norm = 0.0
+            for feature, query_weight in zip(features, weights):
+                feature_idf = idf(feature)
+                query_norm += (query_weight * feature_idf) ** 2
+                posting = self.postings.get(feature)
+                if posting is None:
+                    continue
+                boost = query_weight * feature_idf * feature_idf
+                for position, doc_weight in zip(*posting):
+                    if position < searchable:
+                        scores[position] = scores.get(position, 0.0) + boost * doc_weight
+            if not scores or not query_norm:
+                return []
+
+            # Exact cosine for the best candidates only
+            results = []
+            candidates = heapq.nlargest(k * RERANK_FACTOR, scores.items(), key=lambda item: item[1])
+            for position, score in candidates:
+                doc_features, doc_weights = self.vectors[position]
+                doc_norm = math.sqrt(sum(
+                    (doc_weight * idf(feature)) ** 2
+                    for feature, doc_weight in zip(doc_features, doc_weights)
+                ))
+                similarity = score / (math.sqrt(query_norm) * doc_norm) if doc_norm else 0.0
+                if similarity >= MIN_SIMILARITY:
+                    results.append((similarity, position))
+
+            return [
+                {
+                    'context_id': self.context_ids[position],
+                    'snippet': self.snippets[position],
+                    'timestamp': self.timestamps[position],
+                    'similarity': round(similarity, 4)
+                }
+                for similarity, position in heapq.nlargest(k, results)
+            ]
+
+
+class SemanticMemoryStore:
+    """Loads per-user indexes on demand and keeps them current on writes"""
+
+    def __init__(self, max_loaded: int = LOADED_MEMORIES_LIMIT, max_memories: int = MAX_MEMORIES_PER_USER):
+        self.max_loaded = max_loaded
+        self.max_memories = max_memories
+        self._indexes: "OrderedDict[str, UserMemoryIndex]" = OrderedDict()
+        self._loaded_memories = 0
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.queries = 0
+
+    def add(self, cursor, user_id: str, context_id: int, message: str) -> Tuple:
+        """Store a message's vector using the caller's transaction.
+
+        Returns the entry to pass to index_added() once the transaction has
+        committed, so a rolled-back save never becomes searchable.
+        """
+        snippet = message[:200]
+        features, weights = vectorize(message)
+        cursor.execute('''
+            INSERT OR REPLACE INTO memory_vectors (context_id, user_id, snippet, features, weights)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (context_id, user_id, snippet, features.tobytes(), weights.tobytes()))
+        return (context_id, snippet, datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'), features, weights)
+
+    def index_added(self, user_id: str, entry: Tuple):
+        """Add a committed entry from add() to the user's index, if it is loaded"""
+        with self._lock:
+            index = self._indexes.get(user_id)
+        if index is None:
+            return
+        grown = index.add(*entry)
+        with self._lock:
+            if self._indexes.get(user_id) is index:
+                self._loaded_memories += grown
+                self._evict(keep=user_id)
+
+    def search(self, user_id: str, message: str, k: int = DEFAULT_TOP_K, skip_recent: int = 0) -> List[Dict]:
+        """Most similar past messages of a user"""
+        self.queries += 1
+        return self._get_index(user_id).search(message, k, skip_recent)
+
+    def prune(self, user_id: str) -> int:
+        """Drop a user's vectors beyond the newest max_memories"""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            DELETE FROM memory_vectors
+            WHERE user_id = ? AND context_id <= (
+                SELECT context_id FROM memory_vectors
+                WHERE user_id = ?
+                ORDER BY context_id DESC
+                LIMIT 1 OFFSET ?
+            )
+        ''', (user_id, user_id, self.max_memories))
+        pruned = cursor.rowcount
+        conn.commit()
+        conn.close()
+
+        if pruned:
+            with self._lock:
+                index = self._indexes.pop(user_id, None)
+                if index is not None:
+                    self._loaded_memories -= len(index)
+        return pruned
+
+    def get_stats(self) -> Dict:
+        return {
+            "loaded_users": len(self._indexes),
+            "loaded_memories": self._loaded_memories,
+            "max_loaded_memories": self.max_loaded,
+            "max_memories_per_user": self.max_memories,
+            "loads": self.loads,
+            "queries": self.queries
+        }
+
+    def _get_index(self, user_id: str) -> UserMemoryIndex:
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is not None:
+                self._indexes.move_to_end(user_id)
+                return index
+
+        loaded = self._load(user_id)
+        with self._lock:
+            # Another thread may have loaded the same user meanwhile
+            index = self._indexes.setdefault(user_id, loaded)
+            if index is loaded:
+                self._loaded_memories += len(loaded)
+            self._indexes.move_to_end(user_id)
+            self._evict(keep=user_id)
+        return index
+
+    def _evict(self, keep: str):
+        """Drop least recently used users until the loaded total fits; caller holds the lock"""
+        while self._loaded_memories > self.max_loaded and len(self._indexes) > 1:
+            user_id, index = next(iter(self._indexes.items()))
+            if user_id == keep:
+                self._indexes.move_to_end(user_id)
+                continue
+            del self._indexes[user_id]
+            self._loaded_memories -= len(index)
+
+    def _load(self, user_id: str) -> UserMemoryIndex:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT context_id, snippet, features, weights, timestamp FROM (
+                SELECT * FROM memory_vectors
+                WHERE user_id = ?
+                ORDER BY context_id DESC
+                LIMIT ?
+            ) ORDER BY context_id
+        ''', (user_id, self.max_memories))
+
+        index = UserMemoryIndex(self.max_memories)
+        for row in cursor:
+            features, weights = array('I'), array('f')
+            features.frombytes(row['features'])
+            weights.frombytes(row['weights'])
+            index.add(row['context_id'], row['snippet'], row['timestamp'], features, weights)
+        conn.close()
+
+        self.loads += 1
+        return index
+
+
+# Initialize tables on import
+init_semantic_memory_tables()
+
+# Shared store so every ConversationMemory writes to the same indexes
+semantic_memory = SemanticMemoryStore()
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Response, status
 from typing import List, Optional
 from datetime import datetime, timedelta
 import sqlite3
@@ -7,6 +7,8 @@ import uuid
 from .auth import verify_token, get_user_by_email
 from .database import get_db_connection
 from .models import *
+from .tagging import normalize_tags
+from .pagination import KeysetPage
 
 router = APIRouter(prefix="/social", tags=["social"])
 
@@ -76,6 +78,11 @@ def init_social_tables():
         )
     ''')
     
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_group_messages_group_created
+        ON group_messages (group_id, created_at, id)
+    ''')
+    
     # Group events table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS group_events (
@@ -139,9 +146,68 @@ def init_social_tables():
         )
     ''')
     
+    # Normalized group tags (support_groups.tags keeps the display JSON)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS group_tags (
+            group_id TEXT NOT NULL,
+            tag TEXT NOT NULL,
+            PRIMARY KEY (group_id, tag),
+            FOREIGN KEY (group_id) REFERENCES support_groups (id)
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_group_tags_tag ON group_tags (tag, group_id)")
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS support_groups_delete_tags
+        AFTER DELETE ON support_groups
+        BEGIN
+            DELETE FROM group_tags WHERE group_id = OLD.id;
+        END
+    ''')
+    
+    # One row per user reaction on a group message
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS group_message_reactions (
+            message_id TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            emoji TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (message_id, emoji, user_id),
+            FOREIGN KEY (message_id) REFERENCES group_messages (id)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS group_messages_delete_reactions
+        AFTER DELETE ON group_messages
+        BEGIN
+            DELETE FROM group_message_reactions WHERE message_id = OLD.id;
+        END
+    ''')
+    
     conn.commit()
     conn.close()
 
+def load_reactions(cursor, message_ids: List[str]) -> dict:
+    """Reactions for a page of messages in the shape the client expects"""
+    if not message_ids:
+        return {}
+    placeholders = ", ".join(["?"] * len(message_ids))
+    cursor.execute(f'''
+        SELECT message_id, emoji, COUNT(*), GROUP_CONCAT(user_id)
+        FROM group_message_reactions
+        WHERE message_id IN ({placeholders})
+        GROUP BY message_id, emoji
+        ORDER BY MIN(created_at)
+    ''', message_ids)
+    
+    reactions = {}
+    for message_id, emoji, count, user_ids in cursor.fetchall():
+        reactions.setdefault(message_id, []).append({
+            "emoji": emoji,
+            "count": count,
+            "userIds": user_ids.split(",") if user_ids else []
+        })
+    return reactions
+
 @router.post("/groups")
 async def create_support_group(
     group_data: dict,
@@ -169,6 +235,11 @@ async def create_support_group(
             group_data.get('is_private', False), tags_json, moderators_json
         ))
         
+        cursor.executemany(
+            "INSERT OR IGNORE INTO group_tags (group_id, tag) VALUES (?, ?)",
+            [(group_id, tag) for tag in normalize_tags(group_data.get('tags', []))]
+        )
+        
         # Add creator as member and moderator
         cursor.execute('''
             INSERT INTO group_members (group_id, user_id, is_moderator)
@@ -203,6 +274,7 @@ async def create_support_group(
 @router.get("/groups")
 async def get_support_groups(
     limit: int = 20,
+    tag: Optional[str] = None,
     email: str = Depends(verify_token)
 ):
     """Get list of support groups"""
@@ -214,15 +286,22 @@ async def get_support_groups(
     cursor = conn.cursor()
     
     try:
-        cursor.execute('''
+        tag_filter = ""
+        params = [str(user['id'])]
+        if tag:
+            tag_filter = "AND id IN (SELECT group_id FROM group_tags WHERE tag = ?)"
+            params.append(tag.strip().lower())
+        params.append(limit)
+        
+        cursor.execute(f'''
             SELECT id, name, description, member_count, is_private, tags, 
                    created_at, moderators
             FROM support_groups 
-            WHERE is_private = FALSE OR id IN (
+            WHERE (is_private = FALSE OR id IN (
                 SELECT group_id FROM group_members WHERE user_id = ?
-            )
+            )) {tag_filter}
             ORDER BY created_at DESC LIMIT ?
-        ''', (str(user['id']), limit))
+        ''', params)
         
         rows = cursor.fetchall()
         groups = []
@@ -358,7 +437,9 @@ async def create_group_message(
 @router.get("/groups/{group_id}/messages")
 async def get_group_messages(
     group_id: str,
+    response: Response,
     limit: int = 50,
+    cursor: Optional[str] = None,
     email: str = Depends(verify_token)
 ):
     """Get messages from a support group"""
@@ -366,27 +447,29 @@ async def get_group_messages(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
+    keyset = KeysetPage(f"group_messages:{group_id}", "created_at", "id", limit, cursor)
+    
     conn = get_db_connection()
-    cursor = conn.cursor()
+    db_cursor = conn.cursor()
     
     try:
         # Check if user is a member of the group
-        cursor.execute(
+        db_cursor.execute(
             "SELECT user_id FROM group_members WHERE group_id = ? AND user_id = ?",
             (group_id, str(user['id']))
         )
-        if not cursor.fetchone():
+        if not db_cursor.fetchone():
             raise HTTPException(status_code=403, detail="Not a member of this group")
         
-        cursor.execute('''
+        db_cursor.execute(f'''
             SELECT id, group_id, author_id, author_name, content, is_anonymous, 
                    reactions, created_at
             FROM group_messages 
-            WHERE group_id = ?
-            ORDER BY created_at DESC LIMIT ?
-        ''', (group_id, limit))
+            WHERE group_id = ?{keyset.where_sql()}{keyset.order_limit_sql()}
+        ''', [group_id] + keyset.params + [keyset.fetch_size])
         
-        rows = cursor.fetchall()
+        rows, next_cursor = keyset.finish(db_cursor.fetchall())
+        reactions = load_reactions(db_cursor, [row[0] for row in rows])
         messages = []
         
         for row in rows:
@@ -397,15 +480,76 @@ async def get_group_messages(
                 "author_name": row[3],
                 "content": row[4],
                 "is_anonymous": bool(row[5]),
-                "reactions": json.loads(row[6]) if row[6] else [],
+                "reactions": reactions.get(row[0], []),
                 "created_at": row[7]
             })
         
+        # The body stays a plain list; the next page cursor travels in a header
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        
         return messages
         
     finally:
         conn.close()
 
+@router.post("/groups/{group_id}/messages/{message_id}/reactions")
+async def toggle_message_reaction(
+    group_id: str,
+    message_id: str,
+    reaction_data: dict,
+    email: str = Depends(verify_token)
+):
+    """Add or remove the current user's reaction on a group message"""
+    user = get_user_by_email(email)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    emoji = (reaction_data.get('emoji') or '').strip()
+    if not emoji:
+        raise HTTPException(status_code=400, detail="emoji is required")
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('''
+            SELECT 1 FROM group_messages m
+            JOIN group_members gm ON gm.group_id = m.group_id AND gm.user_id = ?
+            WHERE m.id = ? AND m.group_id = ?
+        ''', (str(user['id']), message_id, group_id))
+        if not cursor.fetchone():
+            raise HTTPException(status_code=404, detail="Message not found")
+        
+        cursor.execute(
+            "DELETE FROM group_message_reactions WHERE message_id = ? AND emoji = ? AND user_id = ?",
+            (message_id, emoji, str(user['id']))
+        )
+        if cursor.rowcount == 0:
+            cursor.execute(
+                "INSERT INTO group_message_reactions (message_id, user_id, emoji) VALUES (?, ?, ?)",
+                (message_id, str(user['id']), emoji)
+            )
+        
+        # Keep the JSON display copy in step for readers of group_messages.reactions
+        reactions = load_reactions(cursor, [message_id]).get(message_id, [])
+        cursor.execute(
+            "UPDATE group_messages SET reactions = ? WHERE id = ?",
+            (json.dumps(reactions), message_id)
+        )
+        
+        conn.commit()
+        
+        return {"message_id": message_id, "reactions": reactions}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        conn.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to update reaction: {str(e)}")
+    finally:
+        conn.close()
+
 # Advanced Community Features
 
 @router.get("/groups/recommended")
@@ -435,39 +579,44 @@ async def get_recommended_groups(
         # Simple interest extraction (can be enhanced with NLP)
         interests = extract_interests_from_messages(user_messages)
         
-        # Find groups matching interests
+        # Jaccard match between interests and group tags, scored in SQL
+        interests_json = json.dumps(normalize_tags(interests))
         cursor.execute('''
-            SELECT g.*, 
-                   (SELECT COUNT(*) FROM group_messages WHERE group_id = g.id AND created_at > datetime('now', '-7 days')) as recent_activity
+            WITH interest(tag) AS (SELECT value FROM json_each(?)),
+            tag_stats AS (
+                SELECT gt.group_id,
+                       COUNT(*) AS tag_count,
+                       SUM(gt.tag IN (SELECT tag FROM interest)) AS matches
+                FROM group_tags gt
+                GROUP BY gt.group_id
+            )
+            SELECT g.id, g.name, g.description, g.category, g.member_count, g.tags, g.created_at,
+                   CASE WHEN COALESCE(ts.matches, 0) = 0 THEN 0.0
+                        ELSE ts.matches * 1.0 / ((SELECT COUNT(*) FROM interest) + ts.tag_count - ts.matches)
+                   END AS match_score,
+                   (SELECT COUNT(*) FROM group_messages WHERE group_id = g.id AND created_at > datetime('now', '-7 days')) AS recent_activity
             FROM support_groups g
+            LEFT JOIN tag_stats ts ON ts.group_id = g.id
             WHERE g.is_private = FALSE
-            ORDER BY g.activity_score DESC, recent_activity DESC
+            ORDER BY match_score DESC, g.activity_score DESC, recent_activity DESC
             LIMIT ?
-        ''', (limit,))
+        ''', (interests_json, limit))
         
-        rows = cursor.fetchall()
         recommendations = []
-        
-        for row in rows:
-            group_tags = json.loads(row[5]) if row[5] else []
-            match_score = calculate_interest_match(interests, group_tags)
-            
+        for row in cursor.fetchall():
             recommendations.append({
                 "id": row[0],
                 "name": row[1],
                 "description": row[2],
                 "category": row[3],
                 "member_count": row[4],
-                "tags": group_tags,
-                "match_score": match_score,
-                "recent_activity": row[-1],
-                "created_at": row[8]
+                "tags": json.loads(row[5]) if row[5] else [],
+                "match_score": row[7],
+                "recent_activity": row[8],
+                "created_at": row[6]
             })
         
-        # Sort by match score
-        recommendations.sort(key=lambda x: x['match_score'], reverse=True)
-        
-        return recommendations[:limit]
+        return recommendations
         
     finally:
         conn.close()
@@ -773,13 +922,5 @@ def extract_interests_from_messages(messages: List[str]) -> List[str]:
     
     return interests
 
-def calculate_interest_match(user_interests: List[str], group_tags: List[str]) -> float:
-    """Calculate match score between user interests and group tags"""
-    if not user_interests or not group_tags:
-        return 0.0
-    
-    matches = len(set(user_interests) & set(group_tags))
-    return matches / len(set(user_interests) | set(group_tags))
-
 # Initialize tables when module is imported
 init_social_tables()
\ No newline at end of file
@@ -0,0 +1,56 @@
+from typing import Dict, Iterable, List
+from .database import get_db_connection
+
+
+def normalize_tags(tags: Iterable[str]) -> List[str]:
+    """Lowercase, trim and de-duplicate tags so ordering and case never matter"""
+    return sorted({tag.strip().lower() for tag in tags or [] if isinstance(tag, str) and tag.strip()})
+
+
+def migrate_json_tags() -> Dict[str, int]:
+    """Copy tags held in JSON text columns into their junction tables.
+
+    Idempotent: rows already present are ignored, so it can be re-run
+    after a partial migration. Expects the owning modules' tables to exist.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    migrated = {}
+
+    cursor.execute('''
+        INSERT OR IGNORE INTO conversation_topics (context_id, user_id, topic)
+        SELECT c.id, c.user_id, lower(trim(t.value))
+        FROM conversation_context c, json_each(c.topics_discussed) t
+        WHERE json_valid(c.topics_discussed) AND t.type = 'text' AND trim(t.value) != ''
+    ''')
+    migrated['conversation_topics'] = cursor.rowcount
+
+    cursor.execute('''
+        INSERT OR IGNORE INTO group_tags (group_id, tag)
+        SELECT g.id, lower(trim(t.value))
+        FROM support_groups g, json_each(g.tags) t
+        WHERE json_valid(g.tags) AND t.type = 'text' AND trim(t.value) != ''
+    ''')
+    migrated['group_tags'] = cursor.rowcount
+
+    for kind, column in (('emotion', 'emotions'), ('activity', 'activities')):
+        cursor.execute(f'''
+            INSERT OR IGNORE INTO mood_entry_tags (entry_id, user_id, date, kind, tag)
+            SELECT m.id, m.user_id, m.date, ?, lower(trim(t.value))
+            FROM mood_entries m, json_each(m.{column}) t
+            WHERE json_valid(m.{column}) AND t.type = 'text' AND trim(t.value) != ''
+        ''', (kind,))
+        migrated[f'mood_{column}'] = cursor.rowcount
+
+    # Reactions are stored as [{"emoji": ..., "userIds": [...]}, ...]
+    cursor.execute('''
+        INSERT OR IGNORE INTO group_message_reactions (message_id, user_id, emoji)
+        SELECT m.id, u.value, json_extract(r.value, '$.emoji')
+        FROM group_messages m, json_each(m.reactions) r, json_each(r.value, '$.userIds') u
+        WHERE json_valid(m.reactions) AND json_extract(r.value, '$.emoji') IS NOT NULL
+    ''')
+    migrated['group_message_reactions'] = cursor.rowcount
+
+    conn.commit()
+    conn.close()
+    return migrated
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 from datetime import datetime, timedelta
 import uuid
 from typing import List, Optional
@@ -7,6 +7,7 @@ import sqlite3
 
 from .database import get_db_connection
 from .payment_gateway import payment_gateway
+from .pagination import KeysetPage
 
 # Database initialization
 def init_wallet_tables():
@@ -45,6 +46,10 @@ def init_wallet_tables():
                 FOREIGN KEY (user_id) REFERENCES users (id)
             )
         ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_transactions_user_timestamp
+            ON transactions (user_id, timestamp, id)
+        ''')
         
         # Consultation sessions table
         cursor.execute('''
@@ -336,21 +341,26 @@ async def recharge_wallet(request: RechargeRequest):
         raise HTTPException(status_code=500, detail=f"Recharge failed: {str(e)}")
 
 @router.get("/transactions")
-async def get_transactions(userId: str):
+async def get_transactions(userId: str, response: Response, limit: int = 100, cursor: Optional[str] = None):
     """Get user's transaction history"""
     try:
+        keyset = KeysetPage(f"transactions:{userId}", "timestamp", "id", limit, cursor)
+        
         conn = get_db_connection()
-        cursor = conn.cursor()
+        db_cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT * FROM transactions 
-            WHERE user_id = ? 
-            ORDER BY timestamp DESC
-        """, (userId,))
+        db_cursor.execute(
+            f"SELECT * FROM transactions WHERE user_id = ?{keyset.where_sql()}{keyset.order_limit_sql()}",
+            [userId] + keyset.params + [keyset.fetch_size]
+        )
         
-        transactions = cursor.fetchall()
+        transactions, next_cursor = keyset.finish(db_cursor.fetchall())
         conn.close()
         
+        # The body stays a plain list; the next page cursor travels in a header
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        
         return [
             TransactionResponse(
                 id=t['id'],
@@ -367,6 +377,8 @@ async def get_transactions(userId: str):
                 status=t['status']
             ) for t in transactions
         ]
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching transactions: {str(e)}")
 
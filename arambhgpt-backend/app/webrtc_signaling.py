@@ -5,6 +5,7 @@ import uuid
 from datetime import datetime
 from .database import get_db_connection
 from .auth import verify_token, get_user_by_email
+from .pagination import KeysetPage
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -105,6 +106,8 @@ def init_webrtc_db():
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_call_logs_caller ON call_logs (caller_id, start_time, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_call_logs_callee ON call_logs (callee_id, start_time, id)")
     
     conn.commit()
     conn.close()
@@ -356,24 +359,39 @@ async def end_call(
 async def get_call_history(
     limit: int = 20,
     offset: int = 0,
+    cursor: Optional[str] = None,
     email: str = Depends(verify_token)
 ):
     """Get user's call history"""
     try:
         user = get_user_by_email(email)
         user_id = str(user['id'])
+        keyset = KeysetPage(f"call_history:{user_id}", "start_time", "id", limit, cursor)
         
         conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT * FROM call_logs 
-            WHERE caller_id = ? OR callee_id = ?
-            ORDER BY start_time DESC
-            LIMIT ? OFFSET ?
-        ''', (user_id, user_id, limit, offset))
+        db_cursor = conn.cursor()
+        
+        # offset is only honoured for clients not sending a cursor
+        offset = offset if offset and not cursor else 0
+        # One seek per side on idx_call_logs_caller / idx_call_logs_callee, each
+        # limited, then a merge of at most two pages: an OR across the two
+        # columns would sort every call the user has on each page
+        page = f"{keyset.where_sql()}{keyset.order_limit_sql()}"
+        query = f'''
+            SELECT * FROM (SELECT * FROM call_logs WHERE caller_id = ?{page})
+            UNION ALL
+            SELECT * FROM (SELECT * FROM call_logs WHERE callee_id = ? AND caller_id != ?{page})
+            {keyset.order_limit_sql()} OFFSET ?
+        '''
+        side_size = keyset.fetch_size + offset
+        params = (
+            [user_id] + keyset.params + [side_size]
+            + [user_id, user_id] + keyset.params + [side_size]
+            + [keyset.fetch_size, offset]
+        )
+        db_cursor.execute(query, params)
         
-        calls = cursor.fetchall()
+        calls, next_cursor = keyset.finish(db_cursor.fetchall())
         conn.close()
         
         return {
@@ -390,9 +408,12 @@ async def get_call_history(
                 }
                 for call in calls
             ],
-            'total_count': len(calls)
+            'total_count': len(calls),
+            'next_cursor': next_cursor
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get call history: {str(e)}")
 
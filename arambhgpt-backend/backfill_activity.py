@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Rebuild the per-user daily activity rollups behind /api/history/stats
+from existing conversations and messages. Safe to re-run.
+
+Usage:
+    python backfill_activity.py
+    python backfill_activity.py --user 42
+"""
+
+import argparse
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.activity_rollups import backfill_activity_rollups
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill per-user daily activity rollups")
+    parser.add_argument("--user", type=int, help="Backfill a single user id")
+    args = parser.parse_args()
+    
+    totals = backfill_activity_rollups(args.user)
+    print(f"✅ Backfilled {totals['days']} days of activity for {totals['users']} users")
+
+if __name__ == "__main__":
+    main()
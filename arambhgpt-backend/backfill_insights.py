@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Build the daily emotion/topic rollups behind /ai-learning/user-insights
+from existing conversation_context history. Safe to re-run.
+
+Usage:
+    python backfill_insights.py
+    python backfill_insights.py --user 42
+"""
+
+import argparse
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.ai_memory import ConversationMemory
+from app.insight_rollups import backfill_rollups
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill per-user daily insight rollups")
+    parser.add_argument("--user", help="Backfill a single user id")
+    args = parser.parse_args()
+    
+    # Make sure conversation_context exists on fresh databases
+    ConversationMemory()
+    
+    totals = backfill_rollups(args.user)
+    print(f"✅ Backfilled {totals['days']} days of rollups for {totals['users']} users")
+
+if __name__ == "__main__":
+    main()
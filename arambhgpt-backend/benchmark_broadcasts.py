@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark a notification broadcast to every user of a scratch database
+with --users users, while a writer thread keeps inserting single
+notifications the way POST /notifications/ does.
+
+Reports broadcast throughput, peak Python memory, and the writer's
+latency during the broadcast, which shows whether chunking leaves the
+write path room to run.
+
+Usage:
+    python benchmark_broadcasts.py
+    python benchmark_broadcasts.py --users 200000 --chunk-size 2000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+def populate(users, seed):
+    from app.database import get_db_connection
+    rng = random.Random(seed)
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.executemany(
+        "INSERT INTO users (name, email, hashed_password) VALUES (?, ?, 'x')",
+        [(f"User {index}", f"user{index}@arambhgpt.test") for index in range(users)]
+    )
+    # Half the users saved settings; a fifth of those turned achievements off
+    cursor.executemany(
+        "INSERT INTO notification_settings (user_id, achievements) VALUES (?, ?)",
+        [(str(user_id), rng.random() >= 0.2) for user_id in range(1, users + 1) if rng.random() < 0.5]
+    )
+    conn.commit()
+    conn.close()
+
+
+def write_path(stop, latencies):
+    """Single-notification inserts, as a request handler makes them"""
+    from app.database import get_db_connection
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    while not stop.is_set():
+        started = time.perf_counter()
+        cursor.execute('''
+            INSERT INTO notifications (id, user_id, type, title, message)
+            VALUES (?, '1', 'general', 'Ping', 'Write path probe')
+        ''', (f"probe_{uuid.uuid4().hex}",))
+        conn.commit()
+        latencies.append(time.perf_counter() - started)
+        time.sleep(0.002)
+    conn.close()
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark chunked notification broadcasts")
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--chunk-size", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    scratch_dir = tempfile.TemporaryDirectory(prefix="arambhgpt-broadcast-bench-")
+    os.environ["DATABASE_PATH"] = str(Path(scratch_dir.name) / "bench.db")
+    os.environ["REMINDER_SCHEDULER"] = "false"
+
+    import app.main  # noqa: F401 - creates every table the broadcast reads
+    from app.models import NotificationBroadcastCreate
+    from app.notification_broadcasts import (
+        BROADCAST_CHUNK_SIZE, create_broadcast, run_broadcast, get_broadcast
+    )
+    chunk_size = args.chunk_size or BROADCAST_CHUNK_SIZE
+
+    started = time.perf_counter()
+    populate(args.users, args.seed)
+    print(f"📦 {args.users} users in {time.perf_counter() - started:.1f}s")
+
+    stop = threading.Event()
+    latencies = []
+    writer = threading.Thread(target=write_path, args=(stop, latencies))
+    writer.start()
+    time.sleep(0.2)
+    baseline = list(latencies)
+
+    broadcast_id = create_broadcast("benchmark", NotificationBroadcastCreate(
+        type="achievement", title="New badge", message="You unlocked a badge"
+    ))
+    tracemalloc.start()
+    started = time.perf_counter()
+    run_broadcast(broadcast_id, chunk_size)
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    during = latencies[len(baseline):]
+    stop.set()
+    writer.join()
+
+    broadcast = get_broadcast(broadcast_id)
+    print(f"📣 {broadcast['sent']} sent, {broadcast['skipped']} skipped by settings "
+          f"in {elapsed:.2f}s ({broadcast['processed'] / elapsed:,.0f} recipients/s, chunk {chunk_size})")
+    print(f"🧠 peak Python memory {peak / 1024:.0f} KB")
+    print(f"✍️  write path before: p50 {percentile(baseline, 0.5) * 1000:.2f} ms  "
+          f"max {max(baseline, default=0) * 1000:.2f} ms ({len(baseline)} writes)")
+    print(f"✍️  write path during: p50 {percentile(during, 0.5) * 1000:.2f} ms  "
+          f"p95 {percentile(during, 0.95) * 1000:.2f} ms  max {max(during, default=0) * 1000:.2f} ms "
+          f"({len(during)} writes)")
+    scratch_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark message upload throughput: one POST per message against the
+bulk endpoint at a few batch sizes, through the real FastAPI app on a
+scratch database.
+
+Usage:
+    python benchmark_bulk_messages.py
+    python benchmark_bulk_messages.py --messages 5000 --conversations 10
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+BATCH_SIZES = (50, 200, 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark single vs bulk message append")
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--conversations", type=int, default=5)
+    args = parser.parse_args()
+
+    scratch_dir = tempfile.TemporaryDirectory(prefix="arambhgpt-bulk-bench-")
+    os.environ["DATABASE_PATH"] = str(Path(scratch_dir.name) / "bench.db")
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.database import get_db_connection
+    from app.auth import create_access_token
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO users (name, email, hashed_password) VALUES ('Bench', 'bench@arambhgpt.test', 'x')")
+    user_id = cursor.lastrowid
+    conn.commit()
+
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'bench@arambhgpt.test'})}"}
+
+    def new_conversations():
+        ids = []
+        for index in range(args.conversations):
+            cursor.execute("INSERT INTO conversations (user_id, title) VALUES (?, ?)", (user_id, f"Bench {index}"))
+            ids.append(cursor.lastrowid)
+        conn.commit()
+        return ids
+
+    def payload(conversation_ids, index, keyed=True):
+        return {
+            "conversation_id": str(conversation_ids[index % len(conversation_ids)]),
+            "content": f"offline message {index} - aaj exams ki wajah se thoda pareshan hun",
+            "sender": "user" if index % 2 == 0 else "ai",
+            "client_message_id": f"bench-{index}" if keyed else None
+        }
+
+    conversation_ids = new_conversations()
+    started = time.perf_counter()
+    for index in range(args.messages):
+        message = payload(conversation_ids, index)
+        response = client.post(
+            f"/api/history/conversations/{message['conversation_id']}/messages",
+            json={"content": message["content"], "sender": message["sender"]},
+            headers=headers
+        )
+        assert response.status_code == 200, response.text
+    single_rate = args.messages / (time.perf_counter() - started)
+    print(f"⏱️  single-message POST      {single_rate:>9.0f} msg/s  ({args.messages} requests)")
+
+    for batch_size in BATCH_SIZES:
+        conversation_ids = new_conversations()
+        started = time.perf_counter()
+        for start in range(0, args.messages, batch_size):
+            batch = [payload(conversation_ids, index) for index in range(start, min(start + batch_size, args.messages))]
+            response = client.post("/api/history/messages/bulk", json={"messages": batch}, headers=headers)
+            assert response.status_code == 200, response.text
+        rate = args.messages / (time.perf_counter() - started)
+
+        # Replaying the same batches must insert nothing
+        started = time.perf_counter()
+        for start in range(0, args.messages, batch_size):
+            batch = [payload(conversation_ids, index) for index in range(start, min(start + batch_size, args.messages))]
+            response = client.post("/api/history/messages/bulk", json={"messages": batch}, headers=headers)
+            assert response.json()["inserted"] == 0
+        replay_rate = args.messages / (time.perf_counter() - started)
+        print(f"⏱️  bulk, batches of {batch_size:<6} {rate:>9.0f} msg/s  ({rate / single_rate:.1f}x)   "
+              f"retry of same batches {replay_rate:>8.0f} msg/s")
+
+    conn.close()
+    scratch_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
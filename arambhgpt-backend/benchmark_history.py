@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark conversation listing with the old per-row COUNT/last-message
+queries against the denormalized counters on conversations.
+
+Builds a scratch database with one user holding --conversations
+conversations of --messages messages each, then times page 1, a middle
+page and the last page through both code paths.
+
+Usage:
+    python benchmark_history.py
+    python benchmark_history.py --conversations 10000 --messages 20 --repeat 20
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+def legacy_list_conversations(cursor, user_id, page, limit):
+    """The listing as it was before the counters: 2 queries per row plus a total COUNT"""
+    offset = (page - 1) * limit
+    cursor.execute("""
+        SELECT c.id, c.title, c.created_at, c.updated_at, c.is_archived
+        FROM conversations c
+        WHERE c.user_id = ?
+        ORDER BY c.updated_at DESC LIMIT ? OFFSET ?
+    """, (user_id, limit, offset))
+    conversation_list = []
+    for conv in cursor.fetchall():
+        cursor.execute("SELECT COUNT(*) FROM messages WHERE conversation_id = ?", (conv['id'],))
+        message_count = cursor.fetchone()[0]
+        cursor.execute(
+            "SELECT content, created_at FROM messages WHERE conversation_id = ? ORDER BY created_at DESC LIMIT 1",
+            (conv['id'],)
+        )
+        last_message = cursor.fetchone()
+        conversation_list.append((conv['id'], message_count, last_message['content'] if last_message else ""))
+    cursor.execute("SELECT COUNT(*) FROM conversations WHERE user_id = ?", (user_id,))
+    return conversation_list, cursor.fetchone()[0]
+
+
+def counter_list_conversations(cursor, user_id, page, limit):
+    """Same query the endpoint now runs"""
+    offset = (page - 1) * limit
+    cursor.execute("""
+        SELECT id, title, created_at, updated_at, is_archived,
+               message_count, last_message_preview, last_message_at,
+               (SELECT COUNT(*) FROM conversations WHERE user_id = ?) AS total_count
+        FROM conversations
+        WHERE user_id = ?
+        ORDER BY updated_at DESC
+        LIMIT ? OFFSET ?
+    """, (user_id, user_id, limit, offset))
+    rows = cursor.fetchall()
+    return [(row['id'], row['message_count'], row['last_message_preview']) for row in rows], rows[0]['total_count']
+
+
+def populate(conversations, messages_per_conversation, seed):
+    from app.database import get_db_connection
+    rng = random.Random(seed)
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "INSERT INTO users (name, email, hashed_password) VALUES ('Bench', 'bench@arambhgpt.test', 'x')"
+    )
+    user_id = cursor.lastrowid
+    words = "main aaj bahut pareshan hun kyunki exams office family neend tension sab".split()
+    for index in range(conversations):
+        cursor.execute(
+            "INSERT INTO conversations (user_id, title) VALUES (?, ?)",
+            (user_id, f"Conversation {index}")
+        )
+        conversation_id = cursor.lastrowid
+        cursor.executemany(
+            "INSERT INTO messages (conversation_id, content, sender) VALUES (?, ?, ?)",
+            [
+                (conversation_id, " ".join(rng.choices(words, k=12)), "user" if turn % 2 == 0 else "ai")
+                for turn in range(messages_per_conversation)
+            ]
+        )
+        # Distinct activity times so page order is well defined
+        cursor.execute(
+            "UPDATE conversations SET updated_at = datetime('now', ?) WHERE id = ?",
+            (f"-{conversations - index} minutes", conversation_id)
+        )
+    conn.commit()
+    return conn, user_id
+
+
+def time_call(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return round(timings[len(timings) // 2] * 1000, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark conversation listing")
+    parser.add_argument("--conversations", type=int, default=10000)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    scratch_dir = tempfile.TemporaryDirectory(prefix="arambhgpt-history-bench-")
+    os.environ["DATABASE_PATH"] = str(Path(scratch_dir.name) / "bench.db")
+
+    started = time.perf_counter()
+    conn, user_id = populate(args.conversations, args.messages, args.seed)
+    print(f"📦 {args.conversations} conversations x {args.messages} messages in {time.perf_counter() - started:.1f}s")
+
+    cursor = conn.cursor()
+    last_page = max(1, -(-args.conversations // args.limit))
+    pages = (("first page", 1), ("middle page", last_page // 2 or 1), ("last page", last_page))
+    results = {}
+    for label, page in pages:
+        legacy = legacy_list_conversations(cursor, user_id, page, args.limit)
+        counters = counter_list_conversations(cursor, user_id, page, args.limit)
+        assert [row[:2] for row in legacy[0]] == [row[:2] for row in counters[0]] and legacy[1] == counters[1]
+        results[label] = (
+            time_call(lambda: legacy_list_conversations(cursor, user_id, page, args.limit), args.repeat),
+            time_call(lambda: counter_list_conversations(cursor, user_id, page, args.limit), args.repeat)
+        )
+
+    # The legacy queries as originally deployed, without the messages index
+    cursor.execute("DROP INDEX idx_messages_conversation_created")
+    for label, page in pages:
+        unindexed_ms = time_call(lambda: legacy_list_conversations(cursor, user_id, page, args.limit), args.repeat)
+        legacy_ms, counter_ms = results[label]
+        print(f"⏱️  {label:<12} legacy {unindexed_ms:>9} ms unindexed / {legacy_ms:>7} ms indexed "
+              f"({2 * args.limit + 2} queries)   counters {counter_ms:>7} ms (1 query)")
+
+    conn.close()
+    scratch_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark the n-gram language identifier against the old keyword heuristic.
+
+Reports accuracy on the held-out EVALUATION_SAMPLES and throughput in
+messages per second for both detectors, then a calibration table: mean
+confidence against accuracy for 1, 2, 3 and 4+ word prefixes of the
+held-out samples (what CONFIDENCE_PRIOR_FEATURES is fitted to).
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.language_detector import language_identifier
+from app.language_samples import EVALUATION_SAMPLES
+from app.language_detector import _words
+
+def legacy_detect_language(message: str) -> str:
+    """Keyword heuristic previously used by chat.detect_language"""
+    message_lower = message.lower()
+
+    if any('ऀ' <= char <= 'ॿ' for char in message):
+        return 'hindi'
+
+    strong_hinglish = ['yaar', 'bhai', 'kya', 'hai', 'hun', 'hoon', 'kar', 'karo', 'main', 'mein', 'tum', 'tumhe',
+                       'achha', 'accha', 'theek', 'thik', 'sahi', 'galat', 'bahut', 'bohot', 'kuch', 'koi',
+                       'batao', 'samajh', 'dekho', 'suno', 'arre', 'matlab', 'bilkul', 'ekdum', 'jyda', 'zyada',
+                       'likhte', 'kyu', 'kyun', 'itna', 'msg', 'baat']
+    strong_english = ['there', 'nice', 'meet', 'doing', 'today', 'anything', 'would', 'like', 'talk', 'about',
+                      'here', 'listen', 'without', 'judgment', 'offer', 'support', 'understand', 'feeling',
+                      'overwhelmed', 'amount', 'messaging', 'sounds', 'prefer', 'shorter', 'concise', 'responses']
+
+    hinglish_count = sum(1 for word in strong_hinglish if word in message_lower)
+    english_count = sum(1 for word in strong_english if word in message_lower)
+
+    if any(phrase in message_lower for phrase in ['tum itna', 'kyu likhte', 'msg kyu', 'jyda msg']):
+        return 'hinglish'
+    if any(phrase in message_lower for phrase in ['nice to meet', 'how are you doing', 'anything you\'d like']):
+        return 'english'
+
+    if hinglish_count > 0:
+        return 'hinglish'
+    elif english_count > 0:
+        return 'english'
+    else:
+        words = message_lower.split()
+        if len(words) <= 3 and any(word in ['kya', 'hai', 'tum', 'main'] for word in words):
+            return 'hinglish'
+        elif len(words) <= 3 and any(word in ['how', 'are', 'you', 'what'] for word in words):
+            return 'english'
+        else:
+            return 'hinglish'
+
+def measure(name: str, detect, rounds: int = 200):
+    """Print accuracy and throughput for a detector"""
+    correct = sum(1 for text, expected in EVALUATION_SAMPLES if detect(text) == expected)
+    accuracy = correct / len(EVALUATION_SAMPLES)
+
+    texts = [text for text, _ in EVALUATION_SAMPLES]
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in texts:
+            detect(text)
+    elapsed = time.perf_counter() - start
+    throughput = rounds * len(texts) / elapsed
+
+    print(f"{name:<12} accuracy {accuracy:6.1%} ({correct}/{len(EVALUATION_SAMPLES)})  "
+          f"throughput {throughput:>10,.0f} msg/s")
+
+def calibration():
+    """Mean confidence vs accuracy by prefix length; they should be close"""
+    bands = {}
+    for text, expected in EVALUATION_SAMPLES:
+        words = _words(text)
+        for length in range(1, len(words) + 1):
+            language, confidence = language_identifier.identify(" ".join(words[:length]))
+            bands.setdefault(min(length, 4), []).append((language == expected, confidence))
+
+    print("\n🎯 Calibration on held-out prefixes")
+    for length, results in sorted(bands.items()):
+        accuracy = sum(correct for correct, _ in results) / len(results)
+        confidence = sum(value for _, value in results) / len(results)
+        label = f"{length}+ words" if length == 4 else f"{length} word{'s' if length > 1 else ''}"
+        print(f"  {label:<9} n={len(results):<4} accuracy {accuracy:6.1%}  mean confidence {confidence:6.1%}")
+
+def main():
+    print(f"📊 Language identification on {len(EVALUATION_SAMPLES)} held-out samples")
+    measure("heuristic", legacy_detect_language)
+    measure("ngram", language_identifier.detect)
+
+    texts = [text for text, _ in EVALUATION_SAMPLES] * 200
+    start = time.perf_counter()
+    language_identifier.identify_batch(texts)
+    elapsed = time.perf_counter() - start
+    print(f"{'ngram batch':<12} throughput {len(texts) / elapsed:>10,.0f} msg/s")
+
+    calibration()
+
+    misses = [(text, expected) for text, expected in EVALUATION_SAMPLES
+              if language_identifier.detect(text) != expected]
+    if misses:
+        print("\n❌ n-gram misses:")
+        for text, expected in misses:
+            language, confidence = language_identifier.identify(text)
+            print(f"  {text!r}: expected {expected}, got {language} ({confidence:.2f})")
+
+if __name__ == "__main__":
+    main()
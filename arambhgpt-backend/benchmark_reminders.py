@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark the reminder scheduler: ticks over a scratch database with
+--users users whose reminder times cluster around the evening, with
+--subscribers of them holding open notification streams.
+
+Reports the busiest mood-reminder bucket, the all-users wellness tip
+bucket, a full day of ticks, and peak Python memory per tick.
+
+Usage:
+    python benchmark_reminders.py
+    python benchmark_reminders.py --users 200000 --subscribers 5000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+def populate(users, seed):
+    from app.database import get_db_connection
+    rng = random.Random(seed)
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.executemany(
+        "INSERT INTO users (name, email, hashed_password) VALUES (?, ?, 'x')",
+        [(f"User {index}", f"user{index}@arambhgpt.test") for index in range(users)]
+    )
+    # Most people keep the 20:00 default; the rest spread over the day
+    settings = []
+    for user_id in range(1, users + 1):
+        minute = 20 * 60 if rng.random() < 0.3 else int(rng.gauss(20 * 60, 180)) % 1440
+        settings.append((str(user_id), f"{minute // 60:02d}:{minute % 60:02d}", rng.random() < 0.9))
+    cursor.executemany(
+        "INSERT INTO notification_settings (user_id, reminder_time, mood_reminders) VALUES (?, ?, ?)",
+        settings
+    )
+    conn.commit()
+    conn.close()
+
+
+def timed_slot(scheduler, slot):
+    tracemalloc.start()
+    started = time.perf_counter()
+    created = scheduler.process_slot(slot, slot)
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return created, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the batched reminder scheduler")
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--subscribers", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    scratch_dir = tempfile.TemporaryDirectory(prefix="arambhgpt-reminder-bench-")
+    os.environ["DATABASE_PATH"] = str(Path(scratch_dir.name) / "bench.db")
+    os.environ["REMINDER_SCHEDULER"] = "false"
+
+    import app.main  # noqa: F401 - creates every table the scheduler reads
+    from app.notification_bus import notification_bus
+    from app.reminder_scheduler import ReminderScheduler, WELLNESS_TIP_TIME
+
+    started = time.perf_counter()
+    populate(args.users, args.seed)
+    print(f"📦 {args.users} users with reminder settings in {time.perf_counter() - started:.1f}s")
+
+    async def run():
+        rng = random.Random(args.seed)
+        subscriptions = [notification_bus.subscribe(user_id)
+                         for user_id in rng.sample(range(1, args.users + 1), args.subscribers)]
+        scheduler = ReminderScheduler("benchmark")
+        day = datetime(2026, 1, 5)  # a Monday
+
+        busiest = day.replace(hour=20, minute=0)
+        created, elapsed, peak = timed_slot(scheduler, busiest)
+        print(f"⏱️  20:00 mood bucket     {created:>7} notifications  {elapsed * 1000:>8.1f} ms  "
+              f"peak {peak / 1024:>7.0f} KB")
+
+        hours, minutes = map(int, WELLNESS_TIP_TIME.split(":"))
+        created, elapsed, peak = timed_slot(scheduler, day.replace(hour=hours, minute=minutes))
+        print(f"⏱️  {WELLNESS_TIP_TIME} tip bucket      {created:>7} notifications  {elapsed * 1000:>8.1f} ms  "
+              f"peak {peak / 1024:>7.0f} KB")
+
+        await asyncio.sleep(0.1)
+        delivered = sum(subscription.queue.qsize() for subscription in subscriptions)
+        print(f"📣 {delivered} events queued for {args.subscribers} open streams")
+        for subscription in subscriptions:
+            notification_bus.unsubscribe(subscription)
+
+        next_day = day + timedelta(days=1)
+        started = time.perf_counter()
+        total = sum(scheduler.process_slot(next_day + timedelta(minutes=minute), next_day) for minute in range(1440))
+        elapsed = time.perf_counter() - started
+        print(f"🗓️  full day, 1440 ticks  {total:>7} notifications  {elapsed:>8.1f} s")
+        stats = scheduler.get_stats()["tick_latency"]
+        print(f"📊 tick latency p50 {stats['p50_ms']} ms  p95 {stats['p95_ms']} ms  max {stats['max_ms']} ms")
+
+    asyncio.run(run())
+    scratch_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Benchmark conversation search: the old LIKE '%term%' scan against the
+FTS5 index with BM25 ranking.
+
+Builds a scratch database with --messages messages spread over --users
+users (the FTS triggers index them as they are inserted), then times a
+handful of queries for the heaviest user and a typical one through
+both code paths.
+
+Usage:
+    python benchmark_search.py
+    python benchmark_search.py --messages 3000000 --users 5000 --repeat 10
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+QUERIES = ("pareshan", "exam tension", "neend", "परेशान", "office boss", "shabd4321", "koibhinahi")
+
+
+def legacy_search(cursor, user_id, query, limit):
+    """The search as it was before FTS: LIKE over every message in a correlated EXISTS"""
+    search_term = f"%{query}%"
+    cursor.execute("""
+        SELECT c.*
+        FROM conversations c
+        WHERE c.user_id = ? AND (c.title LIKE ? OR EXISTS (
+            SELECT 1 FROM messages WHERE conversation_id = c.id AND content LIKE ?
+        ))
+        ORDER BY c.updated_at DESC
+        LIMIT ? OFFSET 0
+    """, (user_id, search_term, search_term, limit))
+    return cursor.fetchall()
+
+
+def fts_search(cursor, user_id, query, limit):
+    """Same calls the endpoint now makes"""
+    from app.search_index import rank_conversations, highlight_conversations
+    found = rank_conversations(cursor, user_id, query, limit, 0)
+    highlight_conversations(cursor, user_id, query, [row['id'] for row in found["rows"]])
+    return found
+
+
+def populate(messages, users, conversation_size, seed):
+    from app.database import get_db_connection
+    import app.search_index  # noqa: F401 - creates the FTS tables and triggers
+    rng = random.Random(seed)
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.executemany(
+        "INSERT INTO users (name, email, hashed_password) VALUES (?, ?, 'x')",
+        [(f"User {index}", f"user{index}@arambhgpt.test") for index in range(users)]
+    )
+    cursor.execute("SELECT id FROM users ORDER BY id")
+    user_ids = [row[0] for row in cursor.fetchall()]
+
+    words = ("main aaj bahut pareshan pareshani hun kyunki exams exam office boss family neend "
+             "tension sab dost ghar kaam padhai result job interview मैं बहुत परेशान हूँ नींद").split()
+    words += [f"shabd{index}" for index in range(5000)]
+    # Zipf skew: the first user is heavy, like a long-time daily user
+    weights = [1.0 / (rank + 1) for rank in range(users)]
+
+    remaining = messages
+    while remaining > 0:
+        user_id = rng.choices(user_ids, weights)[0]
+        cursor.execute(
+            "INSERT INTO conversations (user_id, title) VALUES (?, ?)",
+            (user_id, " ".join(rng.choices(words[:30], k=2)).title())
+        )
+        conversation_id = cursor.lastrowid
+        batch = min(remaining, conversation_size)
+        cursor.executemany(
+            "INSERT INTO messages (conversation_id, content, sender) VALUES (?, ?, ?)",
+            [
+                (conversation_id, " ".join(rng.choices(words, k=rng.randint(6, 24))), "user" if turn % 2 == 0 else "ai")
+                for turn in range(batch)
+            ]
+        )
+        remaining -= batch
+    conn.commit()
+    return conn, user_ids
+
+
+def time_call(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return round(timings[len(timings) // 2] * 1000, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark conversation search")
+    parser.add_argument("--messages", type=int, default=1000000)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--conversation-size", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    scratch_dir = tempfile.TemporaryDirectory(prefix="arambhgpt-search-bench-")
+    os.environ["DATABASE_PATH"] = str(Path(scratch_dir.name) / "bench.db")
+
+    started = time.perf_counter()
+    conn, user_ids = populate(args.messages, args.users, args.conversation_size, args.seed)
+    elapsed = time.perf_counter() - started
+    cursor = conn.cursor()
+    print(f"📦 {args.messages} messages for {args.users} users indexed in {elapsed:.1f}s "
+          f"({args.messages / elapsed:.0f} msg/s)")
+
+    from app.search_index import rebuild_search_index
+    started = time.perf_counter()
+    rebuild_search_index()
+    print(f"🔁 rebuild + optimize in {time.perf_counter() - started:.1f}s")
+
+    for label, user_id in (("heaviest user", user_ids[0]), ("typical user", user_ids[len(user_ids) // 2])):
+        cursor.execute(
+            "SELECT COUNT(*) FROM messages m JOIN conversations c ON c.id = m.conversation_id WHERE c.user_id = ?",
+            (user_id,)
+        )
+        print(f"👤 {label}: {cursor.fetchone()[0]} messages")
+        for query in QUERIES:
+            found = fts_search(cursor, user_id, query, args.limit)
+            legacy_ms = time_call(lambda: legacy_search(cursor, user_id, query, args.limit), args.repeat)
+            fts_ms = time_call(lambda: fts_search(cursor, user_id, query, args.limit), args.repeat)
+            print(f"⏱️  {query!r:<16} LIKE {legacy_ms:>9} ms   FTS5 {fts_ms:>8} ms "
+                  f"({found['total_count']} matching conversations)")
+
+    conn.close()
+    scratch_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
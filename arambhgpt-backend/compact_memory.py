@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Fold old conversation_context rows into per-user memory digests and prune
+rows past the retention window. Safe to run repeatedly (e.g. nightly).
+
+Usage:
+    python compact_memory.py
+    python compact_memory.py --user 42 --retention-days 60
+"""
+
+import argparse
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.ai_memory import ConversationMemory, compact_user_memory, compact_all_user_memory, MEMORY_RETENTION_DAYS
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact conversation memory into per-user digests")
+    parser.add_argument("--user", help="Compact a single user id")
+    parser.add_argument("--retention-days", type=int, default=MEMORY_RETENTION_DAYS)
+    args = parser.parse_args()
+    
+    # Make sure the digest table exists on older databases
+    ConversationMemory()
+    
+    if args.user:
+        result = compact_user_memory(args.user, args.retention_days)
+        print(f"✅ User {result['user_id']}: folded {result['folded']} rows, pruned {result['pruned']}")
+    else:
+        totals = compact_all_user_memory(args.retention_days)
+        print(f"✅ Compacted {totals['users']} users: folded {totals['folded']} rows, pruned {totals['pruned']}")
+
+if __name__ == "__main__":
+    main()
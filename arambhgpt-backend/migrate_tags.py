@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Copy tags stored in JSON text columns into the normalized junction tables:
+conversation topics, support group tags, mood emotions/activities and
+group message reactions. Safe to re-run.
+
+Usage:
+    python migrate_tags.py
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Importing the owning modules creates any missing tables
+from app.ai_memory import ConversationMemory
+from app import mood, social
+from app.tagging import migrate_json_tags
+
+def main():
+    ConversationMemory()
+    migrated = migrate_json_tags()
+    for table, count in migrated.items():
+        print(f"✅ {table}: {count} rows")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Recount the per-user unread notification counters from the notifications
+table, keeping each user's read watermark. Safe to re-run.
+
+Usage:
+    python rebuild_notification_counters.py
+    python rebuild_notification_counters.py --user 42
+"""
+
+import argparse
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.notifications import rebuild_notification_counters
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild unread notification counters")
+    parser.add_argument("--user", type=int, help="Rebuild a single user id")
+    args = parser.parse_args()
+
+    totals = rebuild_notification_counters(args.user)
+    print(f"✅ Rebuilt unread counters for {totals['users']} users ({totals['unread']} unread)")
+
+if __name__ == "__main__":
+    main()
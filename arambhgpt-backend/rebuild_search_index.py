@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Rebuild the FTS5 search indexes over messages and conversation titles
+from the source tables and merge their segments. Run it after restoring
+a backup, after bulk edits made with the triggers dropped, or when
+--check reports a mismatch.
+
+Usage:
+    python rebuild_search_index.py
+    python rebuild_search_index.py --check
+    python rebuild_search_index.py --no-optimize
+"""
+
+import argparse
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.search_index import rebuild_search_index, check_search_index
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the conversation search index")
+    parser.add_argument("--check", action="store_true", help="Only verify the indexes against their tables")
+    parser.add_argument("--no-optimize", action="store_true", help="Skip merging index segments after the rebuild")
+    args = parser.parse_args()
+
+    if args.check:
+        broken = check_search_index()
+        for table in broken:
+            print(f"❌ {table} is out of sync; run without --check to rebuild")
+        if not broken:
+            print("✅ Search indexes match their tables")
+        sys.exit(1 if broken else 0)
+
+    started = time.perf_counter()
+    counts = rebuild_search_index(optimize=not args.no_optimize)
+    for table, count in counts.items():
+        print(f"✅ {table}: {count} rows")
+    print(f"⏱️  Rebuilt in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Replay a corpus of chat messages through the real /chat stack in-process.
+
+Gemini is replaced by a fake provider with configurable latency, and the
+app runs against a scratch SQLite database. The script prints (or writes)
+a JSON report with throughput, latency percentiles, DB queries per turn,
+event-loop lag and per-stage pipeline stats.
+
+Usage:
+    python replay_chat.py --turns 500 --concurrency 8 --llm-latency-ms 300
+    python replay_chat.py --corpus recorded.jsonl --output report.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from contextvars import ContextVar
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# DB query counter for the turn running in the current context
+_turn_queries: ContextVar = ContextVar("turn_queries", default=None)
+_real_connect = sqlite3.connect
+
+
+def _counting_connect(*args, **kwargs):
+    """sqlite3.connect wrapper that counts non-PRAGMA statements per turn"""
+    conn = _real_connect(*args, **kwargs)
+
+    def trace(statement):
+        counter = _turn_queries.get()
+        if counter is not None and not statement.lstrip().upper().startswith("PRAGMA"):
+            counter[0] += 1
+
+    conn.set_trace_callback(trace)
+    return conn
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGeminiModel:
+    """Stand-in for genai.GenerativeModel with configurable latency"""
+
+    def __init__(self, latency_ms: float, jitter_ms: float):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.calls = 0
+
+    def generate_content(self, prompt, generation_config=None):
+        # Blocking on purpose: the real client call is synchronous too
+        self.calls += 1
+        delay = max(0.0, self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms))
+        time.sleep(delay / 1000)
+        return FakeResponse("Main samajh sakti hun. Batao kya hua?")
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(values, scale=1.0, digits=3):
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values) * scale, digits) if values else 0.0,
+        "p50": round(percentile(values, 0.50) * scale, digits),
+        "p95": round(percentile(values, 0.95) * scale, digits),
+        "p99": round(percentile(values, 0.99) * scale, digits),
+        "max": round(max(values) * scale, digits) if values else 0.0
+    }
+
+
+def load_corpus(path: str):
+    """Read messages from a JSONL file ({"message": ...}) or plain text lines"""
+    messages = []
+    with open(path, encoding="utf-8") as corpus_file:
+        for line in corpus_file:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                messages.append(json.loads(line)["message"])
+            else:
+                messages.append(line)
+    return messages
+
+
+def generated_corpus():
+    """Hindi/Hinglish/English messages from the labeled language samples"""
+    from app.language_samples import TRAINING_SAMPLES, EVALUATION_SAMPLES
+    messages = [text for samples in TRAINING_SAMPLES.values() for text in samples]
+    messages.extend(text for text, _ in EVALUATION_SAMPLES)
+    return messages
+
+
+async def post_json(app, path: str, payload: dict, token: str):
+    """Drive one POST through the ASGI app; returns (status, body, latency)"""
+    body = json.dumps(payload).encode()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"host", b"replay"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"authorization", f"Bearer {token}".encode())
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": ("replay", 80)
+    }
+    request_sent = False
+    status = 0
+    chunks = []
+    start = time.perf_counter()
+    latency = None
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.sleep(3600)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status, latency
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body") and latency is None:
+                # Background tasks run after this point; they are not latency
+                latency = time.perf_counter() - start
+
+    await app(scope, receive, send)
+    return status, b"".join(chunks), latency if latency is not None else time.perf_counter() - start
+
+
+async def monitor_loop_lag(samples, stop: asyncio.Event, interval: float = 0.01):
+    """Record how late the event loop wakes a periodic sleeper"""
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - expected))
+
+
+async def replay(args, messages):
+    from app.main import app
+    from app import chat
+    from app.auth import create_access_token, get_password_hash
+    from app.database import get_db_connection
+    from app.pipeline_profiler import profiler
+
+    fake_model = FakeGeminiModel(args.llm_latency_ms, args.llm_jitter_ms)
+    chat.gemini_model = fake_model
+    chat.GEMINI_AVAILABLE = True
+    profiler.reset()
+
+    # Replay users
+    conn = get_db_connection()
+    password = get_password_hash("replay")
+    tokens = []
+    for index in range(args.users):
+        email = f"replay{index}@arambhgpt.test"
+        conn.execute(
+            "INSERT OR IGNORE INTO users (name, email, hashed_password) VALUES (?, ?, ?)",
+            (f"Replay {index}", email, password)
+        )
+        tokens.append(create_access_token({"sub": email}))
+    conn.commit()
+    conn.close()
+
+    rng = random.Random(args.seed)
+    turns = [(rng.choice(tokens), messages[i % len(messages)] if args.sequential else rng.choice(messages))
+             for i in range(args.turns)]
+    queue = asyncio.Queue()
+    for turn in turns:
+        queue.put_nowait(turn)
+
+    latencies, query_counts, lag_samples = [], [], []
+    statuses, providers = {}, {}
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        while True:
+            try:
+                token, message = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            counter = [0]
+            context_token = _turn_queries.set(counter)
+            try:
+                status, body, latency = await post_json(app, "/chat", {"message": message}, token)
+            except Exception as e:
+                errors += 1
+                print(f"❌ Replay error: {e}", file=sys.stderr)
+                continue
+            finally:
+                _turn_queries.reset(context_token)
+            latencies.append(latency)
+            query_counts.append(counter[0])
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 200:
+                provider = json.loads(body).get("ai_provider", "unknown")
+                providers[provider] = providers.get(provider, 0) + 1
+            else:
+                errors += 1
+
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(monitor_loop_lag(lag_samples, stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    wall_time = time.perf_counter() - started
+    stop.set()
+    await lag_task
+
+    return {
+        "config": {
+            "turns": args.turns,
+            "concurrency": args.concurrency,
+            "users": args.users,
+            "llm_latency_ms": args.llm_latency_ms,
+            "llm_jitter_ms": args.llm_jitter_ms,
+            "corpus": args.corpus or "generated",
+            "corpus_size": len(messages),
+            "seed": args.seed
+        },
+        "wall_time_s": round(wall_time, 3),
+        "throughput_turns_per_s": round(len(latencies) / wall_time, 2) if wall_time else 0.0,
+        "errors": errors,
+        "status_codes": {str(code): count for code, count in statuses.items()},
+        "ai_providers": providers,
+        "llm_calls": fake_model.calls,
+        "latency_ms": summarize(latencies, 1000),
+        "db_queries_per_turn": summarize(query_counts, digits=2),
+        "event_loop_lag_ms": summarize(lag_samples, 1000),
+        "pipeline": profiler.get_stats(include_traces=False)["stages"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay chat traffic through /chat in-process")
+    parser.add_argument("--corpus", help="JSONL ({\"message\": ...}) or text file, one message per line")
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--sequential", action="store_true", help="Replay corpus in order instead of sampling")
+    parser.add_argument("--database", help="SQLite path to use (default: fresh temp file)")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    # Point the app at a scratch DB and count queries before it is imported
+    scratch_dir = None
+    if args.database:
+        os.environ["DATABASE_PATH"] = args.database
+    else:
+        scratch_dir = tempfile.TemporaryDirectory(prefix="arambhgpt-replay-")
+        os.environ["DATABASE_PATH"] = str(Path(scratch_dir.name) / "replay.db")
+    sqlite3.connect = _counting_connect
+
+    messages = load_corpus(args.corpus) if args.corpus else generated_corpus()
+    report = asyncio.run(replay(args, messages))
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(output, encoding="utf-8")
+        print(f"✅ Replay report written to {args.output}")
+    else:
+        print(output)
+
+    if scratch_dir:
+        scratch_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
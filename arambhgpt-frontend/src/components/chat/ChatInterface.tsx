@@ -28,9 +28,14 @@ export function ChatInterface({
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const [isInitialLoading, setIsInitialLoading] = useState(false);
+  // Cursor for the window before the loaded messages; null once the start is reached
+  const [olderCursor, setOlderCursor] = useState<string | null>(null);
+  const [isLoadingOlder, setIsLoadingOlder] = useState(false);
 
   const messagesEndRef = useRef<HTMLDivElement>(null);
   const messagesContainerRef = useRef<HTMLDivElement>(null);
+  // Distance from the bottom to keep when older messages are prepended
+  const keepScrollFromBottom = useRef<number | null>(null);
   const chatInputRef = useRef<ChatInputRef>(null);
   const { getPersonalizedPrompt, analyzeMessage, updateContext } = useAIContext();
 
@@ -40,6 +45,12 @@ export function ChatInterface({
   };
 
   useEffect(() => {
+    const container = messagesContainerRef.current;
+    if (keepScrollFromBottom.current !== null && container) {
+      container.scrollTop = container.scrollHeight - keepScrollFromBottom.current;
+      keepScrollFromBottom.current = null;
+      return;
+    }
     scrollToBottom();
   }, [messages]);
 
@@ -75,6 +86,7 @@ export function ChatInterface({
     if (conversationId) {
       loadConversationMessages(conversationId);
     } else {
+      setOlderCursor(null);
       // Show welcome message for new conversations
       setMessages([
         {
@@ -98,6 +110,7 @@ Kaise ho? Kya chal raha hai aaj?`,
       setError(null);
       const conversation = await apiClient.getConversation(id);
       setMessages(conversation.messages);
+      setOlderCursor(conversation.before_cursor ?? null);
     } catch (err) {
       console.error('Failed to load conversation:', err);
       setError('Failed to load conversation. Please try again.');
@@ -106,6 +119,26 @@ Kaise ho? Kya chal raha hai aaj?`,
     }
   };
 
+  const loadOlderMessages = async () => {
+    if (!conversationId || !olderCursor || isLoadingOlder) return;
+
+    try {
+      setIsLoadingOlder(true);
+      const page = await apiClient.getConversation(conversationId, { before: olderCursor });
+      const container = messagesContainerRef.current;
+      if (container) {
+        keepScrollFromBottom.current = container.scrollHeight - container.scrollTop;
+      }
+      setMessages(prev => [...page.messages, ...prev]);
+      setOlderCursor(page.before_cursor ?? null);
+    } catch (err) {
+      console.error('Failed to load older messages:', err);
+      setError('Failed to load older messages. Please try again.');
+    } finally {
+      setIsLoadingOlder(false);
+    }
+  };
+
   const handleVoiceMessage = async (audioBlob: Blob) => {
     // For now, show a placeholder message for voice
     // In future, we can add speech-to-text conversion
@@ -335,6 +368,15 @@ Kaise ho? Kya chal raha hai aaj?`,
             </div>
           )}
 
+          {/* Earlier messages are fetched a window at a time */}
+          {conversationId && olderCursor && (
+            <div className="flex justify-center mb-6">
+              <Button variant="ghost" size="sm" isLoading={isLoadingOlder} onClick={loadOlderMessages}>
+                Load older messages
+              </Button>
+            </div>
+          )}
+
           {/* Messages */}
           <div className="space-y-6">
             {messages.map((message, index) => (
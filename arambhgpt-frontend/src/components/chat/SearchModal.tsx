@@ -2,7 +2,7 @@
 
 import React, { useState, useEffect } from 'react';
 import { Modal, Input, Button, Dropdown, LoadingSpinner, ErrorMessage } from '@/components/ui';
-import { SearchRequest, SearchResult, DropdownOption } from '@/types';
+import { SearchRequest, SearchResult, DropdownOption, HIGHLIGHT_OPEN, HIGHLIGHT_CLOSE } from '@/types';
 import { apiClient } from '@/lib/api';
 
 interface SearchModalProps {
@@ -115,6 +115,18 @@ export function SearchModal({ isOpen, onClose, onResultSelect }: SearchModalProp
     );
   };
 
+  // Server highlights mark matches with control characters; render them as text
+  const renderHighlight = (highlight: string) => {
+    const parts = highlight.split(new RegExp(`${HIGHLIGHT_OPEN}([\\s\\S]*?)${HIGHLIGHT_CLOSE}`));
+    return parts.map((part, index) =>
+      index % 2 === 1 ? (
+        <mark key={index} className="bg-yellow-200 px-1 rounded">
+          {part}
+        </mark>
+      ) : part
+    );
+  };
+
   const formatDate = (dateString: string) => {
     const date = new Date(dateString);
     return date.toLocaleDateString('en-US', {
@@ -262,7 +274,7 @@ export function SearchModal({ isOpen, onClose, onResultSelect }: SearchModalProp
                   <p className="text-xs text-gray-500 mb-1">Matching content:</p>
                   {result.highlights.slice(0, 2).map((highlight, index) => (
                     <p key={index} className="text-xs text-gray-600 italic">
-                      "{highlightText(highlight, query)}"
+                      "{renderHighlight(highlight)}"
                     </p>
                   ))}
                 </div>
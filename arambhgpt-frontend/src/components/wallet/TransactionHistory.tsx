@@ -8,11 +8,24 @@ interface TransactionHistoryProps {
   isOpen: boolean;
   onClose: () => void;
   transactions: Transaction[];
+  hasMore?: boolean;
+  onLoadMore?: () => Promise<void>;
 }
 
-export function TransactionHistory({ isOpen, onClose, transactions }: TransactionHistoryProps) {
+export function TransactionHistory({ isOpen, onClose, transactions, hasMore = false, onLoadMore }: TransactionHistoryProps) {
   const [filter, setFilter] = useState<'all' | 'credit' | 'debit'>('all');
   const [sortBy, setSortBy] = useState<'date' | 'amount'>('date');
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
+
+  const handleLoadMore = async () => {
+    if (!onLoadMore) return;
+    setIsLoadingMore(true);
+    try {
+      await onLoadMore();
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
 
   const filteredTransactions = transactions
     .filter(transaction => filter === 'all' || transaction.type === filter)
@@ -163,6 +176,15 @@ export function TransactionHistory({ isOpen, onClose, transactions }: Transactio
               ))}
             </div>
           )}
+
+          {/* Older transactions are fetched a page at a time */}
+          {hasMore && onLoadMore && (
+            <div className="flex justify-center mt-4">
+              <Button variant="ghost" size="sm" isLoading={isLoadingMore} onClick={handleLoadMore}>
+                Load older transactions
+              </Button>
+            </div>
+          )}
         </div>
 
         {/* Export Options */}
@@ -8,7 +8,7 @@ import { TransactionHistory } from './TransactionHistory';
 import { ActiveSessionCard } from './ActiveSessionCard';
 
 export function WalletDashboard() {
-  const { balance, transactions, activeSession, isLoading } = useWallet();
+  const { balance, transactions, activeSession, isLoading, hasMoreTransactions, loadMoreTransactions } = useWallet();
   const [showRechargeModal, setShowRechargeModal] = useState(false);
   const [showTransactions, setShowTransactions] = useState(false);
 
@@ -171,6 +171,8 @@ export function WalletDashboard() {
         isOpen={showTransactions}
         onClose={() => setShowTransactions(false)}
         transactions={transactions}
+        hasMore={hasMoreTransactions}
+        onLoadMore={loadMoreTransactions}
       />
     </div>
   );
@@ -16,6 +16,9 @@ interface UseChatReturn {
   error: string | null;
   sendMessage: (content: string) => Promise<void>;
   loadConversation: (id: string) => Promise<void>;
+  hasOlderMessages: boolean;
+  isLoadingOlder: boolean;
+  loadOlderMessages: () => Promise<void>;
   clearMessages: () => void;
   clearError: () => void;
   retryLastMessage: () => Promise<void>;
@@ -30,6 +33,9 @@ export function useChat({
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const [lastUserMessage, setLastUserMessage] = useState<string>('');
+  // Conversations load newest messages first; this pages back through the rest
+  const [olderCursor, setOlderCursor] = useState<{ id: string; cursor: string } | null>(null);
+  const [isLoadingOlder, setIsLoadingOlder] = useState(false);
 
   const clearError = useCallback(() => {
     setError(null);
@@ -37,6 +43,7 @@ export function useChat({
 
   const clearMessages = useCallback(() => {
     setMessages([]);
+    setOlderCursor(null);
     setError(null);
   }, []);
 
@@ -46,6 +53,7 @@ export function useChat({
       setError(null);
       const conversation = await apiClient.getConversation(id);
       setMessages(conversation.messages);
+      setOlderCursor(conversation.before_cursor ? { id, cursor: conversation.before_cursor } : null);
     } catch (err) {
       const errorMessage = 'Failed to load conversation. Please try again.';
       setError(errorMessage);
@@ -55,6 +63,23 @@ export function useChat({
     }
   }, [onError]);
 
+  const loadOlderMessages = useCallback(async () => {
+    if (!olderCursor || isLoadingOlder) return;
+
+    try {
+      setIsLoadingOlder(true);
+      const page = await apiClient.getConversation(olderCursor.id, { before: olderCursor.cursor });
+      setMessages(prev => [...page.messages, ...prev]);
+      setOlderCursor(page.before_cursor ? { id: olderCursor.id, cursor: page.before_cursor } : null);
+    } catch (err) {
+      const errorMessage = 'Failed to load older messages. Please try again.';
+      setError(errorMessage);
+      if (onError) onError(errorMessage);
+    } finally {
+      setIsLoadingOlder(false);
+    }
+  }, [olderCursor, isLoadingOlder, onError]);
+
   const sendMessage = useCallback(async (content: string) => {
     if (!content.trim() || isLoading) return;
 
@@ -156,6 +181,9 @@ export function useChat({
     error,
     sendMessage,
     loadConversation,
+    hasOlderMessages: olderCursor !== null,
+    isLoadingOlder,
+    loadOlderMessages,
     clearMessages,
     clearError,
     retryLastMessage,
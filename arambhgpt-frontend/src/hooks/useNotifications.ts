@@ -1,6 +1,6 @@
 'use client';
 
-import { useState, useEffect, useCallback } from 'react';
+import { useState, useEffect, useCallback, useRef } from 'react';
 import { type Notification, NotificationSettings, NotificationType } from '@/types/notifications';
 import { useAuth } from '@/contexts/AuthContext';
 import { apiClient } from '@/lib/api';
@@ -31,14 +31,33 @@ const defaultSettings: NotificationSettings = {
   frequency: 'daily'
 };
 
+const fromApiNotification = (notif: any): Notification => ({
+  id: notif.id,
+  type: notif.type,
+  title: notif.title,
+  message: notif.message,
+  isRead: notif.is_read,
+  priority: notif.priority,
+  actionUrl: notif.action_url,
+  icon: notif.icon,
+  createdAt: notif.created_at
+});
+
 export function useNotifications(): UseNotificationsReturn {
   const { user } = useAuth();
   const [notifications, setNotifications] = useState<Notification[]>([]);
   const [settings, setSettings] = useState<NotificationSettings>(defaultSettings);
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
+  const [serverUnreadCount, setServerUnreadCount] = useState<number | null>(null);
+  const lastEventId = useRef<string | null>(null);
 
-  const unreadCount = notifications.filter(n => !n.isRead).length;
+  // Once streaming, the server's count covers notifications beyond the loaded page;
+  // tips created in the browser (ids from addNotification) are only known locally
+  const localUnread = notifications.filter(n => !n.isRead && n.id.startsWith('notification-')).length;
+  const unreadCount = serverUnreadCount === null
+    ? notifications.filter(n => !n.isRead).length
+    : serverUnreadCount + localUnread;
 
   // Load notifications from API
   const loadNotifications = useCallback(async () => {
@@ -49,17 +68,14 @@ export function useNotifications(): UseNotificationsReturn {
       setError(null);
       
       const data = await apiClient.getNotifications(50, false);
-      setNotifications(data.map((notif: any) => ({
-        id: notif.id,
-        type: notif.type,
-        title: notif.title,
-        message: notif.message,
-        isRead: notif.is_read,
-        priority: notif.priority,
-        actionUrl: notif.action_url,
-        icon: notif.icon,
-        createdAt: notif.created_at
-      })));
+      setNotifications(data.map(fromApiNotification));
+
+      // The stream resumes after the newest loaded row, so anything created
+      // between this read and the subscribe is replayed rather than missed
+      const newest = data.reduce((max: number, n: any) => Math.max(max, n.event_id ?? 0), 0);
+      if (lastEventId.current === null || newest > Number(lastEventId.current)) {
+        lastEventId.current = String(newest);
+      }
     } catch (err) {
       console.error('Failed to load notifications:', err);
       setError('Failed to load notifications');
@@ -288,11 +304,75 @@ export function useNotifications(): UseNotificationsReturn {
   // Load data on mount
   useEffect(() => {
     if (user && apiClient.isAuthenticated()) {
-      loadNotifications();
+      // With streaming, the stream effect loads the list before it connects
+      if (typeof EventSource === 'undefined') loadNotifications();
       loadSettings();
     }
   }, [user, loadNotifications, loadSettings]);
 
+  // Live updates over server-sent events instead of polling
+  useEffect(() => {
+    if (!user || !apiClient.isAuthenticated() || typeof EventSource === 'undefined') return;
+
+    let source: EventSource | null = null;
+    let retryTimer: ReturnType<typeof setTimeout> | null = null;
+    let closed = false;
+
+    const connect = async () => {
+      let url: string;
+      try {
+        url = await apiClient.getNotificationStreamUrl(lastEventId.current);
+      } catch (err) {
+        console.error('Failed to open notification stream:', err);
+        retryTimer = setTimeout(connect, 30000);
+        return;
+      }
+      if (closed) return;
+
+      const stream = new EventSource(url);
+      source = stream;
+
+      const track = (event: MessageEvent) => {
+        if (event.lastEventId) lastEventId.current = event.lastEventId;
+      };
+
+      stream.addEventListener('notification', (event) => {
+        track(event as MessageEvent);
+        const notification = fromApiNotification(JSON.parse((event as MessageEvent).data));
+        setNotifications(prev => prev.some(n => n.id === notification.id) ? prev : [notification, ...prev]);
+      });
+      stream.addEventListener('unread_count', (event) => {
+        track(event as MessageEvent);
+        setServerUnreadCount(JSON.parse((event as MessageEvent).data).unread_count);
+      });
+      stream.addEventListener('read', (event) => {
+        const data = JSON.parse((event as MessageEvent).data);
+        setNotifications(prev => prev.map(n => (data.all || data.ids?.includes(n.id)) ? { ...n, isRead: true } : n));
+      });
+      stream.addEventListener('reset', (event) => {
+        track(event as MessageEvent);
+        loadNotifications();
+      });
+      stream.onerror = () => {
+        // The browser retries on its own; a closed stream usually means the token expired
+        if (stream.readyState === EventSource.CLOSED && !closed) {
+          stream.close();
+          retryTimer = setTimeout(connect, 5000);
+        }
+      };
+    };
+
+    loadNotifications().then(() => {
+      if (!closed) connect();
+    });
+
+    return () => {
+      closed = true;
+      source?.close();
+      if (retryTimer) clearTimeout(retryTimer);
+    };
+  }, [user, loadNotifications]);
+
   // Set up daily reminders
   useEffect(() => {
     if (settings.moodReminders && user) {
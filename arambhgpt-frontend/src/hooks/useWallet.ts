@@ -8,6 +8,8 @@ export function useWallet() {
   const { user } = useAuth();
   const [balance, setBalance] = useState<WalletBalance | null>(null);
   const [transactions, setTransactions] = useState<Transaction[]>([]);
+  // The transactions endpoint pages; its next cursor comes in the X-Next-Cursor header
+  const [transactionsCursor, setTransactionsCursor] = useState<string | null>(null);
   const [activeSession, setActiveSession] = useState<ActiveSession | null>(null);
   const [isLoading, setIsLoading] = useState(false);
 
@@ -26,21 +28,27 @@ export function useWallet() {
     }
   };
 
-  // Fetch transaction history
-  const fetchTransactions = async () => {
+  // Fetch transaction history: the newest page, or the page after `cursor`
+  const fetchTransactions = async (cursor?: string) => {
     if (!user) return;
     
     try {
-      const response = await fetch(`http://localhost:8000/api/wallet/transactions?userId=${user.id}`);
+      const query = cursor ? `&cursor=${encodeURIComponent(cursor)}` : '';
+      const response = await fetch(`http://localhost:8000/api/wallet/transactions?userId=${user.id}${query}`);
       if (response.ok) {
         const data = await response.json();
-        setTransactions(data);
+        setTransactions(prev => cursor ? [...prev, ...data] : data);
+        setTransactionsCursor(response.headers.get('X-Next-Cursor'));
       }
     } catch (error) {
       console.error('Error fetching transactions:', error);
     }
   };
 
+  const loadMoreTransactions = async () => {
+    if (transactionsCursor) await fetchTransactions(transactionsCursor);
+  };
+
   // Add money to wallet
   const rechargeWallet = async (amount: number, paymentMethod: string) => {
     if (!user) throw new Error('User not authenticated');
@@ -178,6 +186,8 @@ export function useWallet() {
     getSessionDuration,
     getCurrentSessionCost,
     fetchBalance,
-    fetchTransactions
+    fetchTransactions,
+    hasMoreTransactions: transactionsCursor !== null,
+    loadMoreTransactions
   };
 }
\ No newline at end of file
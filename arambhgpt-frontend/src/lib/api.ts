@@ -438,8 +438,13 @@ class ApiClient {
     );
   }
 
-  async getConversation(id: string): Promise<Conversation> {
-    const response = await this.request<Conversation>(`/api/history/conversations/${id}`);
+  async getConversation(id: string, options: { before?: string | null; limit?: number } = {}): Promise<Conversation> {
+    const queryParams = new URLSearchParams();
+    if (options.before) queryParams.append('before', options.before);
+    if (options.limit) queryParams.append('limit', options.limit.toString());
+
+    const query = queryParams.toString();
+    const response = await this.request<Conversation>(`/api/history/conversations/${id}${query ? `?${query}` : ''}`);
 
     if (response.success && response.data) {
       return response.data;
@@ -767,6 +772,32 @@ class ApiClient {
     }
   }
 
+  // URL for the server-sent notification stream (EventSource cannot send auth headers)
+  async getNotificationStreamUrl(lastEventId?: string | null): Promise<string> {
+    try {
+      const response = await fetch(`${this.baseURL}/notifications/stream-token`, {
+        method: 'GET',
+        headers: this.getHeaders(),
+      });
+
+      if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+      }
+
+      const { token } = await response.json();
+      const queryParams = new URLSearchParams({ token });
+      if (lastEventId) queryParams.append('last_event_id', lastEventId);
+      return `${this.baseURL}/notifications/stream?${queryParams.toString()}`;
+    } catch (error) {
+      console.error('Notification stream token API error:', error);
+      throw new AppError(
+        'Failed to open notification stream',
+        ErrorType.NETWORK_ERROR,
+        500
+      );
+    }
+  }
+
   // Social Features API
   async getSupportGroups(limit = 20): Promise<any> {
     const response = await this.request(`/social/groups?limit=${limit}`);
@@ -32,6 +32,11 @@ export interface Conversation {
   messages: Message[];
   is_archived: boolean;
   message_count: number;
+  // The detail endpoint returns one window of messages; page back with before_cursor
+  has_older?: boolean;
+  has_newer?: boolean;
+  before_cursor?: string | null;
+  after_cursor?: string | null;
 }
 
 export interface ConversationSummary {
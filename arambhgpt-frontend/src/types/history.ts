@@ -12,10 +12,14 @@ export interface SearchRequest {
 
 export interface SearchResult {
   conversation: ConversationSummary;
-  highlights: string[];
+  highlights: string[]; // plain text, matches wrapped in HIGHLIGHT_OPEN/HIGHLIGHT_CLOSE
   relevance_score: number;
 }
 
+// Search highlight markers (STX/ETX); highlights are never HTML
+export const HIGHLIGHT_OPEN = '\u0002';
+export const HIGHLIGHT_CLOSE = '\u0003';
+
 export interface SearchResponse {
   results: SearchResult[];
   total_count: number;
@@ -34,6 +34,7 @@ export type {
   ExportRequest,
   BulkOperationRequest,
 } from './history';
+export { HIGHLIGHT_OPEN, HIGHLIGHT_CLOSE } from './history';
 
 // API types
 export type {